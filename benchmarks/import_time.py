@@ -0,0 +1,107 @@
+"""
+Import-Time Budget for the utils Package
+========================================
+
+Checks that reading the brand palette through ``utils`` stays cheap.
+
+Each run starts a fresh interpreter with ``python -X importtime``, executes
+a snippet and adds up the time of every module the snippet imported (the
+top-level entries logged after ``site``). The check fails if the fastest
+of the runs exceeds the budget or if a heavy module (matplotlib, pandas,
+numpy) was imported at all.
+
+Usage:
+    python benchmarks/import_time.py                  # Default budget
+    python benchmarks/import_time.py --budget-ms 30   # Stricter budget
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+SNIPPET = 'import utils; utils.PERIOSPOT_COLORS'
+FORBIDDEN_MODULES = ('matplotlib', 'pandas', 'numpy')
+
+# "import time:  self [us] | cumulative | module" (nesting = leading spaces)
+_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def measure(snippet=SNIPPET):
+    """
+    Run a snippet under ``-X importtime`` in a fresh interpreter.
+
+    Parameters
+    ----------
+    snippet : str
+        Python code to run from the project root.
+
+    Returns
+    -------
+    tuple of (float, list of str, list of (str, float))
+        Milliseconds spent importing for the snippet, every module it
+        imported, and the top-level imports with their cumulative
+        milliseconds.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', snippet],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True)
+
+    imported = []
+    top_level = []
+    after_site = False
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if not after_site:
+            # Everything up to 'site' belongs to interpreter startup
+            after_site = not indent and name == 'site'
+            continue
+        imported.append(name)
+        if not indent:
+            top_level.append((name, int(cumulative) / 1000))
+
+    total = sum(ms for _, ms in top_level)
+    return total, imported, top_level
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the import-time budget of utils.')
+    parser.add_argument('--budget-ms', type=float, default=50.0,
+                        help='Maximum import time of the snippet (default: 50 ms)')
+    parser.add_argument('--runs', type=int, default=5,
+                        help='Fresh interpreters to try; the fastest counts (default: 5)')
+    parser.add_argument('--snippet', default=SNIPPET,
+                        help=f'Code to time (default: {SNIPPET!r})')
+    args = parser.parse_args()
+
+    runs = [measure(args.snippet) for _ in range(args.runs)]
+    total, imported, top_level = min(runs, key=lambda run: run[0])
+
+    print(f"Snippet: {args.snippet}")
+    print(f"Import time: {total:.1f} ms (fastest of {args.runs}; budget {args.budget_ms:.0f} ms)")
+    for name, ms in sorted(top_level, key=lambda item: -item[1])[:5]:
+        print(f"  {ms:7.1f} ms  {name}")
+
+    heavy = sorted({name for name in imported
+                    if name.split('.')[0] in FORBIDDEN_MODULES})
+    failed = False
+    if heavy:
+        print(f"✗ Heavy modules imported: {', '.join(heavy[:5])}"
+              f"{' ...' if len(heavy) > 5 else ''}")
+        failed = True
+    if total > args.budget_ms:
+        print(f"✗ Over budget by {total - args.budget_ms:.1f} ms")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✓ Within budget")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,412 @@
+"""
+Benchmark Suite for Machine Learning For Dentists
+=================================================
+
+Times the data generators, the model-fitting path and every figure of the
+chapter scripts across dataset sizes, and stores the results as JSON so
+runs from different commits can be compared.
+
+Each benchmark records, per size N:
+
+    seconds        best wall time over the repeats
+    peak_rss_mb    peak resident memory of the process during the run
+    delta_rss_mb   peak minus the memory in use before the run
+
+Every size runs in a fresh Python process, so memory numbers of one size
+do not leak into the next. Work shared by several benchmarks (generating
+a dataset, training the model for the figures) is done once per process
+and is not timed. Peak memory uses Linux's /proc counters; on other
+systems the memory columns are empty.
+
+Usage:
+    python benchmarks/run.py                          # N = 1e3 ... 1e7
+    python benchmarks/run.py --sizes 1000 100000      # Chosen sizes
+    python benchmarks/run.py --only generate model    # Name prefixes
+    python benchmarks/run.py --list                   # Show the benchmarks
+    python benchmarks/run.py --compare OLD.json NEW.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CHAPTERS_DIR = PROJECT_ROOT / 'chapters'
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.profiling import peak_rss_mb, reset_peak_rss, rss_mb
+
+# =============================================================================
+# CHAPTER CODE AND SHARED SETUP
+# =============================================================================
+
+
+def _chapter_module(relative_path, base=CHAPTERS_DIR):
+    """Import a chapter script (their folder names are not valid modules)."""
+    path = base / relative_path
+    name = 'bench_' + path.with_suffix('').as_posix().replace('/', '_')
+    # Like running the script: its own folder is importable (e.g. model_config)
+    if str(path.parent) not in sys.path:
+        sys.path.insert(0, str(path.parent))
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+def ch03_generator():
+    return _chapter_module('03_linear_regression/data/generate_implant_data.py')
+
+
+def ch03_figures():
+    return _chapter_module('03_linear_regression/generate_figures.py')
+
+
+def ch04_generator():
+    return _chapter_module('04_logistic_regression/data/generate_implant_success_data.py')
+
+
+def ch04_figures():
+    return _chapter_module('04_logistic_regression/generate_figures.py')
+
+
+def d1_generator():
+    return _chapter_module('D1_core_tabular/generate_dental_clinical_data.py',
+                           base=PROJECT_ROOT / 'data')
+
+
+# Results of the shared setups, per process: (setup name, n) → value
+_SETUP_CACHE = {}
+_SCRATCH = tempfile.TemporaryDirectory(prefix='benchmarks_')
+
+
+def _shared(setup, n):
+    key = (setup.__name__, n)
+    if key not in _SETUP_CACHE:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _SETUP_CACHE[key] = setup(n)
+    return _SETUP_CACHE[key]
+
+
+def ch03_data_file(n):
+    """n chapter-03 cases written as Parquet, as the generator would."""
+    path = Path(_SCRATCH.name) / f'{n}' / 'implant_bone_loss.parquet'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ch03_generator().generate_implant_bone_loss_parallel(n, n_workers=1).to_parquet(path)
+    return path
+
+
+def ch04_data_file(n):
+    """n chapter-04 cases written as Parquet, as the generator would."""
+    path = Path(_SCRATCH.name) / f'{n}' / 'implant_success_data_training.parquet'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    ch04_generator().generate_implant_success_data_parallel(n, n_workers=1).to_parquet(path)
+    return path
+
+
+def ch03_state(n):
+    return ch03_figures().prepare_state(_shared(ch03_data_file, n),
+                                        figures_dir=_shared(ch03_data_file, n).parent)
+
+
+def ch03_describe(n):
+    """One-pass statistics of the chapter-03 columns (Figures 1 and 2)."""
+    from utils.column_stats import describe_files
+    module = ch03_figures()
+    return describe_files(_shared(ch03_data_file, n), module.NUMERIC_COLUMNS,
+                          bins={module.TARGET_COLUMN: module.MBL_BIN_EDGES},
+                          chunk_size=module.DESCRIBE_CHUNK_SIZE, n_workers=1)
+
+
+def ch03_registry_root(n):
+    """Scratch project root holding n chapter-03 cases, column cache filled."""
+    from utils.datasets import dataset_path, load_dataset
+    root = Path(_SCRATCH.name) / f'{n}' / 'registry'
+    path = dataset_path('implant_bone_loss', root=root).with_suffix('.parquet')
+    path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copyfile(_shared(ch03_data_file, n), path)
+    load_dataset('implant_bone_loss', root=root)
+    return root
+
+
+def ch03_load_columns(n):
+    """Three chapter-03 columns from the registry's column cache, summed."""
+    from utils.datasets import load_dataset
+    df = load_dataset('implant_bone_loss', root=_shared(ch03_registry_root, n),
+                      columns=['age', 'hba1c', 'marginal_bone_loss_mm'])
+    return df.sum()
+
+
+def ch04_validate(n):
+    """Schema checks of n chapter-04 cases, in this process."""
+    from utils.schema import validate_files
+    return validate_files(_shared(ch04_data_file, n), n_workers=1)
+
+
+def ch04_fit(n):
+    """Fit the chapter-04 model on n cases, bypassing stored fits."""
+    from utils.model_store import fit_scaled_model
+    module = ch04_figures()
+    return fit_scaled_model(_shared(ch04_data_file, n), module.FEATURE_COLUMNS, 'success',
+                            module.LogisticRegression, module.MODEL_PARAMS,
+                            module.SPLIT_PARAMS, stratify=True, force=True)
+
+
+def ch04_state(n):
+    return ch04_figures().prepare_state(_shared(ch04_data_file, n),
+                                        figures_dir=_shared(ch04_data_file, n).parent)
+
+
+# =============================================================================
+# BENCHMARKS
+# =============================================================================
+
+
+@dataclass
+class Benchmark:
+    """One timed operation; ``run(n)`` does the work for n rows."""
+    name: str
+    run: callable
+    setup: callable = None    # Untimed shared work, done before the first run
+    per_n: bool = True        # False: independent of N, measured once
+    sizes: tuple = None       # Only run at these N (None: every requested N)
+
+    def runs_at(self, n):
+        return self.per_n and (self.sizes is None or n in self.sizes)
+
+
+def _figure_benchmarks(prefix, figures_module, state_setup):
+    benchmarks = []
+    for name in figures_module().FIGURES:
+        def run(n, name=name):
+            figures_module().FIGURES[name](_shared(state_setup, n))
+        benchmarks.append(Benchmark(f'{prefix}.{name}', run,
+                                    setup=lambda n: _shared(state_setup, n)))
+    return benchmarks
+
+
+def _setup_style(n):
+    from utils.periospot_style import setup_periospot_style
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_periospot_style()
+
+
+def all_benchmarks():
+    """Every benchmark of the suite, in run order."""
+    return [
+        Benchmark('generate.ch03_implant_bone_loss',
+                  lambda n: ch03_generator().generate_implant_bone_loss(n)),
+        Benchmark('generate.ch04_implant_success_data',
+                  lambda n: ch04_generator().generate_implant_success_data(n)),
+        Benchmark('generate.d1_dental_clinical_data',
+                  lambda n: d1_generator().generate_dental_clinical_data(n)),
+        Benchmark('describe.ch03_column_stats', ch03_describe,
+                  setup=lambda n: _shared(ch03_data_file, n)),
+        Benchmark('load.ch03_three_columns', ch03_load_columns,
+                  setup=lambda n: _shared(ch03_registry_root, n)),
+        Benchmark('validate.ch04_implant_success_data', ch04_validate,
+                  setup=lambda n: _shared(ch04_data_file, n)),
+        Benchmark('model.ch03_prepare_state', ch03_state,
+                  setup=lambda n: _shared(ch03_data_file, n)),
+        Benchmark('model.ch04_fit', ch04_fit,
+                  setup=lambda n: _shared(ch04_data_file, n)),
+        # Loads the fit stored by model.ch04_fit (see utils.model_store)
+        Benchmark('model.ch04_prepare_state', ch04_state,
+                  setup=lambda n: _shared(ch04_fit, n)),
+        *_figure_benchmarks('figures.ch03', ch03_figures, ch03_state),
+        *_figure_benchmarks('figures.ch04', ch04_figures, ch04_state),
+        Benchmark('style.setup_periospot_style', _setup_style, per_n=False),
+    ]
+
+
+def select(benchmarks, only=None):
+    if not only:
+        return benchmarks
+    return [b for b in benchmarks if any(b.name.startswith(prefix) for prefix in only)]
+
+
+# =============================================================================
+# MEASUREMENT (runs inside the per-size worker process)
+# =============================================================================
+
+
+def measure(benchmark, n, min_seconds=0.2, max_repeats=5):
+    """
+    Time one benchmark at size n; the first run also measures memory.
+
+    Repeats until min_seconds have been spent (at most max_repeats times)
+    and reports the fastest run.
+    """
+    if benchmark.setup is not None:
+        benchmark.setup(n)
+    times = []
+    peak = delta = None
+    while True:
+        before = rss_mb()
+        reset_peak_rss()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            benchmark.run(n)
+        times.append(time.perf_counter() - start)
+        if peak is None:
+            peak = peak_rss_mb()
+            delta = peak - before if peak is not None and before is not None else None
+        if sum(times) >= min_seconds or len(times) >= max_repeats:
+            break
+    return {'benchmark': benchmark.name, 'n': n, 'seconds': min(times),
+            'repeats': len(times), 'peak_rss_mb': peak, 'delta_rss_mb': delta}
+
+
+def _worker(n, names):
+    """Run the named benchmarks at one size; print JSON lines."""
+    import warnings
+    import matplotlib
+    matplotlib.use('Agg')
+    warnings.simplefilter('ignore', FutureWarning)
+    # Fitted models go to the scratch folder, not the project's store
+    os.environ['PERIOSPOT_MODEL_CACHE'] = str(Path(_SCRATCH.name) / 'model_cache')
+
+    by_name = {b.name: b for b in all_benchmarks()}
+    for name in names:
+        result = measure(by_name[name], n)
+        print(json.dumps(result), flush=True)
+
+
+# =============================================================================
+# ORCHESTRATION AND COMPARISON
+# =============================================================================
+
+
+def _git_commit():
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=PROJECT_ROOT, capture_output=True,
+                              text=True).stdout.strip()
+    return {'commit': git('rev-parse', '--short', 'HEAD') or None,
+            'dirty': bool(git('status', '--porcelain', '--untracked-files=no'))}
+
+
+def run_suite(benchmarks, sizes):
+    """Run every benchmark at every size, one worker process per size."""
+    results = []
+    plan = [(None, [b.name for b in benchmarks if not b.per_n])]
+    plan += [(n, [b.name for b in benchmarks if b.runs_at(n)]) for n in sizes]
+
+    for n, names in plan:
+        if not names:
+            continue
+        worker_n = n if n is not None else 0
+        process = subprocess.Popen(
+            [sys.executable, __file__, '--worker', str(worker_n), *names],
+            cwd=PROJECT_ROOT, stdout=subprocess.PIPE, text=True)
+        for line in process.stdout:
+            result = json.loads(line)
+            result['n'] = n
+            results.append(result)
+            memory = (f"{result['peak_rss_mb']:9.0f} MB {result['delta_rss_mb']:+9.0f} MB"
+                      if result['peak_rss_mb'] is not None else '')
+            size = f'{n:>10,}' if n is not None else f'{"-":>10}'
+            print(f"  {result['benchmark']:45} {size} {result['seconds']:10.4f}s {memory}",
+                  flush=True)
+        if process.wait() != 0:
+            print(f"  ✗ worker for N={n} failed (exit {process.returncode})")
+    return results
+
+
+def compare(old_path, new_path, threshold=1.25):
+    """Print new/old time ratios; return the number of regressions."""
+    with open(old_path) as f:
+        old = {(r['benchmark'], r['n']): r for r in json.load(f)['results']}
+    with open(new_path) as f:
+        new = {(r['benchmark'], r['n']): r for r in json.load(f)['results']}
+
+    regressions = 0
+    print(f"{'benchmark':45} {'N':>10} {'old s':>10} {'new s':>10} {'ratio':>7}")
+    for key in sorted(set(old) & set(new), key=lambda k: (k[0], k[1] or 0)):
+        ratio = new[key]['seconds'] / max(old[key]['seconds'], 1e-12)
+        # Sub-millisecond differences are timer noise, whatever the ratio
+        noise = abs(new[key]['seconds'] - old[key]['seconds']) < 1e-3
+        slower = ratio > threshold and not noise
+        faster = ratio < 1 / threshold and not noise
+        flag = '  ✗ slower' if slower else ('  ✓ faster' if faster else '')
+        regressions += slower
+        size = f'{key[1]:>10,}' if key[1] is not None else f'{"-":>10}'
+        print(f"{key[0]:45} {size} {old[key]['seconds']:10.4f} {new[key]['seconds']:10.4f} "
+              f"{ratio:7.2f}{flag}")
+    return regressions
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == '--worker':
+        _worker(int(sys.argv[2]) or None, sys.argv[3:])
+        return
+
+    parser = argparse.ArgumentParser(description='Run the benchmark suite.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES),
+                        help='Dataset sizes N (default: 1e3 to 1e7)')
+    parser.add_argument('--only', nargs='+', metavar='PREFIX',
+                        help='Only benchmarks whose names start with these prefixes')
+    parser.add_argument('--output', type=Path,
+                        help='Results file (default: benchmarks/results/<time>_<commit>.json)')
+    parser.add_argument('--list', action='store_true', help='List the benchmarks and exit')
+    parser.add_argument('--compare', nargs=2, type=Path, metavar=('OLD', 'NEW'),
+                        help='Compare two results files instead of running')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Slowdown ratio reported as a regression (default: 1.25)')
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(*args.compare, threshold=args.threshold)
+        print(f"\n{regressions} regression(s) above {args.threshold:.2f}x")
+        sys.exit(1 if regressions else 0)
+
+    benchmarks = select(all_benchmarks(), args.only)
+    if args.list or not benchmarks:
+        for benchmark in benchmarks:
+            print(f"  {benchmark.name}")
+        return
+
+    meta = {
+        **_git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'sizes': args.sizes,
+    }
+    print(f"Running {len(benchmarks)} benchmarks at N = "
+          f"{', '.join(f'{n:,}' for n in args.sizes)} (commit {meta['commit']})")
+    start = time.perf_counter()
+    results = run_suite(benchmarks, args.sizes)
+    meta['seconds'] = time.perf_counter() - start
+
+    output = args.output
+    if output is None:
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = RESULTS_DIR / f"{stamp}_{meta['commit'] or 'nogit'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""
+Load Test for the Local Scoring Service
+=======================================
+
+Sends single-case requests to utils.scoring_service from many concurrent
+clients and reports latency percentiles and throughput, so the effect of
+the micro-batching window can be measured.
+
+Each client keeps one HTTP/1.1 connection open and sends its next request
+as soon as the previous answer arrives (closed loop). Cases are rows of
+the chapter 04 dataset. For every concurrency level the script prints:
+
+    req/s        answered requests per second
+    p50/p90/p99  latency percentiles in milliseconds
+    batch        mean cases per scored batch (from the service's /health)
+
+By default the script starts its own service (one per --max-wait-ms
+value) in a subprocess; --url tests one that is already running.
+
+Usage:
+    python benchmarks/scoring_load.py
+    python benchmarks/scoring_load.py --concurrency 1 16 64 --duration 5
+    python benchmarks/scoring_load.py --max-wait-ms 0 2 10   # Compare windows
+    python benchmarks/scoring_load.py --url 127.0.0.1:8765
+"""
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CHAPTER_DIR = PROJECT_ROOT / 'chapters' / '04_logistic_regression'
+MODEL_PATH = CHAPTER_DIR / 'models' / 'implant_success_model.joblib'
+DATA_PATH = CHAPTER_DIR / 'data' / 'implant_success_data_training.csv'
+
+sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def _request_bodies(n=500):
+    """Pre-encoded POST /score requests, one per dataset row."""
+    import pandas as pd
+    rows = pd.read_csv(DATA_PATH).drop(columns=['patient_id', 'success']).head(n)
+    return [
+        (f"POST /score HTTP/1.1\r\nHost: localhost\r\n"
+         f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+         ).encode() + body
+        for body in (json.dumps(case).encode() for case in rows.to_dict('records'))
+    ]
+
+
+async def _read_response(reader):
+    """Read one response; return its status code and body."""
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+
+async def _client(host, port, requests, deadline, latencies, offset):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(requests[i % len(requests)])
+            status, _ = await _read_response(reader)
+            if status != 200:
+                raise RuntimeError(f"service answered {status}")
+            latencies.append(time.perf_counter() - start)
+            i += 1
+    finally:
+        writer.close()
+
+
+async def _health(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b"GET /health HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n")
+    _, body = await _read_response(reader)
+    writer.close()
+    return json.loads(body)
+
+
+async def run_level(host, port, requests, concurrency, duration):
+    """Load the service with n concurrent clients; return the statistics."""
+    before = await _health(host, port)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, requests, start + duration, latencies, offset=i * 37)
+        for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    after = await _health(host, port)
+
+    batches = after['batches'] - before['batches']
+    ms = 1000 * np.array(latencies)
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p90_ms': float(np.percentile(ms, 90)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'mean_batch': (after['cases_scored'] - before['cases_scored']) / batches if batches else 0.0,
+    }
+
+
+def _start_service(model, max_wait_ms, max_batch):
+    """Start the service on a free port; return (process, host, port)."""
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'utils.scoring_service', str(model), '--port', '0',
+         '--max-wait-ms', str(max_wait_ms), '--max-batch', str(max_batch)],
+        cwd=PROJECT_ROOT, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()    # "Scoring ... on http://host:port ..."
+    if not line:
+        raise RuntimeError("the scoring service did not start")
+    host, port = line.split('http://')[1].split()[0].rsplit(':', 1)
+    return process, host, int(port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load-test the local scoring service.')
+    parser.add_argument('--url', default=None,
+                        help='host:port of a running service (default: start one)')
+    parser.add_argument('--model', type=Path, default=MODEL_PATH,
+                        help='Model for the started service (default: chapter 04 model)')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128],
+                        help='Concurrent clients per level (default: 1 8 32 128)')
+    parser.add_argument('--duration', type=float, default=3.0,
+                        help='Seconds per level (default: 3)')
+    parser.add_argument('--max-wait-ms', type=float, nargs='+', default=[0.0],
+                        help='Batching windows of the started service (default: 0)')
+    parser.add_argument('--max-batch', type=int, default=256,
+                        help='Batch size limit of the started service (default: 256)')
+    args = parser.parse_args()
+
+    requests = _request_bodies()
+    if args.url is None and not args.model.exists():
+        sys.exit(f"No model at {args.model}; run "
+                 f"chapters/04_logistic_regression/train_model.py first")
+
+    windows = [None] if args.url else args.max_wait_ms
+    print(f"{'window ms':>9} {'clients':>7} {'requests':>9} {'req/s':>9} "
+          f"{'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'batch':>7}")
+    for window in windows:
+        process = None
+        if args.url:
+            host, port = args.url.rsplit(':', 1)
+            port = int(port)
+        else:
+            process, host, port = _start_service(args.model, window, args.max_batch)
+        try:
+            for concurrency in args.concurrency:
+                result = asyncio.run(run_level(host, port, requests,
+                                               concurrency, args.duration))
+                label = f"{window:9g}" if window is not None else f"{'-':>9}"
+                print(f"{label} {concurrency:7d} {result['requests']:9d} "
+                      f"{result['rps']:9.0f} {result['p50_ms']:8.2f} "
+                      f"{result['p90_ms']:8.2f} {result['p99_ms']:8.2f} "
+                      f"{result['mean_batch']:7.1f}", flush=True)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Style Application Cost in a Multi-Threaded Renderer
+===================================================
+
+Measures what it costs to put the Periospot style in place for each figure,
+and how a thread pool of renderers behaves with ``periospot_style()``.
+
+Per figure, three ways of applying the style are compared:
+
+    setup        setup_periospot_style()  (global, never restored)
+    rc_context   matplotlib.rc_context(periospot_rc_params())
+    scoped       with periospot_style():  (shared between threads)
+
+For each thread count the script renders the same small line chart and
+reports the mean CPU time spent entering/leaving the style (thread CPU
+time, so waiting for the GIL or another style is not counted) and the
+overall figures per second.
+
+Usage:
+    python benchmarks/style_threads.py
+    python benchmarks/style_threads.py --figures 200 --threads 1 2 4 8
+"""
+
+import argparse
+import contextlib
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.periospot_style import (
+    periospot_rc_params,
+    periospot_style,
+    setup_periospot_style,
+)
+
+X = np.linspace(0, 10, 200)
+
+
+@contextlib.contextmanager
+def _setup_each_time():
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup_periospot_style()
+    yield
+
+
+def _rc_context_each_time():
+    return matplotlib.rc_context(periospot_rc_params())
+
+
+STRATEGIES = {
+    'setup': _setup_each_time,
+    'rc_context': _rc_context_each_time,
+    'scoped': periospot_style,
+}
+
+
+def _render(apply_style):
+    """Draw one figure; return CPU seconds spent applying/removing the style."""
+    start = time.thread_time()
+    style = apply_style()
+    style.__enter__()
+    styling = time.thread_time() - start
+    try:
+        fig, ax = plt.subplots(figsize=(4, 3))
+        ax.plot(X, np.sin(X))
+        ax.set_title('Implant stability')
+        fig.canvas.draw()
+        plt.close(fig)
+    finally:
+        start = time.thread_time()
+        style.__exit__(None, None, None)
+        styling += time.thread_time() - start
+    return styling
+
+
+def run(strategy, n_figures, n_threads):
+    """Render n_figures with n_threads; return (mean style ms, figures/s)."""
+    apply_style = STRATEGIES[strategy]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n_threads) as pool:
+        styling = list(pool.map(lambda _: _render(apply_style), range(n_figures)))
+    elapsed = time.perf_counter() - start
+    return 1000 * np.mean(styling), n_figures / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-figure style application.')
+    parser.add_argument('--figures', type=int, default=100,
+                        help='Figures rendered per measurement (default: 100)')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Thread counts to try (default: 1 2 4 8)')
+    args = parser.parse_args()
+
+    # Warm up fonts and the compiled style
+    run('scoped', 5, 1)
+
+    print(f"{args.figures} figures per run\n")
+    print(f"{'strategy':12} {'threads':>7} {'style ms/fig':>13} {'figures/s':>10}")
+    for strategy in STRATEGIES:
+        # The other strategies mutate shared global state, so they are
+        # only safe (and only measured) in a single thread
+        thread_counts = args.threads if strategy == 'scoped' else [1]
+        for n_threads in thread_counts:
+            style_ms, rate = run(strategy, args.figures, n_threads)
+            print(f"{strategy:12} {n_threads:7d} {style_ms:13.3f} {rate:10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,420 @@
+"""
+Generate all figures for Chapter 03 - Linear Regression
+This script is a standalone version to generate figures without running Jupyter.
+
+The model is trained once; every figure is then drawn by its own function
+from that shared state, in parallel worker processes.
+
+Scatter plots switch to 2D-histogram density plots when there are more points
+than utils.periospot_style.DENSITY_THRESHOLD, so figures of very large
+datasets take about as long to draw as the book's 500 cases.
+
+Figures whose inputs (data, model settings, drawing code, brand palette)
+are unchanged since the last build are skipped.
+
+Usage:
+    python generate_figures.py              # Rebuild changed figures, one worker each
+    python generate_figures.py --workers 1  # Draw everything in this process
+    python generate_figures.py --only 04    # Just predicted vs actual (if changed)
+    python generate_figures.py --force      # Rebuild even if unchanged
+"""
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Headless: figures are only saved, never shown
+import matplotlib.pyplot as plt
+import seaborn as sns
+from pathlib import Path
+
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+# Make the shared utils package importable when run as a script
+CHAPTER_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CHAPTER_DIR.parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.column_stats import ColumnStats, describe_files
+from utils.data_io import read_compact, source_file
+from utils.figure_cache import FigureCache, figure_key, file_digest, select_figures
+from utils.figure_pool import render_figures
+from utils.periospot_style import (
+    PERIOSPOT_COLORS,
+    periospot_rc_params,
+    styled_scatter,
+    use_density_mode,
+)
+from utils.profiling import profiled, stage
+from utils.streaming import StreamingLinearRegression
+
+# Same look as the notebook (setup_periospot_style), without the printout
+plt.rcParams.update(periospot_rc_params())
+
+# Paths are relative to this file, so the script runs from any directory
+DATA_PATH = CHAPTER_DIR / 'data' / 'implant_bone_loss.csv'
+FIGURES_DIR = CHAPTER_DIR / 'figures'
+
+TARGET_COLUMN = 'marginal_bone_loss_mm'
+FEATURE_COLUMNS = ['age', 'hounsfield_units', 'insertion_torque_ncm', 'isq_placement']
+NUMERIC_COLUMNS = [
+    'age', 'hba1c', 'hounsfield_units', 'insertion_torque_ncm',
+    'isq_placement', 'implant_length_mm', 'implant_diameter_mm',
+    TARGET_COLUMN,
+]
+
+SPLIT_PARAMS = dict(test_size=0.2, random_state=42)
+
+# Training rows per update of the regression's sufficient statistics
+FIT_CHUNK_SIZE = 1_000_000
+
+# Rows per chunk of the one-pass column statistics (Figures 1 and 2)
+DESCRIBE_CHUNK_SIZE = 1_000_000
+
+# MBL histogram: 0.01 mm bins centred on the 0.01 mm grid the generator
+# rounds to, covering its 0.1-3.5 mm range; quartiles from it are exact
+MBL_BIN_EDGES = (np.arange(402) - 0.5) / 100
+
+
+# =============================================================================
+# SHARED STATE (computed once, read by every figure)
+# =============================================================================
+
+@dataclass
+class FigureState:
+    """Everything the figures need once the model has been trained."""
+    figures_dir: Path
+    feature_columns: list
+    stats: ColumnStats          # NUMERIC_COLUMNS summary, MBL histogram
+    mbl: np.ndarray             # Target of every case
+    features: np.ndarray        # FEATURE_COLUMNS before imputation (NaN = missing)
+    weights: np.ndarray         # Weights per standard deviation of each feature
+    y_train: np.ndarray
+    y_test: np.ndarray
+    y_pred_train: np.ndarray
+    y_pred_test: np.ndarray
+
+
+@profiled()
+def prepare_state(data_path=DATA_PATH, figures_dir=FIGURES_DIR):
+    """Summarise the data, train the model and collect the predictions."""
+    # One streaming pass: correlations and MBL distribution without holding
+    # the columns only those two figures use
+    with stage('describe'):
+        stats = describe_files(data_path, NUMERIC_COLUMNS, bins={TARGET_COLUMN: MBL_BIN_EDGES},
+                               chunk_size=DESCRIBE_CHUNK_SIZE, n_workers=1)
+
+    print("Loading data...")
+    with stage('load') as load:
+        # Compact dtypes; reads the Parquet copy when the generator wrote one
+        df = read_compact(data_path, columns=FEATURE_COLUMNS + [TARGET_COLUMN])
+        load.add_output(df)
+    print(f"Dataset loaded: {len(df)} cases")
+
+    features = df[FEATURE_COLUMNS].to_numpy(dtype=float)
+    mbl = df[TARGET_COLUMN].to_numpy(dtype=float)
+
+    # Mean imputation of missing values, as in the notebook
+    print("Training model...")
+    with stage('impute'):
+        X = np.where(np.isnan(features), np.nanmean(features, axis=0), features)
+
+    with stage('split'):
+        X_train, X_test, y_train, y_test = train_test_split(X, mbl, **SPLIT_PARAMS)
+
+    # One pass of sufficient statistics; same weights as StandardScaler +
+    # LinearRegression, without scaled copies of the data
+    with stage('fit'):
+        model = StreamingLinearRegression()
+        for start in range(0, len(X_train), FIT_CHUNK_SIZE):
+            model.partial_fit(X_train[start:start + FIT_CHUNK_SIZE],
+                              y_train[start:start + FIT_CHUNK_SIZE])
+
+    with stage('predict'):
+        y_pred_train = model.predict(X_train)
+        y_pred_test = model.predict(X_test)
+
+    return FigureState(
+        figures_dir=Path(figures_dir),
+        feature_columns=list(FEATURE_COLUMNS),
+        stats=stats,
+        mbl=mbl,
+        features=features,
+        weights=model.coef_standardized_,
+        y_train=y_train,
+        y_test=y_test,
+        y_pred_train=y_pred_train,
+        y_pred_test=y_pred_test,
+    )
+
+
+# =============================================================================
+# FIGURES (one function each; every function saves its own PNG)
+# =============================================================================
+
+def plot_mbl_distribution(state):
+    """FIGURE 1: Distribution of Marginal Bone Loss"""
+    # Drawn from the one-pass statistics, not from the cases themselves
+    stats = state.stats
+    counts, edges = stats.histogram(TARGET_COLUMN, max_bins=30)
+    mean = stats.mean[TARGET_COLUMN]
+    fig, axes = plt.subplots(1, 2, figsize=(12, 4))
+
+    # Histogram
+    axes[0].hist(edges[:-1], bins=edges, weights=counts,
+                 color=PERIOSPOT_COLORS['periospot_blue'],
+                 edgecolor='white', alpha=0.8)
+    axes[0].axvline(mean, color=PERIOSPOT_COLORS['crimson_blaze'],
+                    linestyle='--', linewidth=2, label=f"Mean: {mean:.2f} mm")
+    axes[0].set_xlabel('Marginal Bone Loss (mm)')
+    axes[0].set_ylabel('Number of Cases')
+    axes[0].set_title('Distribution of Marginal Bone Loss at 1 Year')
+    axes[0].legend()
+
+    # Box plot (individual outliers are not drawn for very large datasets)
+    axes[1].bxp([stats.box_stats(TARGET_COLUMN)],
+                showfliers=not use_density_mode(stats.count[TARGET_COLUMN]))
+    axes[1].set_ylabel('Marginal Bone Loss (mm)')
+    axes[1].set_title('Box Plot of MBL')
+
+    plt.tight_layout()
+    plt.savefig(state.figures_dir / '01_mbl_distribution.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+def plot_correlation_matrix(state):
+    """FIGURE 2: Feature Correlation Matrix"""
+    correlation_matrix = state.stats.correlation()
+
+    fig, ax = plt.subplots(figsize=(10, 8))
+    mask = np.triu(np.ones_like(correlation_matrix, dtype=bool))
+
+    sns.heatmap(correlation_matrix, mask=mask, annot=True, fmt='.2f',
+                cmap='RdBu_r', center=0, vmin=-1, vmax=1,
+                square=True, linewidths=0.5, ax=ax)
+
+    ax.set_title('Feature Correlation Matrix', fontsize=14, fontweight='bold')
+    plt.tight_layout()
+    plt.savefig(state.figures_dir / '02_correlation_matrix.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+def plot_feature_weights(state):
+    """FIGURE 3: Feature Weights"""
+    weights_df = pd.DataFrame({
+        'Feature': state.feature_columns,
+        'Weight': state.weights,
+        'Abs_Weight': np.abs(state.weights)
+    }).sort_values('Abs_Weight', ascending=False)
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+
+    colors = [PERIOSPOT_COLORS['crimson_blaze'] if w > 0 else PERIOSPOT_COLORS['periospot_blue']
+              for w in weights_df['Weight']]
+
+    bars = ax.barh(weights_df['Feature'], weights_df['Weight'], color=colors, edgecolor='white')
+    ax.axvline(x=0, color='black', linewidth=0.8)
+    ax.set_xlabel('Weight (Standardized)')
+    ax.set_title('Feature Importance in Linear Regression Model\n(Red = increases MBL, Blue = decreases MBL)')
+
+    for bar, weight in zip(bars, weights_df['Weight']):
+        x_pos = weight + 0.01 if weight > 0 else weight - 0.01
+        ha = 'left' if weight > 0 else 'right'
+        ax.text(x_pos, bar.get_y() + bar.get_height()/2, f'{weight:.3f}',
+                va='center', ha=ha, fontsize=10)
+
+    plt.tight_layout()
+    plt.savefig(state.figures_dir / '03_feature_weights.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+def plot_predicted_vs_actual(state):
+    """FIGURE 4: Predicted vs Actual"""
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+
+    panels = [
+        (axes[0], state.y_train, state.y_pred_train, 'periospot_blue', 'Training Set'),
+        (axes[1], state.y_test, state.y_pred_test, 'crimson_blaze', 'Test Set'),
+    ]
+    for ax, y_true, y_pred, color, title in panels:
+        styled_scatter(ax, y_true, y_pred, color=color, alpha=0.5, s=30)
+        ax.plot([y_true.min(), y_true.max()], [y_true.min(), y_true.max()],
+                'r--', linewidth=2, label='Perfect prediction')
+        ax.set_xlabel('Actual MBL (mm)')
+        ax.set_ylabel('Predicted MBL (mm)')
+        ax.set_title(f'{title} (R² = {r2_score(y_true, y_pred):.3f})')
+        ax.legend()
+
+    plt.tight_layout()
+    plt.savefig(state.figures_dir / '04_predicted_vs_actual.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+def plot_feature_vs_target(state):
+    """FIGURE 5: Individual Features vs MBL"""
+    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+
+    features_to_plot = [
+        ('insertion_torque_ncm', 'Insertion Torque (Ncm)', 'crimson_blaze'),
+        ('hounsfield_units', 'Hounsfield Units', 'periospot_blue'),
+        ('isq_placement', 'ISQ at Placement', 'mystic_blue'),
+        ('age', 'Patient Age (years)', 'periospot_yellow'),
+    ]
+
+    for ax, (feature, label, color) in zip(axes.flatten(), features_to_plot):
+        x_all = state.features[:, state.feature_columns.index(feature)]
+        present = ~np.isnan(x_all)
+        x_data, y_data = x_all[present], state.mbl[present]
+
+        # Scatter plot (density plot for large datasets)
+        styled_scatter(ax, x_data, y_data, color=color, alpha=0.4, s=30, label='Data points')
+
+        # Add regression line
+        z = np.polyfit(x_data, y_data, 1)
+        p = np.poly1d(z)
+        x_line = np.linspace(x_data.min(), x_data.max(), 100)
+        ax.plot(x_line, p(x_line), color='black', linewidth=2, linestyle='--',
+                label=f'Trend line (slope={z[0]:.4f})')
+
+        corr = np.corrcoef(x_data, y_data)[0, 1]
+
+        ax.set_xlabel(label)
+        ax.set_ylabel('Marginal Bone Loss (mm)')
+        ax.set_title(f'{label} vs MBL\n(r = {corr:.3f})')
+        ax.legend(loc='upper right', fontsize=8)
+
+    plt.tight_layout()
+    plt.savefig(state.figures_dir / '05_feature_vs_target_scatter.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+def plot_residual_analysis(state):
+    """FIGURE 6: Residual Analysis"""
+    residuals_train = state.y_train - state.y_pred_train
+    residuals_test = state.y_test - state.y_pred_test
+
+    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+
+    # Residual distributions (top row)
+    histograms = [
+        (axes[0, 0], residuals_train, 30, 'periospot_blue', 'crimson_blaze', 'Training'),
+        (axes[0, 1], residuals_test, 25, 'crimson_blaze', 'periospot_blue', 'Test'),
+    ]
+    for ax, residuals, bins, color, zero_color, split in histograms:
+        ax.hist(residuals, bins=bins, color=PERIOSPOT_COLORS[color],
+                edgecolor='white', alpha=0.8)
+        ax.axvline(0, color=PERIOSPOT_COLORS[zero_color], linestyle='--', linewidth=2)
+        # Training residuals average to ~1e-16 either side of 0: no "-0.0000"
+        mean = round(residuals.mean(), 4) + 0.0
+        ax.axvline(residuals.mean(), color='black', linestyle='-', linewidth=1.5,
+                   label=f'Mean: {mean:.4f}')
+        ax.set_xlabel('Residual (Actual - Predicted) mm')
+        ax.set_ylabel('Count')
+        ax.set_title(f'Residual Distribution ({split})')
+        ax.legend()
+
+    # Residuals vs predicted (bottom row)
+    scatters = [
+        (axes[1, 0], state.y_pred_train, residuals_train, 'periospot_blue', 'crimson_blaze', 'Training'),
+        (axes[1, 1], state.y_pred_test, residuals_test, 'crimson_blaze', 'periospot_blue', 'Test'),
+    ]
+    for ax, y_pred, residuals, color, zero_color, split in scatters:
+        styled_scatter(ax, y_pred, residuals, color=color, alpha=0.5, s=30)
+        ax.axhline(0, color=PERIOSPOT_COLORS[zero_color], linestyle='--', linewidth=2)
+        ax.set_xlabel('Predicted MBL (mm)')
+        ax.set_ylabel('Residual (mm)')
+        ax.set_title(f'Residuals vs Predicted ({split})')
+
+    plt.tight_layout()
+    plt.savefig(state.figures_dir / '06_residual_analysis.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+# Figure name → drawing function, in chapter order
+FIGURES = {
+    '01_mbl_distribution': plot_mbl_distribution,
+    '02_correlation_matrix': plot_correlation_matrix,
+    '03_feature_weights': plot_feature_weights,
+    '04_predicted_vs_actual': plot_predicted_vs_actual,
+    '05_feature_vs_target_scatter': plot_feature_vs_target,
+    '06_residual_analysis': plot_residual_analysis,
+}
+
+
+def figure_keys():
+    """Content hash of every figure's inputs (see utils.figure_cache)."""
+    inputs = {
+        'data': file_digest(source_file(DATA_PATH)),   # The .parquet twin if current
+        'features': FEATURE_COLUMNS,
+        'split': SPLIT_PARAMS,
+        'mbl_bins': MBL_BIN_EDGES.tolist(),
+    }
+    # Every figure draws from the state prepare_state computes
+    return {name: figure_key(draw, inputs, depends_on=[prepare_state])
+            for name, draw in FIGURES.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate the Chapter 03 figures.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: one per figure; 1 = no pool)')
+    parser.add_argument('--only', nargs='+', metavar='FIGURE',
+                        help='Only consider these figures (name or number, e.g. 04)')
+    parser.add_argument('--force', action='store_true',
+                        help='Rebuild the selected figures even if unchanged')
+    args = parser.parse_args()
+
+    # Work out which figures changed before paying for the model fit
+    cache = FigureCache(FIGURES_DIR)
+    keys = figure_keys()
+    try:
+        selected = select_figures(list(FIGURES), args.only)
+    except ValueError as error:
+        parser.error(str(error))
+    to_build = selected if args.force else cache.stale({n: keys[n] for n in selected})
+
+    for name in selected:
+        if name not in to_build:
+            print(f"  = {name} (unchanged, skipped)")
+    if not to_build:
+        print("All selected figures are up to date.")
+        return
+
+    state = prepare_state()
+
+    # Create figures directory
+    state.figures_dir.mkdir(exist_ok=True)
+
+    print(f"Generating {len(to_build)} of {len(FIGURES)} figures...")
+    start = time.perf_counter()
+    with stage('render_figures'):
+        timings = render_figures({name: FIGURES[name] for name in to_build}, state,
+                                 n_workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Figures done in {elapsed:.2f}s "
+          f"(slowest: {max(timings.values()):.2f}s, sum: {sum(timings.values()):.2f}s)")
+
+    for name in to_build:
+        cache.record(name, keys[name])
+    cache.save()
+
+    print("\n✅ All figures generated successfully!")
+    print(f"\nModel Performance (test set):")
+    print(f"  R²:   {r2_score(state.y_test, state.y_pred_test):.3f}")
+    print(f"  RMSE: {np.sqrt(mean_squared_error(state.y_test, state.y_pred_test)):.4f} mm")
+    print(f"  MAE:  {mean_absolute_error(state.y_test, state.y_pred_test):.4f} mm")
+
+    # List figures
+    print("\nGenerated figures:")
+    for f in sorted(state.figures_dir.glob('*.png')):
+        print(f"  • {f.relative_to(CHAPTER_DIR)}")
+
+
+if __name__ == '__main__':
+    main()
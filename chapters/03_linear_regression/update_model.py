@@ -0,0 +1,157 @@
+"""
+Keep the Chapter 03 marginal bone loss model up to date as cases arrive.
+
+The linear regression is stored as sufficient statistics (row count,
+means and cross-products of the features and MBL; see
+utils.streaming.StreamingLinearRegression), not as raw rows. New cases
+are added, and withdrawn ones removed, in time proportional to the batch,
+and the weights are identical to refitting LinearRegression on every case.
+
+Missing feature values are filled with the means of the dataset the model
+was built from (saved with the statistics), as the chapter does, so a
+batch gives the same update whenever it arrives.
+
+Usage:
+    python update_model.py                          # Build from the chapter dataset
+    python update_model.py --add new_cases.csv      # Add a day's cases
+    python update_model.py --remove withdrawn.csv   # Take cases out again
+    python update_model.py --check                  # Compare with scikit-learn
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+from pathlib import Path
+
+# Make the shared utils package importable when run as a script
+CHAPTER_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CHAPTER_DIR.parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.data_io import iter_compact
+from utils.profiling import stage
+from utils.streaming import StreamingLinearRegression
+
+DATA_PATH = CHAPTER_DIR / 'data' / 'implant_bone_loss.csv'
+STATS_PATH = CHAPTER_DIR / 'models' / 'mbl_linear_stats.npz'
+
+# Same features and target as generate_figures.py
+TARGET_COLUMN = 'marginal_bone_loss_mm'
+FEATURE_COLUMNS = ['age', 'hounsfield_units', 'insertion_torque_ncm', 'isq_placement']
+
+
+def iter_cases(data_path, chunk_size):
+    """Yield (features with NaN for missing, MBL) chunks of a dataset."""
+    for chunk in iter_compact(data_path, columns=FEATURE_COLUMNS + [TARGET_COLUMN],
+                              chunk_size=chunk_size, dataset='implant_bone_loss'):
+        yield (chunk[FEATURE_COLUMNS].to_numpy(np.float64),
+               chunk[TARGET_COLUMN].to_numpy(np.float64))
+
+
+def impute(X, means):
+    return np.where(np.isnan(X), means, X)
+
+
+def build(data_path, chunk_size):
+    """Two passes: imputation means, then the regression statistics."""
+    with stage('impute'):
+        total = np.zeros(len(FEATURE_COLUMNS))
+        count = np.zeros(len(FEATURE_COLUMNS))
+        for X, _ in iter_cases(data_path, chunk_size):
+            total += np.nansum(X, axis=0)
+            count += (~np.isnan(X)).sum(axis=0)
+        means = total / np.maximum(count, 1)
+
+    with stage('fit'):
+        model = StreamingLinearRegression()
+        for X, y in iter_cases(data_path, chunk_size):
+            model.partial_fit(impute(X, means), y)
+    return model, means
+
+
+def update(model, means, data_path, chunk_size, remove=False):
+    """Add (or remove) every case of a file."""
+    with stage('remove' if remove else 'add'):
+        for X, y in iter_cases(data_path, chunk_size):
+            if remove:
+                model.remove(impute(X, means), y)
+            else:
+                model.partial_fit(impute(X, means), y)
+    return model
+
+
+def check_in_memory(model, means, data_paths):
+    """Fit scikit-learn on all the cases in memory; print the differences."""
+    from sklearn.linear_model import LinearRegression
+
+    chunks = [(impute(X, means), y) for path in data_paths
+              for X, y in iter_cases(path, chunk_size=1_000_000)]
+    X = np.concatenate([X for X, _ in chunks])
+    y = np.concatenate([y for _, y in chunks])
+    reference = LinearRegression().fit(X, y)
+
+    print("\nIn-memory check (scikit-learn, same cases):")
+    print(f"  Max weight difference:  {np.max(np.abs(reference.coef_ - model.coef_)):.2e}")
+    print(f"  Intercept difference:   {abs(reference.intercept_ - model.intercept_):.2e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build or update the Chapter 03 model.')
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--add', type=Path, metavar='FILE',
+                       help='Add the cases of this file (.csv, .parquet or .feather)')
+    group.add_argument('--remove', type=Path, metavar='FILE',
+                       help='Remove the cases of this file (they must have been added)')
+    parser.add_argument('--data', type=Path, default=DATA_PATH,
+                        help='Dataset to build from (default: chapter CSV)')
+    parser.add_argument('--stats', type=Path, default=STATS_PATH,
+                        help='Saved statistics (default: models/mbl_linear_stats.npz)')
+    parser.add_argument('--chunk-size', type=int, default=100_000,
+                        help='Rows read at a time (default: 100000)')
+    parser.add_argument('--check', action='store_true',
+                        help='Compare with scikit-learn (after building from --data)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    batch = args.add or args.remove
+    if batch is None:
+        model, means = build(args.data, args.chunk_size)
+        action = f"Built from {args.data.name}"
+    else:
+        if not args.stats.exists():
+            sys.exit(f"No model at {args.stats}; run update_model.py without --add first")
+        model, extra = StreamingLinearRegression.load(args.stats)
+        means = extra['impute_means']
+        n_before = model.n_samples_seen_
+        update(model, means, batch, args.chunk_size, remove=args.remove is not None)
+        action = (f"{'Removed' if args.remove else 'Added'} "
+                  f"{abs(model.n_samples_seen_ - n_before):,} cases from {batch.name}")
+
+    # Summary first: nothing is written if it cannot be computed
+    summary = []
+    if model.n_samples_seen_ > 0:
+        summary.append("\nWeights (mm of MBL per standard deviation):")
+        for feature, weight in zip(FEATURE_COLUMNS, model.coef_standardized_):
+            summary.append(f"  {feature:22} {weight:+.4f}")
+        summary.append(f"  {'intercept':22} {model.intercept_:+.4f} mm")
+        summary.append(f"\nR² (all cases): {model.r2_:.3f}")
+    else:
+        summary.append("\nNo cases left: weights are undefined until cases are added")
+
+    args.stats.parent.mkdir(parents=True, exist_ok=True)
+    model.save(args.stats, impute_means=means)
+    elapsed = time.perf_counter() - start
+
+    print(f"{action} in {elapsed:.2f}s: {model.n_samples_seen_:,} cases")
+    print(f"✓ Statistics saved to {args.stats}")
+    print("\n".join(summary))
+
+    if args.check and batch is None:
+        check_in_memory(model, means, [args.data])
+
+
+if __name__ == '__main__':
+    main()
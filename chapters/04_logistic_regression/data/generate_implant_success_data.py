@@ -21,56 +21,70 @@ Author: Francisco Teixeira Barbosa
 Project: Machine Learning For Dentists
 """
 
+import argparse
+import sys
 import numpy as np
 import pandas as pd
 from pathlib import Path
 
-# Set random seed for reproducibility
-np.random.seed(42)
+# Make the shared utils package importable when run as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
 
-def generate_implant_success_data(n_samples: int = 500) -> pd.DataFrame:
+from utils.data_io import write_compact
+from utils.profiling import stage
+from utils.schema import validate_frame
+from utils.synthetic_data import (
+    format_ids, generate_parallel, iter_chunks, write_chunks
+)
+
+
+def _simulate_implant_cases(rng, n_samples: int, first_row: int = 0) -> pd.DataFrame:
     """
-    Generate synthetic implant success/failure data.
+    Simulate implant cases by drawing every column from one random source.
     
     Args:
+        rng: np.random.RandomState or np.random.Generator
         n_samples: Number of implant cases to generate
+        first_row: 0-based position of the first case in the whole dataset
         
     Returns:
         DataFrame with features and binary success outcome
     """
     
     # Generate patient demographics
-    age = np.random.normal(55, 12, n_samples).clip(25, 85)
+    age = rng.normal(55, 12, n_samples).clip(25, 85)
     
     # Smoking status (30% smokers, realistic for dental population)
-    smoking_status = np.random.binomial(1, 0.30, n_samples)
+    smoking_status = rng.binomial(1, 0.30, n_samples)
     
     # Diabetes status (15% diabetic)
-    diabetes_status = np.random.binomial(1, 0.15, n_samples)
+    diabetes_status = rng.binomial(1, 0.15, n_samples)
     
     # Generate implant characteristics
     # Insertion torque: 15-50 Ncm, normally distributed
-    insertion_torque = np.random.normal(35, 8, n_samples).clip(15, 50)
+    insertion_torque = rng.normal(35, 8, n_samples).clip(15, 50)
     
     # ISQ at placement: 50-85, correlated with torque
     isq_placement = (
         0.4 * insertion_torque + 
-        np.random.normal(50, 8, n_samples)
+        rng.normal(50, 8, n_samples)
     ).clip(45, 85)
     
     # Bone density (Hounsfield Units): 300-1200
     # Smokers and diabetics tend to have lower bone density
     hounsfield_units = (
-        np.random.normal(700, 150, n_samples) - 
+        rng.normal(700, 150, n_samples) - 
         80 * smoking_status - 
         60 * diabetes_status
     ).clip(250, 1200)
     
     # Implant dimensions
-    implant_length = np.random.choice([8.0, 10.0, 11.5, 13.0], n_samples, 
-                                       p=[0.15, 0.35, 0.35, 0.15])
-    implant_diameter = np.random.choice([3.5, 4.0, 4.5, 5.0], n_samples,
-                                         p=[0.20, 0.40, 0.30, 0.10])
+    implant_length = rng.choice([8.0, 10.0, 11.5, 13.0], n_samples,
+                                p=[0.15, 0.35, 0.35, 0.15])
+    implant_diameter = rng.choice([3.5, 4.0, 4.5, 5.0], n_samples,
+                                  p=[0.20, 0.40, 0.30, 0.10])
     
     # Calculate implant surface area (simplified cylinder approximation)
     implant_surface = np.pi * implant_diameter * implant_length
@@ -100,17 +114,17 @@ def generate_implant_success_data(n_samples: int = 500) -> pd.DataFrame:
     )
     
     # Add some noise to make it realistic
-    log_odds += np.random.normal(0, 0.4, n_samples)
+    log_odds += rng.normal(0, 0.4, n_samples)
     
     # Convert log-odds to probability using sigmoid
     success_prob = 1 / (1 + np.exp(-log_odds))
     
     # Generate binary outcomes based on probability
-    success = np.random.binomial(1, success_prob)
+    success = rng.binomial(1, success_prob)
     
     # Create DataFrame
     df = pd.DataFrame({
-        'patient_id': [f'PAT-{i+1:04d}' for i in range(n_samples)],
+        'patient_id': format_ids('PAT-', first_row + 1, n_samples),
         'age': np.round(age, 1),
         'smoking_status': smoking_status,
         'diabetes_status': diabetes_status,
@@ -127,12 +141,133 @@ def generate_implant_success_data(n_samples: int = 500) -> pd.DataFrame:
     return df
 
 
+def generate_implant_success_data(n_samples: int = 500,
+                                  seed: int = 42) -> pd.DataFrame:
+    """
+    Generate synthetic implant success/failure data.
+    
+    Uses a private legacy RandomState, so seed=42 reproduces the dataset
+    shipped with the chapter without touching numpy's global RNG.
+    
+    Args:
+        n_samples: Number of implant cases to generate
+        seed: Seed for reproducibility
+        
+    Returns:
+        DataFrame with features and binary success outcome
+    """
+    return _simulate_implant_cases(np.random.RandomState(seed), n_samples)
+
+
+def generate_implant_success_data_parallel(n_samples: int, seed: int = 42,
+                                           n_workers: int = None) -> pd.DataFrame:
+    """
+    Generate a large implant success/failure dataset on several cores.
+    
+    Each block of rows is simulated in a worker process from its own seed
+    stream, so the result is bit-identical for any number of workers (and
+    equal to the concatenated output of iter_implant_success_chunks).
+    
+    Args:
+        n_samples: Total number of implant cases to generate
+        seed: Seed of the generation run
+        n_workers: Worker processes (None uses every core)
+        
+    Returns:
+        DataFrame with features and binary success outcome
+    """
+    return generate_parallel(_simulate_implant_cases, n_samples,
+                             seed=seed, n_workers=n_workers)
+
+
+def iter_implant_success_chunks(n_samples: int, chunk_size: int = 100_000,
+                                seed: int = 42, n_workers: int = 1):
+    """
+    Generate implant success/failure data as a stream of DataFrame chunks.
+    
+    Memory stays bounded by the chunk size, so this scales to hundreds of
+    millions of cases. Each block of rows has its own random stream, so the
+    concatenated result is identical for every chunk size (but differs from
+    generate_implant_success_data, which draws from a single
+    RandomState(seed) stream).
+    
+    Args:
+        n_samples: Total number of implant cases to generate
+        chunk_size: Number of cases per yielded chunk
+        seed: Seed of the generation run
+        n_workers: Worker processes simulating blocks (None uses every core)
+        
+    Yields:
+        DataFrames with the same columns as generate_implant_success_data
+    """
+    yield from iter_chunks(_simulate_implant_cases, n_samples,
+                           chunk_size=chunk_size, seed=seed,
+                           n_workers=n_workers)
+
+
+def write_implant_success_chunks(output_path, n_samples: int,
+                                 chunk_size: int = 100_000,
+                                 seed: int = 42, n_workers: int = 1) -> int:
+    """
+    Stream a large implant success/failure dataset to disk chunk by chunk.
+    
+    Args:
+        output_path: Destination .csv (appended chunk by chunk),
+            .parquet or .feather file (stored with compact dtypes)
+        n_samples: Total number of implant cases to generate
+        chunk_size: Number of cases generated and written at a time
+        seed: Seed of the generation run
+        n_workers: Worker processes simulating blocks (None uses every core)
+        
+    Returns:
+        Number of rows written
+    """
+    chunks = iter_implant_success_chunks(n_samples, chunk_size=chunk_size,
+                                         seed=seed, n_workers=n_workers)
+    return write_chunks(chunks, output_path, dataset='implant_success_data')
+
+
 def main():
     """Generate and save the dataset."""
     
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n-samples', type=int, default=500,
+                        help='Number of implant cases (default: 500)')
+    parser.add_argument('--stream-to', type=Path, default=None,
+                        help='Write a large dataset chunk by chunk to this '
+                             '.csv, .parquet or .feather file')
+    parser.add_argument('--chunk-size', type=int, default=100_000,
+                        help='Cases per chunk when streaming (default: 100000)')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed (default: 42)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes when streaming (0 = all cores)')
+    args = parser.parse_args()
+    
+    if args.stream_to is not None:
+        print(f"Streaming {args.n_samples:,} implant cases to {args.stream_to} "
+              f"in chunks of {args.chunk_size:,}...")
+        with stage('stream', output=args.stream_to):
+            n_written = write_implant_success_chunks(
+                args.stream_to, args.n_samples,
+                chunk_size=args.chunk_size, seed=args.seed,
+                n_workers=args.workers or None
+            )
+        print(f"Dataset saved to: {args.stream_to} ({n_written:,} rows)")
+        return
+    
     # Generate data
     print("Generating synthetic implant success/failure dataset...")
-    df = generate_implant_success_data(n_samples=500)
+    with stage('generate') as generate:
+        df = generate_implant_success_data(n_samples=args.n_samples, seed=args.seed)
+        generate.add_output(df)
+    
+    # Nothing is saved unless the clinical constraints of utils.schema hold
+    with stage('validate'):
+        report = validate_frame(df, 'implant_success_data')
+    print(report.format())
+    if not report.ok:
+        sys.exit(1)
     
     # Summary statistics
     print(f"\nDataset Summary:")
@@ -151,14 +286,26 @@ def main():
     
     # Save to CSV
     output_path = Path(__file__).parent / 'implant_success_data.csv'
-    df.to_csv(output_path, index=False)
+    with stage('save_csv', output=output_path):
+        df.to_csv(output_path, index=False)
     print(f"\nDataset saved to: {output_path}")
     
     # Also save a version without the true probability (for realistic training)
     df_train = df.drop(columns=['success_probability_true'])
     train_path = Path(__file__).parent / 'implant_success_data_training.csv'
-    df_train.to_csv(train_path, index=False)
+    with stage('save_csv', output=train_path):
+        df_train.to_csv(train_path, index=False)
     print(f"Training dataset (without true probabilities) saved to: {train_path}")
+    
+    # Columnar copies with compact dtypes (much faster to load)
+    try:
+        for frame, csv_path in [(df, output_path), (df_train, train_path)]:
+            with stage('save_parquet') as save:
+                save.add_output(write_compact(frame, csv_path.with_suffix('.parquet'),
+                                              source_csv=csv_path))
+        print("Parquet copies (compact dtypes) saved next to the CSV files")
+    except ImportError as error:
+        print(f"Skipped Parquet copies: {error}")
 
 
 if __name__ == '__main__':
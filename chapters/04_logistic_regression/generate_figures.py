@@ -1,22 +1,51 @@
 """
 Generate all figures for Chapter 04 - Logistic Regression
 This script is a standalone version to generate figures without running Jupyter.
+
+The model is trained once; every figure is then drawn by its own function
+from that shared state, in parallel worker processes.
+
+Figures whose inputs (data, model settings, drawing code, brand palette)
+are unchanged since the last build are skipped.
+
+Usage:
+    python generate_figures.py              # Rebuild changed figures, one worker each
+    python generate_figures.py --workers 1  # Draw everything in this process
+    python generate_figures.py --only 04    # Just the ROC figure (if changed)
+    python generate_figures.py --force      # Rebuild even if unchanged
 """
 
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+
 import numpy as np
-import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Headless: figures are only saved, never shown
 import matplotlib.pyplot as plt
 import seaborn as sns
 from pathlib import Path
 
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
 from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import (
-    accuracy_score, precision_score, recall_score, f1_score,
-    roc_auc_score, roc_curve, confusion_matrix,
-    precision_recall_curve, average_precision_score
-)
+
+# Make the shared utils package importable when run as a script
+CHAPTER_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CHAPTER_DIR.parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.bootstrap import bootstrap_auc, bootstrap_logistic
+from utils.data_io import read_compact, source_file
+from utils.figure_cache import FigureCache, figure_key, file_digest, select_figures
+from utils.figure_pool import render_figures
+from utils.metrics import ScoreHistogram, confusion_matrix_from_sweep
+from utils.model_store import fit_scaled_model
+from utils.periospot_style import decimate_curve
+from utils.profiling import profiled, stage
+
+# Data, features and model settings shared with train_model.py and train_streaming.py
+from model_config import DATA_PATH, FEATURE_COLUMNS, MODEL_PARAMS, SPLIT_PARAMS, TARGET_COLUMN
 
 # Set random seed
 np.random.seed(42)
@@ -47,246 +76,363 @@ plt.rcParams.update({
     'text.color': PERIOSPOT_COLORS['black']
 })
 
-# Create figures directory
-Path('figures').mkdir(exist_ok=True)
-
-print("Loading data...")
-df = pd.read_csv('data/implant_success_data_training.csv')
-print(f"Dataset loaded: {len(df)} samples")
-
-# FIGURE 1: Class Distribution
-print("Generating Figure 1: Class Distribution...")
-fig, axes = plt.subplots(1, 2, figsize=(12, 5))
-
-class_counts = df['success'].value_counts()
-colors = [PERIOSPOT_COLORS['crimson_blaze'], PERIOSPOT_COLORS['periospot_blue']]
-bars = axes[0].bar(['Failure (0)', 'Success (1)'], 
-                   [class_counts[0], class_counts[1]], 
-                   color=colors, edgecolor='white', linewidth=2)
-axes[0].set_ylabel('Count')
-axes[0].set_title('Class Distribution: Success vs Failure')
-
-for bar, count in zip(bars, [class_counts[0], class_counts[1]]):
-    axes[0].text(bar.get_x() + bar.get_width()/2, bar.get_height() + 5,
-                 f'{count}', ha='center', fontsize=14, fontweight='bold')
-
-axes[1].pie([class_counts[0], class_counts[1]], 
-            labels=['Failure', 'Success'],
-            colors=colors,
-            autopct='%1.1f%%',
-            explode=(0.02, 0.02),
-            startangle=90,
-            textprops={'fontsize': 12})
-axes[1].set_title('Class Proportions')
-
-plt.tight_layout()
-plt.savefig('figures/01_class_distribution.png', dpi=150, bbox_inches='tight')
-plt.close()
-
-# FIGURE 2: Sigmoid Function
-print("Generating Figure 2: Sigmoid Function...")
+# Paths are relative to this file, so the script runs from any directory
+FIGURES_DIR = CHAPTER_DIR / 'figures'
+
+# 95% intervals for the odds ratios (Figure 3) and the test AUC (Figure 4);
+# above 5,000 rows the resamples are m-out-of-n (see utils.bootstrap)
+BOOTSTRAP_PARAMS = dict(n_resamples=2000, seed=42, max_resample_size=5_000)
+
+
+# =============================================================================
+# SHARED STATE (computed once, read by every figure)
+# =============================================================================
+
+@dataclass
+class FigureState:
+    """Everything the figures need once the model has been trained."""
+    figures_dir: Path
+    feature_columns: list
+    class_counts: dict        # {0: n_failures, 1: n_successes}
+    weights: np.ndarray       # model.coef_[0] (standardized features)
+    odds_ratio_ci: np.ndarray # (2, features): 95% bootstrap low, high
+    auc_test_ci: np.ndarray   # (low, high) of the test AUC
+    train_scores: ScoreHistogram  # Outcomes by predicted probability (bounded
+    test_scores: ScoreHistogram   # memory, however many cases were scored)
+
+
+@profiled()
+def prepare_state(data_path=DATA_PATH, figures_dir=FIGURES_DIR, n_workers=None):
+    """Get the trained model, collect the predictions and bootstrap the CIs."""
+    # Fitted once per dataset and settings, then loaded from .model_cache/
+    artifact = fit_scaled_model(data_path, FEATURE_COLUMNS, TARGET_COLUMN, LogisticRegression,
+                                MODEL_PARAMS, SPLIT_PARAMS, stratify=True)
+    arrays = artifact.arrays
+    print(f"{'Trained' if artifact.fitted else 'Loaded'} model for "
+          f"{artifact.meta['n_rows']} samples ({artifact.path.name})")
+
+    # Odds ratios refit on resampled (scaled) training rows; the test AUC
+    # resamples the stored test predictions
+    with stage('bootstrap'):
+        X = read_compact(data_path, columns=FEATURE_COLUMNS)[FEATURE_COLUMNS].to_numpy()
+        X_train = artifact.scaler.transform(X[arrays['train_index']])
+        coef = bootstrap_logistic(X_train, arrays['y_train'], C=MODEL_PARAMS['C'],
+                                  n_workers=n_workers, **BOOTSTRAP_PARAMS)
+        auc = bootstrap_auc(arrays['y_test'], arrays['y_prob_test'], **BOOTSTRAP_PARAMS)
+
+    class_counts = np.bincount(np.concatenate([arrays['y_train'], arrays['y_test']]),
+                               minlength=2)
+
+    return FigureState(
+        figures_dir=Path(figures_dir),
+        feature_columns=list(artifact.feature_columns),
+        class_counts={0: int(class_counts[0]), 1: int(class_counts[1])},
+        weights=artifact.model.coef_[0],
+        odds_ratio_ci=np.exp(np.array(coef.interval(0.95))),
+        auc_test_ci=np.array(auc.interval(0.95)),
+        train_scores=ScoreHistogram.from_scores(arrays['y_train'], arrays['y_prob_train']),
+        test_scores=ScoreHistogram.from_scores(arrays['y_test'], arrays['y_prob_test']),
+    )
+
+
+# =============================================================================
+# FIGURES (one function each; every function saves its own PNG)
+# =============================================================================
+
+def plot_class_distribution(state):
+    """FIGURE 1: Class Distribution"""
+    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
+
+    class_counts = state.class_counts
+    colors = [PERIOSPOT_COLORS['crimson_blaze'], PERIOSPOT_COLORS['periospot_blue']]
+    bars = axes[0].bar(['Failure (0)', 'Success (1)'],
+                       [class_counts[0], class_counts[1]],
+                       color=colors, edgecolor='white', linewidth=2)
+    axes[0].set_ylabel('Count')
+    axes[0].set_title('Class Distribution: Success vs Failure')
+
+    for bar, count in zip(bars, [class_counts[0], class_counts[1]]):
+        axes[0].text(bar.get_x() + bar.get_width()/2, bar.get_height() + 5,
+                     f'{count}', ha='center', fontsize=14, fontweight='bold')
+
+    axes[1].pie([class_counts[0], class_counts[1]],
+                labels=['Failure', 'Success'],
+                colors=colors,
+                autopct='%1.1f%%',
+                explode=(0.02, 0.02),
+                startangle=90,
+                textprops={'fontsize': 12})
+    axes[1].set_title('Class Proportions')
+
+    plt.tight_layout()
+    plt.savefig(state.figures_dir / '01_class_distribution.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+
 def sigmoid(z):
     return 1 / (1 + np.exp(-z))
 
-z = np.linspace(-10, 10, 200)
-p = sigmoid(z)
-
-fig, ax = plt.subplots(figsize=(12, 6))
-ax.plot(z, p, color=PERIOSPOT_COLORS['periospot_blue'], linewidth=3, label='σ(z) = 1/(1+e⁻ᶻ)')
-ax.axhline(0.5, color=PERIOSPOT_COLORS['crimson_blaze'], linestyle='--', alpha=0.7, label='p = 0.5')
-ax.axvline(0, color=PERIOSPOT_COLORS['mystic_blue'], linestyle=':', alpha=0.7, label='z = 0')
-ax.fill_between(z, 0, p, where=(z < 0), alpha=0.2, color=PERIOSPOT_COLORS['crimson_blaze'])
-ax.fill_between(z, 0, p, where=(z >= 0), alpha=0.2, color=PERIOSPOT_COLORS['periospot_blue'])
-
-key_z = [-5, -2, 0, 2, 5]
-for z_val in key_z:
-    p_val = sigmoid(z_val)
-    ax.plot(z_val, p_val, 'o', color=PERIOSPOT_COLORS['mystic_blue'], markersize=10)
-    ax.annotate(f'({z_val}, {p_val:.2f})', (z_val, p_val), 
-                textcoords="offset points", xytext=(0, 15), ha='center', fontsize=9)
-
-ax.set_xlabel('z (linear score)')
-ax.set_ylabel('σ(z) = Probability')
-ax.set_title('The Sigmoid Function: Transforming Scores to Probabilities', fontweight='bold')
-ax.legend(loc='upper left')
-ax.set_xlim(-10, 10)
-ax.set_ylim(-0.05, 1.05)
-ax.grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('figures/02_sigmoid_function.png', dpi=150, bbox_inches='tight')
-plt.close()
-
-# Prepare data for model
-print("Training model...")
-feature_columns = [
-    'insertion_torque_ncm', 'isq_placement', 'hounsfield_units', 'age',
-    'smoking_status', 'diabetes_status', 'implant_length_mm', 'implant_diameter_mm'
-]
-
-X = df[feature_columns]
-y = df['success']
-
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
-
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
-
-model = LogisticRegression(penalty='l2', C=1.0, solver='lbfgs', max_iter=1000, random_state=42)
-model.fit(X_train_scaled, y_train)
-
-weights = model.coef_[0]
-
-# FIGURE 3: Odds Ratios
-print("Generating Figure 3: Odds Ratios...")
-fig, ax = plt.subplots(figsize=(12, 7))
-
-odds_ratios = np.exp(weights)
-sorted_idx = np.argsort(odds_ratios)
-
-y_pos = np.arange(len(feature_columns))
-colors = [PERIOSPOT_COLORS['crimson_blaze'] if odds_ratios[i] < 1 
-          else PERIOSPOT_COLORS['periospot_blue'] for i in sorted_idx]
-
-bars = ax.barh(y_pos, odds_ratios[sorted_idx], color=colors, edgecolor='white', linewidth=2)
-ax.set_yticks(y_pos)
-ax.set_yticklabels([feature_columns[i] for i in sorted_idx])
-ax.axvline(1.0, color=PERIOSPOT_COLORS['mystic_blue'], linestyle='--', linewidth=2, label='OR = 1')
-
-for bar, idx in zip(bars, sorted_idx):
-    width = bar.get_width()
-    x_pos = width + 0.02 if width > 1 else width - 0.1
-    ax.text(x_pos, bar.get_y() + bar.get_height()/2,
-            f'{odds_ratios[idx]:.3f}', va='center', fontsize=10, fontweight='bold')
-
-ax.set_xlabel('Odds Ratio')
-ax.set_title('Feature Importance: Odds Ratios\n(OR > 1 increases success, OR < 1 decreases)', fontweight='bold')
-ax.legend(loc='upper right')
-
-plt.tight_layout()
-plt.savefig('figures/03_odds_ratios.png', dpi=150, bbox_inches='tight')
-plt.close()
-
-# Generate predictions
-y_pred_test = model.predict(X_test_scaled)
-y_prob_test = model.predict_proba(X_test_scaled)[:, 1]
-y_prob_train = model.predict_proba(X_train_scaled)[:, 1]
-
-# FIGURE 4: ROC Curve
-print("Generating Figure 4: ROC Curve...")
-fig, axes = plt.subplots(1, 2, figsize=(14, 6))
-
-fpr_train, tpr_train, _ = roc_curve(y_train, y_prob_train)
-fpr_test, tpr_test, _ = roc_curve(y_test, y_prob_test)
-
-auc_train = roc_auc_score(y_train, y_prob_train)
-auc_test = roc_auc_score(y_test, y_prob_test)
-
-axes[0].plot(fpr_train, tpr_train, color=PERIOSPOT_COLORS['mystic_blue'], 
-             linewidth=2, label=f'Training (AUC = {auc_train:.3f})')
-axes[0].plot(fpr_test, tpr_test, color=PERIOSPOT_COLORS['crimson_blaze'], 
-             linewidth=2, label=f'Test (AUC = {auc_test:.3f})')
-axes[0].plot([0, 1], [0, 1], 'k--', linewidth=1, label='Random')
-axes[0].fill_between(fpr_test, 0, tpr_test, alpha=0.2, color=PERIOSPOT_COLORS['crimson_blaze'])
-axes[0].set_xlabel('False Positive Rate')
-axes[0].set_ylabel('True Positive Rate')
-axes[0].set_title('ROC Curve', fontweight='bold')
-axes[0].legend(loc='lower right')
-axes[0].grid(True, alpha=0.3)
-
-precision_curve, recall_curve, _ = precision_recall_curve(y_test, y_prob_test)
-ap = average_precision_score(y_test, y_prob_test)
-
-axes[1].plot(recall_curve, precision_curve, color=PERIOSPOT_COLORS['periospot_blue'], 
-             linewidth=2, label=f'PR Curve (AP = {ap:.3f})')
-axes[1].axhline(y_test.mean(), color=PERIOSPOT_COLORS['crimson_blaze'], 
-                linestyle='--', label=f'Baseline = {y_test.mean():.2f}')
-axes[1].fill_between(recall_curve, 0, precision_curve, alpha=0.2, color=PERIOSPOT_COLORS['periospot_blue'])
-axes[1].set_xlabel('Recall')
-axes[1].set_ylabel('Precision')
-axes[1].set_title('Precision-Recall Curve', fontweight='bold')
-axes[1].legend(loc='lower left')
-axes[1].grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('figures/04_roc_curve.png', dpi=150, bbox_inches='tight')
-plt.close()
-
-# FIGURE 5: Threshold Analysis
-print("Generating Figure 5: Threshold Analysis...")
-thresholds = np.arange(0.1, 0.95, 0.05)
-
-threshold_metrics = []
-for thresh in thresholds:
-    y_pred_thresh = (y_prob_test >= thresh).astype(int)
-    threshold_metrics.append({
-        'Threshold': thresh,
-        'Accuracy': accuracy_score(y_test, y_pred_thresh),
-        'Precision': precision_score(y_test, y_pred_thresh, zero_division=0),
-        'Recall': recall_score(y_test, y_pred_thresh, zero_division=0),
-        'F1': f1_score(y_test, y_pred_thresh, zero_division=0)
-    })
-
-threshold_df = pd.DataFrame(threshold_metrics)
-
-fig, axes = plt.subplots(1, 2, figsize=(14, 6))
-
-axes[0].plot(threshold_df['Threshold'], threshold_df['Accuracy'], 
-             label='Accuracy', linewidth=2, color=PERIOSPOT_COLORS['periospot_blue'])
-axes[0].plot(threshold_df['Threshold'], threshold_df['Precision'], 
-             label='Precision', linewidth=2, color=PERIOSPOT_COLORS['crimson_blaze'])
-axes[0].plot(threshold_df['Threshold'], threshold_df['Recall'], 
-             label='Recall', linewidth=2, color=PERIOSPOT_COLORS['mystic_blue'])
-axes[0].plot(threshold_df['Threshold'], threshold_df['F1'], 
-             label='F1 Score', linewidth=2, linestyle='--', color='black')
-axes[0].axvline(0.5, color='gray', linestyle=':', alpha=0.7, label='t=0.5')
-axes[0].set_xlabel('Threshold')
-axes[0].set_ylabel('Score')
-axes[0].set_title('Metrics vs. Threshold', fontweight='bold')
-axes[0].legend(loc='lower center')
-axes[0].grid(True, alpha=0.3)
-
-axes[1].plot(threshold_df['Recall'], threshold_df['Precision'], 
-             'o-', color=PERIOSPOT_COLORS['periospot_blue'], linewidth=2, markersize=6)
-axes[1].set_xlabel('Recall')
-axes[1].set_ylabel('Precision')
-axes[1].set_title('Precision-Recall Tradeoff', fontweight='bold')
-axes[1].grid(True, alpha=0.3)
-
-plt.tight_layout()
-plt.savefig('figures/05_threshold_analysis.png', dpi=150, bbox_inches='tight')
-plt.close()
-
-# FIGURE 6: Confusion Matrices
-print("Generating Figure 6: Confusion Matrices...")
-fig, axes = plt.subplots(1, 3, figsize=(15, 5))
-
-thresholds_to_show = [0.3, 0.5, 0.7]
-titles = ['Conservative (t=0.3)', 'Default (t=0.5)', 'Strict (t=0.7)']
-
-for ax, thresh, title in zip(axes, thresholds_to_show, titles):
-    y_pred_thresh = (y_prob_test >= thresh).astype(int)
-    cm = confusion_matrix(y_test, y_pred_thresh)
-    
-    sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', ax=ax,
-                xticklabels=['Pred Fail', 'Pred Success'],
-                yticklabels=['Actual Fail', 'Actual Success'],
-                annot_kws={'size': 14})
-    ax.set_title(title, fontweight='bold')
-
-plt.tight_layout()
-plt.savefig('figures/06_confusion_matrix.png', dpi=150, bbox_inches='tight')
-plt.close()
-
-print("\n✅ All figures generated successfully!")
-print(f"\nModel Performance:")
-print(f"  Accuracy: {accuracy_score(y_test, y_pred_test):.1%}")
-print(f"  ROC-AUC: {auc_test:.3f}")
-print(f"  F1 Score: {f1_score(y_test, y_pred_test):.3f}")
-
-# List figures
-print("\nGenerated figures:")
-for f in sorted(Path('figures').glob('*.png')):
-    print(f"  • {f}")
 
+def plot_sigmoid_function(state):
+    """FIGURE 2: Sigmoid Function"""
+    z = np.linspace(-10, 10, 200)
+    p = sigmoid(z)
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.plot(z, p, color=PERIOSPOT_COLORS['periospot_blue'], linewidth=3, label='σ(z) = 1/(1+e⁻ᶻ)')
+    ax.axhline(0.5, color=PERIOSPOT_COLORS['crimson_blaze'], linestyle='--', alpha=0.7, label='p = 0.5')
+    ax.axvline(0, color=PERIOSPOT_COLORS['mystic_blue'], linestyle=':', alpha=0.7, label='z = 0')
+    ax.fill_between(z, 0, p, where=(z < 0), alpha=0.2, color=PERIOSPOT_COLORS['crimson_blaze'])
+    ax.fill_between(z, 0, p, where=(z >= 0), alpha=0.2, color=PERIOSPOT_COLORS['periospot_blue'])
+
+    key_z = [-5, -2, 0, 2, 5]
+    for z_val in key_z:
+        p_val = sigmoid(z_val)
+        ax.plot(z_val, p_val, 'o', color=PERIOSPOT_COLORS['mystic_blue'], markersize=10)
+        ax.annotate(f'({z_val}, {p_val:.2f})', (z_val, p_val),
+                    textcoords="offset points", xytext=(0, 15), ha='center', fontsize=9)
+
+    ax.set_xlabel('z (linear score)')
+    ax.set_ylabel('σ(z) = Probability')
+    ax.set_title('The Sigmoid Function: Transforming Scores to Probabilities', fontweight='bold')
+    ax.legend(loc='upper left')
+    ax.set_xlim(-10, 10)
+    ax.set_ylim(-0.05, 1.05)
+    ax.grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(state.figures_dir / '02_sigmoid_function.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+def plot_odds_ratios(state):
+    """FIGURE 3: Odds Ratios"""
+    feature_columns = state.feature_columns
+    fig, ax = plt.subplots(figsize=(12, 7))
+
+    odds_ratios = np.exp(state.weights)
+    sorted_idx = np.argsort(odds_ratios)
+
+    y_pos = np.arange(len(feature_columns))
+    colors = [PERIOSPOT_COLORS['crimson_blaze'] if odds_ratios[i] < 1
+              else PERIOSPOT_COLORS['periospot_blue'] for i in sorted_idx]
+
+    ci_low, ci_high = state.odds_ratio_ci
+
+    bars = ax.barh(y_pos, odds_ratios[sorted_idx], color=colors, edgecolor='white', linewidth=2)
+    ax.errorbar(odds_ratios[sorted_idx], y_pos,
+                xerr=[odds_ratios[sorted_idx] - ci_low[sorted_idx],
+                      ci_high[sorted_idx] - odds_ratios[sorted_idx]],
+                fmt='none', ecolor=PERIOSPOT_COLORS['black'], elinewidth=1.5, capsize=4,
+                label='95% bootstrap CI')
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels([feature_columns[i] for i in sorted_idx])
+    ax.axvline(1.0, color=PERIOSPOT_COLORS['mystic_blue'], linestyle='--', linewidth=2, label='OR = 1')
+
+    for bar, idx in zip(bars, sorted_idx):
+        x_pos = ci_high[idx] + 0.02 if odds_ratios[idx] > 1 else ci_low[idx] - 0.02
+        ax.text(x_pos, bar.get_y() + bar.get_height()/2,
+                f'{odds_ratios[idx]:.3f}', va='center', fontsize=10, fontweight='bold',
+                ha='left' if odds_ratios[idx] > 1 else 'right')
+
+    ax.set_xlim(0, ci_high.max() * 1.15)  # Room for the labels past the CIs
+    ax.set_xlabel('Odds Ratio')
+    ax.set_title('Feature Importance: Odds Ratios\n(OR > 1 increases success, OR < 1 decreases)', fontweight='bold')
+    ax.legend(loc='lower right')
+
+    plt.tight_layout()
+    plt.savefig(state.figures_dir / '03_odds_ratios.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+def plot_roc_curve(state):
+    """FIGURE 4: ROC Curve"""
+    # Curves and summaries come from score histograms (utils.metrics):
+    # exact at 10,000 thresholds, without sorting every score
+    train_scores, test_scores = state.train_scores, state.test_scores
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+
+    # Long curves (large test sets) are thinned to ~1000 points before drawing
+    fpr_train, tpr_train = decimate_curve(*train_scores.roc_curve()[:2])
+    fpr_test, tpr_test = decimate_curve(*test_scores.roc_curve()[:2])
+
+    auc_train = train_scores.roc_auc()
+    auc_test = test_scores.roc_auc()
+    auc_low, auc_high = state.auc_test_ci
+
+    axes[0].plot(fpr_train, tpr_train, color=PERIOSPOT_COLORS['mystic_blue'],
+                 linewidth=2, label=f'Training (AUC = {auc_train:.3f})')
+    axes[0].plot(fpr_test, tpr_test, color=PERIOSPOT_COLORS['crimson_blaze'],
+                 linewidth=2, label=f'Test (AUC = {auc_test:.3f}, 95% CI {auc_low:.3f}–{auc_high:.3f})')
+    axes[0].plot([0, 1], [0, 1], 'k--', linewidth=1, label='Random')
+    axes[0].fill_between(fpr_test, 0, tpr_test, alpha=0.2, color=PERIOSPOT_COLORS['crimson_blaze'])
+    axes[0].set_xlabel('False Positive Rate')
+    axes[0].set_ylabel('True Positive Rate')
+    axes[0].set_title('ROC Curve', fontweight='bold')
+    axes[0].legend(loc='lower right')
+    axes[0].grid(True, alpha=0.3)
+
+    precision_curve, recall_curve = decimate_curve(*test_scores.precision_recall_curve()[:2])
+    ap = test_scores.average_precision()
+    baseline = test_scores.n_positive / test_scores.n_total
+
+    axes[1].plot(recall_curve, precision_curve, color=PERIOSPOT_COLORS['periospot_blue'],
+                 linewidth=2, label=f'PR Curve (AP = {ap:.3f})')
+    axes[1].axhline(baseline, color=PERIOSPOT_COLORS['crimson_blaze'],
+                    linestyle='--', label=f'Baseline = {baseline:.2f}')
+    axes[1].fill_between(recall_curve, 0, precision_curve, alpha=0.2, color=PERIOSPOT_COLORS['periospot_blue'])
+    axes[1].set_xlabel('Recall')
+    axes[1].set_ylabel('Precision')
+    axes[1].set_title('Precision-Recall Curve', fontweight='bold')
+    axes[1].legend(loc='lower left')
+    axes[1].grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(state.figures_dir / '04_roc_curve.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+def plot_threshold_analysis(state):
+    """FIGURE 5: Threshold Analysis"""
+    thresholds = np.arange(0.1, 0.95, 0.05)
+
+    # Confusion counts and metrics for every threshold, from the histogram
+    threshold_df = state.test_scores.threshold_sweep(thresholds)
+
+    fig, axes = plt.subplots(1, 2, figsize=(14, 6))
+
+    axes[0].plot(threshold_df['Threshold'], threshold_df['Accuracy'],
+                 label='Accuracy', linewidth=2, color=PERIOSPOT_COLORS['periospot_blue'])
+    axes[0].plot(threshold_df['Threshold'], threshold_df['Precision'],
+                 label='Precision', linewidth=2, color=PERIOSPOT_COLORS['crimson_blaze'])
+    axes[0].plot(threshold_df['Threshold'], threshold_df['Recall'],
+                 label='Recall', linewidth=2, color=PERIOSPOT_COLORS['mystic_blue'])
+    axes[0].plot(threshold_df['Threshold'], threshold_df['F1'],
+                 label='F1 Score', linewidth=2, linestyle='--', color='black')
+    axes[0].axvline(0.5, color='gray', linestyle=':', alpha=0.7, label='t=0.5')
+    axes[0].set_xlabel('Threshold')
+    axes[0].set_ylabel('Score')
+    axes[0].set_title('Metrics vs. Threshold', fontweight='bold')
+    axes[0].legend(loc='lower center')
+    axes[0].grid(True, alpha=0.3)
+
+    axes[1].plot(threshold_df['Recall'], threshold_df['Precision'],
+                 'o-', color=PERIOSPOT_COLORS['periospot_blue'], linewidth=2, markersize=6)
+    axes[1].set_xlabel('Recall')
+    axes[1].set_ylabel('Precision')
+    axes[1].set_title('Precision-Recall Tradeoff', fontweight='bold')
+    axes[1].grid(True, alpha=0.3)
+
+    plt.tight_layout()
+    plt.savefig(state.figures_dir / '05_threshold_analysis.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+def plot_confusion_matrices(state):
+    """FIGURE 6: Confusion Matrices"""
+    fig, axes = plt.subplots(1, 3, figsize=(15, 5))
+
+    thresholds_to_show = [0.3, 0.5, 0.7]
+    titles = ['Conservative (t=0.3)', 'Default (t=0.5)', 'Strict (t=0.7)']
+    cm_sweep = state.test_scores.threshold_sweep(thresholds_to_show)
+
+    for ax, (_, sweep_row), title in zip(axes, cm_sweep.iterrows(), titles):
+        cm = confusion_matrix_from_sweep(sweep_row)
+
+        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', ax=ax,
+                    xticklabels=['Pred Fail', 'Pred Success'],
+                    yticklabels=['Actual Fail', 'Actual Success'],
+                    annot_kws={'size': 14})
+        ax.set_title(title, fontweight='bold')
+
+    plt.tight_layout()
+    plt.savefig(state.figures_dir / '06_confusion_matrix.png', dpi=150, bbox_inches='tight')
+    plt.close()
+
+
+# Figure name → drawing function, in chapter order
+FIGURES = {
+    '01_class_distribution': plot_class_distribution,
+    '02_sigmoid_function': plot_sigmoid_function,
+    '03_odds_ratios': plot_odds_ratios,
+    '04_roc_curve': plot_roc_curve,
+    '05_threshold_analysis': plot_threshold_analysis,
+    '06_confusion_matrix': plot_confusion_matrices,
+}
+
+
+def figure_keys():
+    """Content hash of every figure's inputs (see utils.figure_cache)."""
+    inputs = {
+        'data': file_digest(source_file(DATA_PATH)),   # The .parquet twin if current
+        'features': FEATURE_COLUMNS,
+        'split': SPLIT_PARAMS,
+        'model': MODEL_PARAMS,
+        'bootstrap': BOOTSTRAP_PARAMS,
+    }
+    # Every figure draws from the state prepare_state computes
+    return {name: figure_key(draw, inputs, depends_on=[prepare_state])
+            for name, draw in FIGURES.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate the Chapter 04 figures.')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for the figures and the bootstrap '
+                             '(default: one per figure / core; 1 = no pool)')
+    parser.add_argument('--only', nargs='+', metavar='FIGURE',
+                        help='Only consider these figures (name or number, e.g. 04)')
+    parser.add_argument('--force', action='store_true',
+                        help='Rebuild the selected figures even if unchanged')
+    args = parser.parse_args()
+
+    # Work out which figures changed before paying for the model fit
+    cache = FigureCache(FIGURES_DIR)
+    keys = figure_keys()
+    try:
+        selected = select_figures(list(FIGURES), args.only)
+    except ValueError as error:
+        parser.error(str(error))
+    to_build = selected if args.force else cache.stale({n: keys[n] for n in selected})
+
+    for name in selected:
+        if name not in to_build:
+            print(f"  = {name} (unchanged, skipped)")
+    if not to_build:
+        print("All selected figures are up to date.")
+        return
+
+    state = prepare_state(n_workers=args.workers)
+
+    # Create figures directory
+    state.figures_dir.mkdir(exist_ok=True)
+
+    print(f"Generating {len(to_build)} of {len(FIGURES)} figures...")
+    start = time.perf_counter()
+    with stage('render_figures'):
+        timings = render_figures({name: FIGURES[name] for name in to_build}, state,
+                                 n_workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Figures done in {elapsed:.2f}s "
+          f"(slowest: {max(timings.values()):.2f}s, sum: {sum(timings.values()):.2f}s)")
+
+    for name in to_build:
+        cache.record(name, keys[name])
+    cache.save()
+
+    default = state.test_scores.threshold_sweep([0.5]).iloc[0]
+
+    print("\n✅ All figures generated successfully!")
+    print(f"\nModel Performance:")
+    print(f"  Accuracy: {default['Accuracy']:.1%}")
+    print(f"  ROC-AUC: {state.test_scores.roc_auc():.3f}")
+    print(f"  F1 Score: {default['F1']:.3f}")
+
+    # List figures
+    print("\nGenerated figures:")
+    for f in sorted(state.figures_dir.glob('*.png')):
+        print(f"  • {f.relative_to(CHAPTER_DIR)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,22 @@
+"""
+Chapter 04 model settings, shared by every script of the chapter.
+
+generate_figures.py, train_model.py and train_streaming.py fit the same
+model on the same data, so they import its settings from here. The module
+only defines constants: importing it loads no plotting or modelling code.
+"""
+
+from pathlib import Path
+
+CHAPTER_DIR = Path(__file__).resolve().parent
+
+DATA_PATH = CHAPTER_DIR / 'data' / 'implant_success_data_training.csv'
+
+FEATURE_COLUMNS = [
+    'insertion_torque_ncm', 'isq_placement', 'hounsfield_units', 'age',
+    'smoking_status', 'diabetes_status', 'implant_length_mm', 'implant_diameter_mm'
+]
+TARGET_COLUMN = 'success'
+
+SPLIT_PARAMS = dict(test_size=0.2, random_state=42)
+MODEL_PARAMS = dict(penalty='l2', C=1.0, solver='lbfgs', max_iter=1000, random_state=42)
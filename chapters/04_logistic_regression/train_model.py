@@ -0,0 +1,94 @@
+"""
+Train the Chapter 04 implant success model and save it for reuse.
+
+Fits the same scaler and logistic regression as generate_figures.py (same
+data, features, split and settings, from model_config.py) through the model
+store (utils.model_store), so whichever of the two runs first fits the model
+and the other loads it. The model is also exported with joblib, so other tools
+can score new cases without retraining, e.g. the local scoring service:
+
+    python -m utils.scoring_service chapters/04_logistic_regression/models/implant_success_model.joblib
+
+The saved artifact is a dict:
+
+    feature_columns   input columns, in model order
+    scaler            fitted StandardScaler
+    model             fitted LogisticRegression
+    metrics           test-set accuracy and ROC-AUC
+
+Usage:
+    python train_model.py                 # → models/implant_success_model.joblib
+    python train_model.py --output my_model.joblib
+    python train_model.py --force         # Refit even if stored
+"""
+
+import argparse
+import sys
+
+import joblib
+import sklearn
+from pathlib import Path
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, roc_auc_score
+
+# Make the shared utils package importable when run as a script
+CHAPTER_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CHAPTER_DIR.parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.model_store import fit_scaled_model
+from utils.profiling import stage
+
+# Same data, features and settings as the figures
+from model_config import DATA_PATH, FEATURE_COLUMNS, MODEL_PARAMS, SPLIT_PARAMS, TARGET_COLUMN
+
+MODEL_PATH = CHAPTER_DIR / 'models' / 'implant_success_model.joblib'
+
+
+def train(data_path=DATA_PATH, force=False):
+    """Get the fitted scaler and model; return (stored artifact, export dict)."""
+    # Fitted once per dataset and settings, then loaded from .model_cache/
+    artifact = fit_scaled_model(data_path, FEATURE_COLUMNS, TARGET_COLUMN, LogisticRegression,
+                                MODEL_PARAMS, SPLIT_PARAMS, stratify=True, force=force)
+    y_test, y_prob_test = artifact.arrays['y_test'], artifact.arrays['y_prob_test']
+
+    return artifact, {
+        'feature_columns': list(artifact.feature_columns),
+        'scaler': artifact.scaler,
+        'model': artifact.model,
+        'metrics': {
+            'accuracy': float(accuracy_score(y_test, y_prob_test >= 0.5)),
+            'roc_auc': float(roc_auc_score(y_test, y_prob_test)),
+            'n_train': len(artifact.arrays['y_train']),
+        },
+        'sklearn_version': sklearn.__version__,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train and save the Chapter 04 model.')
+    parser.add_argument('--data', type=Path, default=DATA_PATH,
+                        help='Training dataset (default: chapter CSV)')
+    parser.add_argument('--output', type=Path, default=MODEL_PATH,
+                        help='Where to save the model (default: models/implant_success_model.joblib)')
+    parser.add_argument('--force', action='store_true',
+                        help='Fit again even if the model store has this model')
+    args = parser.parse_args()
+
+    artifact, export = train(args.data, force=args.force)
+    print(f"{'Trained' if artifact.fitted else 'Loaded'} model for {args.data.name} "
+          f"(model store entry {artifact.path.name})")
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with stage('save', output=args.output):
+        joblib.dump(export, args.output)
+
+    metrics = export['metrics']
+    print(f"✓ Model saved to {args.output}")
+    print(f"  Test accuracy: {metrics['accuracy']:.1%}")
+    print(f"  Test ROC-AUC:  {metrics['roc_auc']:.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Train the Chapter 04 implant success model out of core.
+
+Same model as generate_figures.py (standardized features, L2 logistic
+regression with C=1), but the dataset is read in chunks and never held in
+memory, so it works for registries far larger than RAM:
+
+    1. one pass fits the scaler on the training rows
+    2. each Newton (IRLS) iteration is one more pass (usually 6-8)
+    3. a last pass scores the test rows into a score histogram
+       (utils.metrics.ScoreHistogram) for the AUC, so memory stays fixed
+       however many test rows there are
+
+Rows are split by hashing patient_id (utils.streaming.hash_split), so the
+split is stable across passes and chunk sizes. It is not the same split as
+the stratified train_test_split of the notebook, so the numbers differ
+slightly from the book's; --check fits scikit-learn in memory on the same
+split to confirm the odds ratios and AUC match (the streamed AUC to within
+the histogram's error bound).
+
+Usage:
+    python train_streaming.py                                # Chapter dataset
+    python train_streaming.py --data registry.parquet --chunk-size 500000
+    python train_streaming.py --check                        # Compare in memory
+"""
+
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from pathlib import Path
+from sklearn.metrics import roc_auc_score
+
+# Make the shared utils package importable when run as a script
+CHAPTER_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = CHAPTER_DIR.parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.data_io import iter_compact
+from utils.metrics import ScoreHistogram
+from utils.profiling import peak_rss_mb, stage
+from utils.streaming import StreamingLogisticRegression, StreamingScaler, hash_split
+
+# Same data, features and model settings as the figures
+from model_config import DATA_PATH, FEATURE_COLUMNS, MODEL_PARAMS, SPLIT_PARAMS, TARGET_COLUMN
+
+ID_COLUMN = 'patient_id'
+
+TEST_SIZE = SPLIT_PARAMS['test_size']
+SEED = SPLIT_PARAMS['random_state']
+C = MODEL_PARAMS['C']
+
+
+@dataclass
+class StreamingFit:
+    """Result of train_streaming."""
+    scaler: StreamingScaler
+    model: StreamingLogisticRegression
+    n_train: int
+    test_scores: ScoreHistogram     # Test outcomes by predicted probability
+
+    @property
+    def odds_ratios(self):
+        """Odds ratio per standard deviation of each feature."""
+        return dict(zip(FEATURE_COLUMNS, np.exp(self.model.coef_[0])))
+
+    @property
+    def auc_test(self):
+        return self.test_scores.roc_auc()
+
+
+def iter_split(data_path, subset, chunk_size):
+    """Yield (X, y) chunks of the 'train' or 'test' rows of the dataset."""
+    columns = [ID_COLUMN] + FEATURE_COLUMNS + [TARGET_COLUMN]
+    for chunk in iter_compact(data_path, columns=columns, chunk_size=chunk_size,
+                              dataset='implant_success_data'):
+        is_test = hash_split(chunk[ID_COLUMN].to_numpy(), TEST_SIZE, SEED)
+        rows = is_test if subset == 'test' else ~is_test
+        yield (chunk[FEATURE_COLUMNS].to_numpy(np.float64)[rows],
+               chunk[TARGET_COLUMN].to_numpy()[rows])
+
+
+def train_streaming(data_path=DATA_PATH, chunk_size=100_000):
+    """Fit scaler and model chunk by chunk; score the test rows."""
+    with stage('scale'):
+        scaler = StreamingScaler()
+        for X, _ in iter_split(data_path, 'train', chunk_size):
+            scaler.partial_fit(X)
+
+    with stage('fit'):
+        model = StreamingLogisticRegression(C=C)
+        model.fit(lambda: ((scaler.transform(X), y)
+                           for X, y in iter_split(data_path, 'train', chunk_size)))
+
+    # Test scores only go into the histogram: fixed memory for any test set
+    with stage('predict'):
+        test_scores = ScoreHistogram()
+        for X, y in iter_split(data_path, 'test', chunk_size):
+            test_scores.update(y, model.predict_proba(scaler.transform(X))[:, 1])
+
+    return StreamingFit(scaler=scaler, model=model, n_train=scaler.n_samples_seen_,
+                        test_scores=test_scores)
+
+
+def check_in_memory(fit, data_path):
+    """Fit scikit-learn on the same split in memory; print the differences."""
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.preprocessing import StandardScaler
+
+    train = list(iter_split(data_path, 'train', chunk_size=1_000_000))
+    X_train = np.concatenate([X for X, _ in train])
+    y_train = np.concatenate([y for _, y in train])
+    test = list(iter_split(data_path, 'test', chunk_size=1_000_000))
+    X_test = np.concatenate([X for X, _ in test])
+    y_test = np.concatenate([y for _, y in test])
+
+    scaler = StandardScaler().fit(X_train)
+    model = LogisticRegression(C=C, max_iter=1000, tol=1e-10)
+    model.fit(scaler.transform(X_train), y_train)
+    y_prob = model.predict_proba(scaler.transform(X_test))[:, 1]
+
+    or_memory = np.exp(model.coef_[0])
+    or_stream = np.exp(fit.model.coef_[0])
+    auc_memory = roc_auc_score(y_test, y_prob)
+    print("\nIn-memory check (scikit-learn, same split):")
+    print(f"  Max odds ratio difference: {np.max(np.abs(or_memory - or_stream)):.2e}")
+    print(f"  AUC: {auc_memory:.6f} in memory vs {fit.auc_test:.6f} streamed "
+          f"(histogram bound ±{fit.test_scores.roc_auc_error_bound():.1e})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Train the Chapter 04 model out of core.')
+    parser.add_argument('--data', type=Path, default=DATA_PATH,
+                        help='Dataset (.csv, .parquet or .feather; default: chapter CSV)')
+    parser.add_argument('--chunk-size', type=int, default=100_000,
+                        help='Rows read at a time (default: 100000)')
+    parser.add_argument('--check', action='store_true',
+                        help='Also fit in memory on the same split and compare')
+    args = parser.parse_args()
+
+    print(f"Training on {args.data} in chunks of {args.chunk_size:,} rows...")
+    start = time.perf_counter()
+    fit = train_streaming(args.data, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+
+    status = 'converged' if fit.model.converged_ else 'NOT converged'
+    print(f"Done in {elapsed:.2f}s: {fit.model.n_iter_ + 2} passes ({status}), "
+          f"{fit.n_train:,} training / {fit.test_scores.n_total:,} test rows")
+    peak = peak_rss_mb()
+    if peak is not None:
+        print(f"Peak memory: {peak:.0f} MB")
+
+    print("\nOdds ratios (per standard deviation):")
+    for feature, odds_ratio in sorted(fit.odds_ratios.items(), key=lambda item: item[1]):
+        print(f"  {feature:22} {odds_ratio:.3f}")
+
+    print(f"\nTest set:")
+    print(f"  ROC-AUC:  {fit.auc_test:.3f}")
+    print(f"  Accuracy: {fit.test_scores.threshold_sweep([0.5])['Accuracy'].iloc[0]:.1%}")
+
+    if args.check:
+        check_in_memory(fit, args.data)
+
+
+if __name__ == '__main__':
+    main()
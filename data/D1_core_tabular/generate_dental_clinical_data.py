@@ -0,0 +1,376 @@
+"""
+Synthetic Core Tabular Dental Dataset (D1) Generator
+
+This script generates the book's main dataset: one row per patient with
+demographics, medical history, periodontal measurements and 5-year
+outcomes (see README.md in this folder for the variables).
+
+Outcomes come from latent models with clinically plausible relationships:
+- A latent periodontal susceptibility (age, smoking, diabetes control,
+  plaque) drives probing depth, attachment loss and bone loss
+- Periodontitis severity and treatment response are ordinal (cumulative
+  logit): a logistic latent score cut at fixed thresholds
+- Tooth loss and implant failure within 5 years are logistic models
+
+Every column is simulated directly in a narrow dtype (uint8 counts,
+float32 measurements, bool flags, categoricals), so a block of rows
+takes a fraction of the memory of float64/object columns. Blocks come
+from their own seed streams (utils.synthetic_data): --stream-to writes
+any number of patients chunk by chunk, on every core, and the rows do not
+depend on the chunk size or the number of workers.
+
+The data is SYNTHETIC - designed for educational purposes only.
+It does not represent real patient data.
+
+Project: Machine Learning For Dentists
+"""
+
+import argparse
+import sys
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+# Make the shared utils package importable when run as a script
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from utils.data_io import write_compact
+from utils.profiling import stage
+from utils.schema import validate_frame
+from utils.synthetic_data import generate_parallel, iter_chunks, write_chunks
+
+# Patients in the dataset saved next to this script
+N_PATIENTS = 2_000
+
+# Category levels (order matters: codes are drawn as positions in these lists).
+# 'Healthy' rather than 'None', which CSV readers take for a missing value.
+SEX_LEVELS = ['Male', 'Female']
+SMOKING_LEVELS = ['Never', 'Former', 'Current']
+SEVERITY_LEVELS = ['Healthy', 'Mild', 'Moderate', 'Severe']
+RESPONSE_LEVELS = ['Good', 'Moderate', 'Poor']
+
+# Thresholds of the ordinal models, on the logistic latent scale
+SEVERITY_CUTS = np.array([0.0, 1.6, 3.4], dtype=np.float32)
+RESPONSE_CUTS = np.array([0.4, 2.2], dtype=np.float32)
+
+
+def _normal(rng, mean, sd, n):
+    """float32 normal draws (no float64 intermediate)."""
+    return (mean + sd * rng.standard_normal(n, dtype=np.float32)).astype(np.float32)
+
+
+def _bernoulli(rng, log_odds):
+    """Binary outcome of a logistic model."""
+    probability = 1 / (1 + np.exp(-log_odds))
+    return rng.random(len(log_odds), dtype=np.float32) < probability
+
+
+def _ordinal(rng, score, cuts):
+    """Category codes of a cumulative logit model: latent score + logistic noise, cut."""
+    latent = score + rng.logistic(size=len(score)).astype(np.float32)
+    return np.searchsorted(cuts, latent).astype(np.int8)
+
+
+def _round(values, decimals):
+    return np.round(values, decimals).astype(np.float32)
+
+
+def _simulate_dental_patients(rng, n_samples: int, first_row: int = 0) -> pd.DataFrame:
+    """
+    Simulate patients by drawing every column from one random source.
+
+    Args:
+        rng: np.random.Generator
+        n_samples: Number of patients to generate
+        first_row: 0-based position of the first patient in the whole dataset
+
+    Returns:
+        DataFrame with one row per patient, in compact dtypes
+    """
+    n = n_samples
+
+    # =========================================================================
+    # DEMOGRAPHICS AND BEHAVIOUR
+    # =========================================================================
+
+    patient_id = np.arange(first_row + 1, first_row + n + 1, dtype=np.uint32)
+    age = _normal(rng, 52, 15, n).clip(18, 90).astype(np.uint8)
+    sex_code = (rng.random(n, dtype=np.float32) < 0.52).astype(np.int8)
+    smoking_code = rng.choice(len(SMOKING_LEVELS), n, p=[0.55, 0.28, 0.17]).astype(np.int8)
+    former, current = smoking_code == 1, smoking_code == 2
+
+    # Pack-years grow with age; never smokers have none
+    smoking_years = np.maximum(age.astype(np.float32) - 18, 1)
+    pack_years = np.where(
+        smoking_code == 0, 0,
+        rng.gamma(np.where(current, 3.0, 2.0), 1.0, n).astype(np.float32) * smoking_years / 6
+    ).clip(0, 120)
+
+    # =========================================================================
+    # MEDICAL HISTORY
+    # =========================================================================
+
+    age_decades = (age.astype(np.float32) - 50) / 10
+    diabetes = _bernoulli(rng, -2.2 + 0.35 * age_decades)
+
+    # HbA1c recorded for every diabetic, and for a quarter of the others (screening)
+    hba1c = np.where(diabetes,
+                     _normal(rng, 7.4, 1.1, n).clip(5.7, 13.0),
+                     _normal(rng, 5.3, 0.25, n).clip(4.0, 5.6))
+    screened = diabetes | (rng.random(n, dtype=np.float32) < 0.25)
+    # Metabolic control: HbA1c above 7% in diabetics
+    poor_control = np.where(diabetes, np.maximum(hba1c - 7.0, 0), 0).astype(np.float32)
+
+    hypertension = _bernoulli(rng, -1.2 + 0.6 * age_decades)
+    cardiovascular = _bernoulli(rng, -3.0 + 0.7 * age_decades + 0.6 * current
+                                + 0.5 * diabetes + 0.6 * hypertension)
+    medications = rng.poisson(
+        0.4 + 0.25 * np.maximum(age_decades + 1, 0)
+        + 1.5 * diabetes + 1.2 * hypertension + 1.8 * cardiovascular
+    ).clip(0, 20).astype(np.uint8)
+
+    # =========================================================================
+    # PERIODONTAL STATUS
+    # =========================================================================
+
+    plaque_index = (1.1 + 0.15 * current + 0.45 * rng.standard_normal(n, dtype=np.float32)
+                    ).clip(0, 3)
+
+    # Latent susceptibility to periodontal destruction
+    susceptibility = (
+        0.35 * age_decades +
+        0.35 * former +
+        0.9 * current +
+        0.6 * diabetes + 0.3 * poor_control +
+        0.5 * (plaque_index - 1.1) +
+        0.15 * (sex_code == 0) +               # Men slightly more affected
+        rng.standard_normal(n, dtype=np.float32)
+    ).astype(np.float32)
+
+    probing_depth = (2.6 + 0.55 * susceptibility + 0.3 * rng.standard_normal(n, dtype=np.float32)
+                     ).clip(1.0, 9.0)
+    attachment_loss = (1.2 + 0.8 * (probing_depth - 2.6) + 0.25 * age_decades
+                       + 0.4 * rng.standard_normal(n, dtype=np.float32)).clip(0, 12)
+    bone_loss = (8.0 * attachment_loss + 4.0 * rng.standard_normal(n, dtype=np.float32)
+                 ).clip(0, 100)
+    # Smoking hides bleeding (vasoconstriction)
+    bleeding = 100 / (1 + np.exp(-(-1.6 + 1.1 * plaque_index + 0.45 * susceptibility
+                                   - 0.7 * current
+                                   + 0.5 * rng.standard_normal(n, dtype=np.float32))))
+
+    severity_code = _ordinal(rng, 1.3 * attachment_loss + 0.3 * (probing_depth - 2.6)
+                             - 1.2, SEVERITY_CUTS)
+
+    # =========================================================================
+    # DENTITION
+    # =========================================================================
+
+    # Each of 32 teeth is retained with a probability that falls with age,
+    # periodontitis and smoking
+    retained = 1 / (1 + np.exp(-(3.0 - 0.45 * np.maximum(age_decades + 2, 0)
+                                 - 0.45 * severity_code - 0.4 * current)))
+    teeth_present = rng.binomial(32, retained).astype(np.uint8)
+    implants_present = rng.binomial(32 - teeth_present, 0.12).astype(np.uint8)
+    years_since_treatment = rng.exponential(3.0, n).astype(np.float32).clip(0, 40)
+
+    # =========================================================================
+    # 5-YEAR OUTCOMES
+    # =========================================================================
+
+    # Ordinal: poorer response with smoking, poor control, plaque and severity
+    response_code = _ordinal(rng, 0.9 * current + 0.5 * poor_control + 0.6 * plaque_index
+                             + 0.4 * severity_code, RESPONSE_CUTS)
+
+    tooth_loss = (teeth_present > 0) & _bernoulli(
+        rng, -2.6 + 0.75 * severity_code + 0.6 * current + 0.35 * poor_control
+        + 0.15 * age_decades + 0.35 * (response_code == 2))
+
+    # Only patients with implants can have one fail
+    implant_failure = (implants_present > 0) & _bernoulli(
+        rng, -3.0 + 0.9 * current + 0.5 * diabetes + 0.3 * poor_control
+        + 0.5 * (severity_code >= 2) + 0.3 * np.log(np.maximum(implants_present, 1)))
+
+    # =========================================================================
+    # ADD MISSING VALUES
+    # =========================================================================
+
+    pack_years = np.where((smoking_code > 0) & (rng.random(n, dtype=np.float32) < 0.04),
+                          np.nan, _round(pack_years, 1)).astype(np.float32)
+    hba1c = np.where(screened, _round(hba1c, 1), np.nan).astype(np.float32)
+    plaque_index = np.where(rng.random(n, dtype=np.float32) < 0.02,
+                            np.nan, _round(plaque_index, 2)).astype(np.float32)
+
+    # =========================================================================
+    # CREATE DATAFRAME
+    # =========================================================================
+
+    return pd.DataFrame({
+        'patient_id': patient_id,
+        'age': age,
+        'sex': pd.Categorical.from_codes(sex_code, SEX_LEVELS),
+        'smoking_status': pd.Categorical.from_codes(smoking_code, SMOKING_LEVELS),
+        'smoking_pack_years': pack_years,
+        'probing_depth': _round(probing_depth, 1),
+        'clinical_attachment_loss': _round(attachment_loss, 1),
+        'bleeding_on_probing': _round(bleeding, 1),
+        'plaque_index': plaque_index,
+        'bone_loss_percentage': _round(bone_loss, 1),
+        'diabetes': diabetes,
+        'hba1c': hba1c,
+        'hypertension': hypertension,
+        'cardiovascular_disease': cardiovascular,
+        'medications': medications,
+        'teeth_present': teeth_present,
+        'implants_present': implants_present,
+        'years_since_treatment': _round(years_since_treatment, 1),
+        'periodontitis_severity': pd.Categorical.from_codes(severity_code, SEVERITY_LEVELS,
+                                                            ordered=True),
+        'tooth_loss_5yr': tooth_loss,
+        'implant_failure_5yr': implant_failure,
+        'treatment_response': pd.Categorical.from_codes(response_code, RESPONSE_LEVELS,
+                                                        ordered=True),
+    })
+
+
+def generate_dental_clinical_data(n_patients: int = N_PATIENTS, seed: int = 42,
+                                  n_workers: int = 1) -> pd.DataFrame:
+    """
+    Generate the D1 dataset in memory.
+
+    Rows are simulated in blocks with their own seed streams, so the result
+    is bit-identical for any number of workers and equal to the
+    concatenated output of iter_dental_clinical_chunks.
+
+    Args:
+        n_patients: Number of patients to generate
+        seed: Seed for reproducibility
+        n_workers: Worker processes (None uses every core)
+
+    Returns:
+        DataFrame with one row per patient, in compact dtypes
+    """
+    return generate_parallel(_simulate_dental_patients, n_patients,
+                             seed=seed, n_workers=n_workers)
+
+
+def iter_dental_clinical_chunks(n_patients: int, chunk_size: int = 1_000_000,
+                                seed: int = 42, n_workers: int = 1):
+    """
+    Generate the D1 dataset as a stream of DataFrame chunks.
+
+    Memory stays bounded by the chunk size, so this scales to hundreds of
+    millions of patients.
+
+    Args:
+        n_patients: Total number of patients to generate
+        chunk_size: Number of patients per yielded chunk
+        seed: Seed of the generation run
+        n_workers: Worker processes simulating blocks (None uses every core)
+
+    Yields:
+        DataFrames with the same columns as generate_dental_clinical_data
+    """
+    yield from iter_chunks(_simulate_dental_patients, n_patients,
+                           chunk_size=chunk_size, seed=seed,
+                           n_workers=n_workers)
+
+
+def write_dental_clinical_chunks(output_path, n_patients: int,
+                                 chunk_size: int = 1_000_000,
+                                 seed: int = 42, n_workers: int = 1) -> int:
+    """
+    Stream a large D1 dataset to disk chunk by chunk.
+
+    Args:
+        output_path: Destination .csv (appended chunk by chunk),
+            .parquet or .feather file (stored with compact dtypes)
+        n_patients: Total number of patients to generate
+        chunk_size: Number of patients generated and written at a time
+        seed: Seed of the generation run
+        n_workers: Worker processes simulating blocks (None uses every core)
+
+    Returns:
+        Number of rows written
+    """
+    chunks = iter_dental_clinical_chunks(n_patients, chunk_size=chunk_size,
+                                         seed=seed, n_workers=n_workers)
+    return write_chunks(chunks, output_path, dataset='dental_clinical_data')
+
+
+def main():
+    """Generate and save the dataset."""
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--n-patients', type=int, default=N_PATIENTS,
+                        help=f'Number of patients (default: {N_PATIENTS})')
+    parser.add_argument('--stream-to', type=Path, default=None,
+                        help='Write a large dataset chunk by chunk to this '
+                             '.csv, .parquet or .feather file')
+    parser.add_argument('--chunk-size', type=int, default=1_000_000,
+                        help='Patients per chunk when streaming (default: 1000000)')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Random seed (default: 42)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes when streaming (0 = all cores)')
+    args = parser.parse_args()
+
+    if args.stream_to is not None:
+        print(f"Streaming {args.n_patients:,} patients to {args.stream_to} "
+              f"in chunks of {args.chunk_size:,}...")
+        with stage('stream', output=args.stream_to):
+            n_written = write_dental_clinical_chunks(
+                args.stream_to, args.n_patients,
+                chunk_size=args.chunk_size, seed=args.seed,
+                n_workers=args.workers or None
+            )
+        print(f"Dataset saved to: {args.stream_to} ({n_written:,} rows)")
+        print(f"Check it with: python -m utils.schema {args.stream_to}")
+        return
+
+    # Generate data
+    print("Generating synthetic core tabular dental dataset (D1)...")
+    with stage('generate') as generate:
+        df = generate_dental_clinical_data(args.n_patients, seed=args.seed)
+        generate.add_output(df)
+
+    # Nothing is saved unless the clinical constraints of utils.schema hold
+    with stage('validate'):
+        report = validate_frame(df, 'dental_clinical_data')
+    print(report.format())
+    if not report.ok:
+        sys.exit(1)
+
+    # Summary statistics
+    print(f"\nDataset Summary:")
+    print(f"  Patients: {len(df):,}")
+    print(f"  Diabetes: {df['diabetes'].mean():.1%}")
+    print(f"  Current smokers: {(df['smoking_status'] == 'Current').mean():.1%}")
+    print(f"  Tooth loss within 5 years: {df['tooth_loss_5yr'].mean():.1%}")
+    with_implants = df['implants_present'] > 0
+    print(f"  Implant failure within 5 years: "
+          f"{df.loc[with_implants, 'implant_failure_5yr'].mean():.1%} "
+          f"of {with_implants.sum():,} patients with implants")
+    print(f"\nPeriodontitis severity:")
+    print(df['periodontitis_severity'].value_counts(normalize=True, sort=False)
+          .map('{:.1%}'.format).to_string())
+
+    # Save to CSV
+    output_path = Path(__file__).parent / 'dental_clinical_data.csv'
+    with stage('save_csv', output=output_path):
+        df.to_csv(output_path, index=False)
+    print(f"\nDataset saved to: {output_path}")
+
+    # Columnar copy with compact dtypes (much faster to load)
+    try:
+        with stage('save_parquet') as save:
+            save.add_output(write_compact(df, output_path.with_suffix('.parquet'),
+                                          source_csv=output_path))
+        print("Parquet copy (compact dtypes) saved next to the CSV file")
+    except ImportError as error:
+        print(f"Skipped Parquet copy: {error}")
+
+
+if __name__ == '__main__':
+    main()
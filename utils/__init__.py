@@ -1,4 +1,39 @@
 # Periospot ML Utilities
-from .periospot_style import setup_periospot_style, PERIOSPOT_COLORS
+#
+# Names are resolved on first access (module-level __getattr__, PEP 562), so
+# `import utils` stays cheap: the palette loads without matplotlib, and
+# pyplot is imported only when the style itself is used.
 
+import importlib
 
+# Public name → submodule that defines it
+_LAZY_ATTRIBUTES = {
+    'setup_periospot_style': 'periospot_style',
+    'PERIOSPOT_COLORS': 'palette',
+    'PERIOSPOT_PALETTE': 'palette',
+    'BRAND_PALETTE': 'palette',
+}
+
+_SUBMODULES = {
+    'bootstrap', 'build', 'column_stats', 'data_io', 'figure_cache', 'figure_pool', 'metrics',
+    'model_store', 'notebook_runner', 'palette', 'periospot_style', 'profiling',
+    'datasets', 'schema', 'scoring_service', 'streaming', 'synthetic_data',
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        module = importlib.import_module(f'.{_LAZY_ATTRIBUTES[name]}', __name__)
+        value = getattr(module, name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f'.{name}', __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | _SUBMODULES)
@@ -0,0 +1,241 @@
+"""
+Whole-Book Build for Machine Learning For Dentists
+==================================================
+
+One command that regenerates every chapter's data and figures, and the
+shared datasets (D1-D4).
+
+Each chapter folder is scanned for its build scripts:
+
+    data/generate_*.py   → 'data' stage(s)
+    train_model.py       → 'model' stage (optional)
+    generate_figures.py  → 'figures' stage
+
+and each shared dataset folder (data/D1_core_tabular, ...) for its
+generate_*.py, which become 'data' stages of their own.
+
+Within a chapter the stages form a chain (data → model → figures). The
+chains of different chapters are independent, so the build is a small
+dependency graph (DAG): a stage starts as soon as everything it depends on
+has finished, and stages of different chapters run at the same time.
+
+Every script runs in its own Python process from the project root; the
+scripts resolve their files relative to their own location.
+
+Usage:
+    python -m utils.build                   # Build every chapter
+    python -m utils.build --chapters 03 04  # Only some chapters
+    python -m utils.build --chapters D1     # Only the D1 dataset
+    python -m utils.build --stages figures  # Only one kind of stage
+    python -m utils.build --dry-run         # Show the plan, run nothing
+    python -m utils.build --profile prof    # Record stage timings (utils.profiling)
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from . import profiling
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CHAPTERS_DIR = PROJECT_ROOT / 'chapters'
+DATASETS_DIR = PROJECT_ROOT / 'data'
+
+STAGE_ORDER = ('data', 'model', 'figures')
+
+# =============================================================================
+# DISCOVERY
+# =============================================================================
+
+
+@dataclass
+class Stage:
+    """One script of the build and the stages it waits for."""
+    chapter: str                  # Chapter or shared dataset folder name
+    kind: str                     # 'data', 'model' or 'figures'
+    script: Path
+    depends_on: list = field(default_factory=list)
+
+    @property
+    def id(self):
+        root = CHAPTERS_DIR if CHAPTERS_DIR in self.script.parents else DATASETS_DIR
+        return self.script.relative_to(root).as_posix()
+
+
+def discover_stages(chapters=None, kinds=STAGE_ORDER):
+    """
+    Find the build scripts of each chapter and shared dataset and link them
+    into a DAG.
+
+    Parameters
+    ----------
+    chapters : list of str, optional
+        Chapter or dataset folder names or prefixes ('04', 'D1'); None means all.
+    kinds : tuple of str
+        Stage kinds to include. Dependencies on excluded kinds are dropped,
+        so ``kinds=('figures',)`` rebuilds figures from the existing data.
+
+    Returns
+    -------
+    list of Stage
+        Stages in a valid execution order.
+    """
+    # Shared datasets (data/D1_core_tabular, ...) only have data stages
+    folders = [(dataset_dir, {'data': sorted(dataset_dir.glob('generate_*.py'))})
+               for dataset_dir in sorted(p for p in DATASETS_DIR.iterdir() if p.is_dir())]
+    folders += [(chapter_dir, {
+        'data': sorted((chapter_dir / 'data').glob('generate_*.py')),
+        'model': sorted(chapter_dir.glob('train_model.py')),
+        'figures': sorted(chapter_dir.glob('generate_figures.py')),
+    }) for chapter_dir in sorted(p for p in CHAPTERS_DIR.iterdir() if p.is_dir())]
+
+    stages = []
+    for folder, scripts in folders:
+        chapter = folder.name
+        if chapters and not any(chapter.startswith(c) for c in chapters):
+            continue
+
+        # Each kind waits for the closest earlier kind that has scripts
+        previous = []
+        for kind in STAGE_ORDER:
+            if kind not in kinds or not scripts.get(kind):
+                continue
+            current = [Stage(chapter, kind, script, depends_on=[s.id for s in previous])
+                       for script in scripts[kind]]
+            stages.extend(current)
+            previous = current
+
+    return stages
+
+
+# =============================================================================
+# EXECUTION
+# =============================================================================
+
+
+def _run_stage(stage, extra_args):
+    """Run one stage's script; return (returncode, seconds, output)."""
+    args = [sys.executable, str(stage.script)] + extra_args.get(stage.kind, [])
+    start = time.perf_counter()
+    result = subprocess.run(args, cwd=PROJECT_ROOT, capture_output=True, text=True)
+    seconds = time.perf_counter() - start
+    return result.returncode, seconds, result.stdout + result.stderr
+
+
+def run_dag(stages, jobs=None, extra_args=None):
+    """
+    Run stages as soon as their dependencies have succeeded.
+
+    Parameters
+    ----------
+    stages : list of Stage
+        Output of discover_stages.
+    jobs : int or None
+        Stages allowed to run at once (None uses every core).
+    extra_args : dict, optional
+        Stage kind → extra command-line arguments for its scripts.
+
+    Returns
+    -------
+    dict
+        Stage id → {'status': 'ok' | 'failed' | 'skipped', 'seconds': float}.
+    """
+    extra_args = extra_args or {}
+    jobs = jobs or os.cpu_count() or 1
+    by_id = {stage.id: stage for stage in stages}
+    waiting = {stage.id: set(stage.depends_on) & set(by_id) for stage in stages}
+    results = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        running = {}
+        while waiting or running:
+            # Start everything whose dependencies are done
+            for stage_id in [s for s, deps in waiting.items() if not deps]:
+                del waiting[stage_id]
+                running[pool.submit(_run_stage, by_id[stage_id], extra_args)] = stage_id
+
+            if not running:
+                break  # Only stages blocked by failures are left
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage_id = running.pop(future)
+                returncode, seconds, output = future.result()
+                ok = returncode == 0
+                results[stage_id] = {'status': 'ok' if ok else 'failed',
+                                     'seconds': seconds}
+                print(f"  {'✓' if ok else '✗'} {stage_id:60} {seconds:7.2f}s")
+                if not ok:
+                    print('    ' + '\n    '.join(output.strip().splitlines()[-15:]))
+                    continue
+                for deps in waiting.values():
+                    deps.discard(stage_id)
+
+    for stage_id in waiting:
+        results[stage_id] = {'status': 'skipped', 'seconds': 0.0}
+        print(f"  - {stage_id:60} skipped (a dependency failed)")
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build every chapter's data and figures.")
+    parser.add_argument('--chapters', nargs='+', metavar='CHAPTER',
+                        help='Chapter or dataset folders, or their prefixes (default: all)')
+    parser.add_argument('--stages', nargs='+', choices=STAGE_ORDER, default=list(STAGE_ORDER),
+                        help='Stage kinds to run (default: all)')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Stages to run at once (default: number of cores)')
+    parser.add_argument('--force', action='store_true',
+                        help='Rebuild figures even if their inputs are unchanged')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Print the build plan without running it')
+    parser.add_argument('--profile', type=Path, metavar='DIR',
+                        help='Record every script stage in DIR and merge them into '
+                             'a report and a Chrome trace (see utils.profiling)')
+    parser.add_argument('--cprofile', action='store_true',
+                        help='With --profile, also dump a cProfile per stage')
+    args = parser.parse_args()
+
+    stages = discover_stages(args.chapters, kinds=tuple(args.stages))
+    if not stages:
+        print("Nothing to build.")
+        return
+
+    print(f"Build plan ({len(stages)} stages):")
+    for stage in stages:
+        after = f"  ← {', '.join(stage.depends_on)}" if stage.depends_on else ''
+        print(f"  [{stage.kind:7}] {stage.id}{after}")
+    if args.dry_run:
+        return
+
+    if args.profile:
+        # The scripts inherit the environment and record their stages there
+        profiling.enable_profiling(args.profile, cprofile=args.cprofile)
+
+    print("\nRunning...")
+    start = time.perf_counter()
+    results = run_dag(stages, jobs=args.jobs,
+                      extra_args={'figures': ['--force']} if args.force else None)
+    elapsed = time.perf_counter() - start
+
+    n_ok = sum(r['status'] == 'ok' for r in results.values())
+    total = sum(r['seconds'] for r in results.values())
+    print(f"\n{n_ok}/{len(stages)} stages succeeded in {elapsed:.2f}s "
+          f"(sum of stage times: {total:.2f}s)")
+
+    if args.profile:
+        profiling.write_reports(args.profile)
+        print(f"Stage profile: {args.profile / 'report.json'}, "
+              f"{args.profile / 'trace.json'} (Chrome trace)")
+    if n_ok != len(stages):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
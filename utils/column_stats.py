@@ -0,0 +1,375 @@
+"""
+One-Pass Column Statistics for Machine Learning For Dentists
+============================================================
+
+Summary statistics of numeric columns gathered chunk by chunk, for
+datasets far bigger than memory:
+
+    count, missing      per column
+    mean, var, std      Welford/Chan merges (numerically stable)
+    min, max            exact, from the k smallest and largest values kept
+    cov, corr           pairwise-complete, like pandas' DataFrame.cov/corr
+    histograms          fixed bins per column (given up front)
+    quantiles, box plot estimated from the histogram (see box_stats)
+
+Every statistic is mergeable: chunks are folded in with ``update`` and the
+accumulators of worker processes combined with ``merge``, in any order.
+
+Pairwise statistics follow pandas: the covariance of two columns uses the
+rows where both are present, with their own means over those rows. For
+that, each pair (i, j) keeps the count, the means of i and of j and the
+centred sums of squares and cross-products over the rows with both
+present, all as p x p arrays; the diagonal holds the per-column values.
+
+Usage:
+    from utils.column_stats import ColumnStats, describe_files
+
+    stats = ColumnStats(['age', 'hba1c'], bins={'hba1c': np.arange(3, 15, 0.1)})
+    for chunk in iter_compact('registry.parquet', columns=['age', 'hba1c']):
+        stats.update(chunk)
+    stats.correlation(), stats.missing, stats.histogram('hba1c')
+
+    stats = describe_files(shards, columns, n_workers=4)   # Merged per file
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# =============================================================================
+# ACCUMULATOR
+# =============================================================================
+
+
+class ColumnStats:
+    """
+    Mergeable summary statistics of numeric columns.
+
+    Parameters
+    ----------
+    columns : list of str
+        Columns to summarise, in order.
+    bins : dict, optional
+        Column → histogram bin edges (increasing). Bins are [a, b) except
+        the last, [a, b], as in numpy.histogram; values outside the edges
+        are counted as underflow/overflow.
+    n_extremes : int
+        Smallest and largest values kept per column (exact min/max and
+        box-plot outliers).
+    """
+
+    def __init__(self, columns, bins=None, n_extremes=1000):
+        self.columns = list(columns)
+        self.bins = {name: np.asarray(edges, dtype=np.float64)
+                     for name, edges in (bins or {}).items()}
+        self.n_extremes = n_extremes
+        p = len(self.columns)
+
+        self.n_rows = 0
+        self._shift = np.full(p, np.nan)    # Per column (NaN until seen); keeps sums small
+        self._count = np.zeros((p, p))      # Rows with both columns present
+        self._mean = np.zeros((p, p))       # [i, j]: mean of i (shifted) over those rows
+        self._m2 = np.zeros((p, p))         # [i, j]: sum of squares of i about it
+        self._comoment = np.zeros((p, p))   # Sum of cross-products about the means
+        self._low = [np.empty(0) for _ in self.columns]
+        self._high = [np.empty(0) for _ in self.columns]
+        self._hist = {name: np.zeros(len(edges) + 1, dtype=np.int64)   # Under, bins, over
+                      for name, edges in self.bins.items()}
+
+    # ---- accumulate ---------------------------------------------------------
+
+    def update(self, chunk):
+        """Add a chunk: a DataFrame with the columns, or a 2D array in column order."""
+        if isinstance(chunk, pd.DataFrame):
+            X = chunk[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            X = np.asarray(chunk, dtype=np.float64)
+        if len(X) == 0:
+            return self
+        present = ~np.isnan(X)
+
+        # A column's shift is its mean in the first chunk where it has values;
+        # it has no statistics before then, so nothing needs re-expressing
+        counts = present.sum(axis=0)
+        new = np.isnan(self._shift) & (counts > 0)
+        if new.any():
+            self._shift[new] = np.nansum(X[:, new], axis=0) / counts[new]
+        shifted = np.where(present, X - self._shift, 0.0)
+        mask = present.astype(np.float64)
+
+        # Pairwise sums of this chunk: [i, j] over rows with i and j present
+        count = mask.T @ mask
+        sums = shifted.T @ mask
+        squares = (shifted ** 2).T @ mask
+        products = shifted.T @ shifted
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(count > 0, sums / count, 0.0)
+            m2 = np.where(count > 0, squares - sums ** 2 / count, 0.0)
+            comoment = np.where(count > 0, products - sums * sums.T / count, 0.0)
+        self._merge_moments(count, mean, m2, comoment)
+
+        for k, name in enumerate(self.columns):
+            values = X[present[:, k], k]
+            self._merge_extremes(k, values, values)
+            if name in self.bins:
+                self._hist[name] += self._bin_counts(name, values)
+        self.n_rows += len(X)
+        return self
+
+    def _merge_moments(self, count, mean, m2, comoment):
+        total = self._count + count
+        with np.errstate(invalid='ignore', divide='ignore'):
+            weight = np.where(total > 0, self._count * count / total, 0.0)
+            delta = mean - self._mean
+            self._mean = np.where(total > 0, self._mean + delta * count / np.maximum(total, 1),
+                                  0.0)
+        self._m2 = self._m2 + m2 + delta ** 2 * weight
+        self._comoment = self._comoment + comoment + delta * delta.T * weight
+        self._count = total
+
+    def _merge_extremes(self, k, low, high):
+        n = self.n_extremes
+        low = np.concatenate([self._low[k], low])
+        high = np.concatenate([self._high[k], high])
+        if len(low) > n:
+            low = np.partition(low, n - 1)[:n]
+        if len(high) > n:
+            high = np.partition(high, len(high) - n)[-n:]
+        self._low[k] = np.sort(low)
+        self._high[k] = np.sort(high)
+
+    def _bin_counts(self, name, values):
+        edges = self.bins[name]
+        # Slot 0: below the first edge; slot len(edges): above the last
+        slots = np.searchsorted(edges, values, side='right')
+        slots[values == edges[-1]] = len(edges) - 1     # Last bin is closed
+        return np.bincount(slots, minlength=len(edges) + 1)
+
+    def merge(self, other):
+        """Add the statistics of another accumulator (same columns and bins)."""
+        if other.columns != self.columns or other.bins.keys() != self.bins.keys():
+            raise ValueError("cannot merge statistics of different columns or bins")
+        if other.n_rows == 0:
+            return self
+        self._shift = np.where(np.isnan(self._shift), other._shift, self._shift)
+        # Re-express the other's means with this accumulator's shift
+        other_mean = other._mean + (other._shift - self._shift)[:, None]
+        self._merge_moments(other._count, np.where(other._count > 0, other_mean, 0.0),
+                            other._m2, other._comoment)
+        for k in range(len(self.columns)):
+            self._merge_extremes(k, other._low[k], other._high[k])
+        for name in self._hist:
+            self._hist[name] += other._hist[name]
+        self.n_rows += other.n_rows
+        return self
+
+    # ---- per-column statistics ------------------------------------------------
+
+    def _series(self, values):
+        return pd.Series(values, index=self.columns)
+
+    @property
+    def count(self):
+        return self._series(np.diag(self._count).astype(np.int64))
+
+    @property
+    def missing(self):
+        """Missing values per column."""
+        return self.n_rows - self.count
+
+    @property
+    def mean(self):
+        with np.errstate(invalid='ignore'):
+            means = np.where(np.diag(self._count) > 0, np.diag(self._mean) + self._shift, np.nan)
+        return self._series(means)
+
+    def var(self, ddof=1):
+        n = np.diag(self._count)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self._series(np.where(n > ddof, np.diag(self._m2) / (n - ddof), np.nan))
+
+    def std(self, ddof=1):
+        return np.sqrt(self.var(ddof))
+
+    @property
+    def min(self):
+        return self._series([low[0] if len(low) else np.nan for low in self._low])
+
+    @property
+    def max(self):
+        return self._series([high[-1] if len(high) else np.nan for high in self._high])
+
+    # ---- pairwise statistics --------------------------------------------------
+
+    def covariance(self, ddof=1):
+        """Pairwise-complete covariance matrix (as DataFrame.cov)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = np.where(self._count > ddof, self._comoment / (self._count - ddof), np.nan)
+        return pd.DataFrame(cov, index=self.columns, columns=self.columns)
+
+    def correlation(self):
+        """Pairwise-complete Pearson correlation matrix (as DataFrame.corr)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            corr = self._comoment / np.sqrt(self._m2 * self._m2.T)
+        corr = np.where(self._count > 0, np.clip(corr, -1, 1), np.nan)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    # ---- distributions ----------------------------------------------------------
+
+    def histogram(self, column, max_bins=None):
+        """
+        Counts and edges of a column's histogram.
+
+        With ``max_bins``, the occupied range is regrouped into at most that
+        many bins by adding neighbouring bins together (edges stay edges of
+        the original bins, so no count is split).
+
+        Returns
+        -------
+        counts, edges : ndarray
+            ``len(edges) == len(counts) + 1``; under/overflow not included.
+        """
+        counts = self._hist[column][1:-1]
+        edges = self.bins[column]
+        if max_bins is None or not counts.any():
+            return counts, edges
+        occupied = np.flatnonzero(counts)
+        first, last = occupied[0], occupied[-1] + 1
+        group = -(-(last - first) // max_bins)
+        starts = np.arange(first, last, group)
+        return np.add.reduceat(counts[first:last], starts - first), \
+            np.append(edges[starts], edges[min(starts[-1] + group, len(edges) - 1)])
+
+    def quantile(self, column, q):
+        """
+        Estimated quantile(s), linear interpolation as numpy's default.
+
+        Each order statistic is taken as the midpoint of the histogram bin
+        it falls in (exact min/max at the ends), so the error is at most
+        half a bin width; data on a grid matching the bin midpoints (e.g.
+        values rounded to 0.01 with bins centred on multiples of 0.01)
+        gives numpy's result exactly.
+        """
+        n = int(self.count[column])
+        position = np.asarray(q, dtype=np.float64) * (n - 1)
+        below = np.floor(position).astype(np.int64)
+        above = np.minimum(below + 1, n - 1)
+        low = self._order_statistic(column, below)
+        high = self._order_statistic(column, above)
+        return low + (position - below) * (high - low)
+
+    def _order_statistic(self, column, ranks):
+        """Estimated r-th smallest value(s), r from 0 (see quantile)."""
+        k = self.columns.index(column)
+        hist = self._hist[column]
+        edges = self.bins[column]
+        midpoints = np.concatenate(([self.min[column]], (edges[:-1] + edges[1:]) / 2,
+                                    [self.max[column]]))
+        # Slot of the r-th smallest value (r from 0)
+        slot = np.searchsorted(np.cumsum(hist), np.asarray(ranks) + 1)
+        values = midpoints[slot]
+        # The very ends are known exactly
+        n = int(self._count[k, k])
+        values = np.where(np.asarray(ranks) == 0, self.min[column], values)
+        return np.where(np.asarray(ranks) == n - 1, self.max[column], values)
+
+    def box_stats(self, column, whis=1.5):
+        """
+        Box-plot statistics for ``Axes.bxp`` (as matplotlib's boxplot_stats).
+
+        Quartiles come from quantile(). Whisker ends and outliers are exact
+        while there are fewer than ``n_extremes`` outliers on a side;
+        beyond that, only the n_extremes most extreme outliers are listed
+        and the whisker end is estimated from the histogram.
+        """
+        k = self.columns.index(column)
+        q1, median, q3 = self.quantile(column, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        low_fence, high_fence = q1 - whis * iqr, q3 + whis * iqr
+        low, high = self._low[k], self._high[k]
+
+        fliers_low = low[low < low_fence]
+        fliers_high = high[high > high_fence]
+        inside_low = low[low >= low_fence]
+        inside_high = high[high <= high_fence]
+        n = int(self._count[k, k])
+        if len(inside_low):
+            whislo = inside_low[0]
+        else:
+            whislo = max(self._order_statistic(column, len(fliers_low)).item(), low_fence)
+        if len(inside_high):
+            whishi = inside_high[-1]
+        else:
+            whishi = min(self._order_statistic(column, n - 1 - len(fliers_high)).item(),
+                         high_fence)
+
+        return {
+            'mean': self.mean[column],
+            'med': median, 'q1': q1, 'q3': q3, 'iqr': iqr,
+            'whislo': whislo, 'whishi': whishi,
+            'fliers': np.concatenate([fliers_low, fliers_high]),
+        }
+
+    def summary(self):
+        """describe()-style table of the per-column statistics."""
+        return pd.DataFrame({
+            'count': self.count, 'missing': self.missing, 'mean': self.mean,
+            'std': self.std(), 'min': self.min, 'max': self.max,
+        })
+
+
+# =============================================================================
+# FILES (one worker per file)
+# =============================================================================
+
+
+def _describe_file(path, columns, bins, n_extremes, chunk_size):
+    from .data_io import iter_compact
+
+    stats = ColumnStats(columns, bins=bins, n_extremes=n_extremes)
+    for chunk in iter_compact(path, columns=columns, chunk_size=chunk_size):
+        stats.update(chunk)
+    return stats
+
+
+def describe_files(paths, columns, bins=None, n_extremes=1000, chunk_size=100_000,
+                   n_workers=None):
+    """
+    Column statistics of one or more files, read in chunks and merged.
+
+    Parameters
+    ----------
+    paths : str, Path or list
+        Dataset file(s) (.csv, .parquet or .feather), e.g. the shards of a
+        registry.
+    columns, bins, n_extremes
+        As in ColumnStats.
+    chunk_size : int
+        Rows read at a time.
+    n_workers : int or None
+        Worker processes, one file each (None: one per core; 1 reads in
+        this process).
+
+    Returns
+    -------
+    ColumnStats
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    n_workers = min(n_workers, len(paths))
+    args = (columns, bins, n_extremes, chunk_size)
+
+    if n_workers <= 1:
+        parts = [_describe_file(path, *args) for path in paths]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            parts = list(pool.map(_describe_file, paths, *[[a] * len(paths) for a in args]))
+
+    stats = ColumnStats(columns, bins=bins, n_extremes=n_extremes)
+    for part in parts:
+        stats.merge(part)
+    return stats
@@ -0,0 +1,393 @@
+"""
+Compact Columnar Storage for Machine Learning For Dentists Datasets
+===================================================================
+
+The chapter datasets are published as CSV, which is easy to open in a
+spreadsheet but slow to parse and memory-hungry once loaded (every number
+becomes int64/float64, every text column a Python object).
+
+This module stores the same tables as Parquet or Feather with compact dtypes:
+categorical text columns, int8/int16/bool flags and float32 measurements.
+
+Usage:
+    from utils.data_io import write_compact, read_compact
+
+    # Save next to the CSV (the copy records which CSV it was written from)
+    write_compact(df, 'data/implant_bone_loss.parquet',
+                  source_csv='data/implant_bone_loss.csv')
+
+    # Load with compact dtypes (uses the .parquet/.feather twin while it
+    # still matches the CSV)
+    df = read_compact('data/implant_bone_loss.csv', columns=['age', 'hba1c'])
+
+    # Larger than memory: one chunk at a time
+    for chunk in iter_compact('registry.parquet', chunk_size=250_000):
+        ...
+"""
+
+import json
+
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+from pathlib import Path
+
+from .figure_cache import file_digest
+
+# =============================================================================
+# COMPACT DTYPE PROFILES
+# =============================================================================
+
+# One profile per dataset family. Columns missing from a table are ignored,
+# so the '_training' and '_toy' variants share their parent's profile.
+COMPACT_DTYPES = {
+    # Chapter 03 - marginal bone loss (linear regression)
+    'implant_bone_loss': {
+        'age': 'int8',
+        'sex': CategoricalDtype(['Male', 'Female']),
+        'smoking_status': CategoricalDtype(['Never', 'Former', 'Current']),
+        'diabetes': 'bool',
+        'hba1c': 'float32',
+        'hounsfield_units': 'int16',
+        'bone_type': CategoricalDtype(
+            ['D4 (Very soft)', 'D3 (Soft)', 'D2 (Normal)', 'D1 (Dense)'],
+            ordered=True,
+        ),
+        'insertion_torque_ncm': 'int8',
+        'isq_placement': 'float32',
+        'implant_length_mm': 'float32',
+        'implant_diameter_mm': 'float32',
+        'marginal_bone_loss_mm': 'float32',
+    },
+    # Chapter 04 - implant success/failure (logistic regression)
+    'implant_success_data': {
+        'age': 'float32',
+        'smoking_status': 'int8',
+        'diabetes_status': 'int8',
+        'insertion_torque_ncm': 'float32',
+        'isq_placement': 'float32',
+        'hounsfield_units': 'int16',
+        'implant_length_mm': 'float32',
+        'implant_diameter_mm': 'float32',
+        'implant_surface_mm2': 'float32',
+        'success': 'int8',
+        'success_probability_true': 'float32',
+    },
+    # D1 - core tabular dental dataset (data/D1_core_tabular)
+    'dental_clinical_data': {
+        'patient_id': 'uint32',
+        'age': 'uint8',
+        'sex': CategoricalDtype(['Male', 'Female']),
+        'smoking_status': CategoricalDtype(['Never', 'Former', 'Current']),
+        'smoking_pack_years': 'float32',
+        'probing_depth': 'float32',
+        'clinical_attachment_loss': 'float32',
+        'bleeding_on_probing': 'float32',
+        'plaque_index': 'float32',
+        'bone_loss_percentage': 'float32',
+        'diabetes': 'bool',
+        'hba1c': 'float32',
+        'hypertension': 'bool',
+        'cardiovascular_disease': 'bool',
+        'medications': 'uint8',
+        'teeth_present': 'uint8',
+        'implants_present': 'uint8',
+        'years_since_treatment': 'float32',
+        'periodontitis_severity': CategoricalDtype(
+            ['Healthy', 'Mild', 'Moderate', 'Severe'], ordered=True,
+        ),
+        'tooth_loss_5yr': 'bool',
+        'implant_failure_5yr': 'bool',
+        'treatment_response': CategoricalDtype(['Good', 'Moderate', 'Poor'], ordered=True),
+    },
+}
+
+COLUMNAR_SUFFIXES = ('.parquet', '.feather')
+
+# Schema metadata of a columnar twin: size and SHA-256 of the CSV it copies
+SOURCE_METADATA_KEY = b'periospot.source_csv'
+
+
+def _dataset_for_path(path):
+    """Find the dtype profile name for a file (longest matching stem prefix)."""
+    stem = Path(path).stem
+    matches = [name for name in COMPACT_DTYPES if stem.startswith(name)]
+    return max(matches, key=len) if matches else None
+
+
+def compact_dtypes(dataset, columns=None):
+    """
+    Get the compact dtype of each column of a dataset.
+
+    Parameters
+    ----------
+    dataset : str
+        Profile name (e.g. 'implant_bone_loss') or a file path whose name
+        starts with one.
+    columns : list of str, optional
+        Restrict the result to these columns.
+
+    Returns
+    -------
+    dict
+        Column name → dtype. Empty if the dataset has no profile.
+    """
+    name = dataset if dataset in COMPACT_DTYPES else _dataset_for_path(dataset)
+    profile = COMPACT_DTYPES.get(name, {})
+    if columns is None:
+        return dict(profile)
+    return {col: profile[col] for col in columns if col in profile}
+
+
+def to_compact(df, dataset):
+    """
+    Convert a DataFrame to the compact dtypes of its dataset profile.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Table with some or all of the profile's columns.
+    dataset : str
+        Profile name or file path (see compact_dtypes).
+
+    Returns
+    -------
+    pandas.DataFrame
+        Copy with compact dtypes; columns without a profile entry unchanged.
+    """
+    return df.astype(compact_dtypes(dataset, columns=df.columns))
+
+
+# =============================================================================
+# WRITE AND READ
+# =============================================================================
+
+def _require_pyarrow():
+    """Import pyarrow, explaining how to install it if it is missing."""
+    try:
+        import pyarrow
+    except ImportError as error:
+        raise ImportError(
+            "Parquet/Feather files need pyarrow: pip install pyarrow"
+        ) from error
+    return pyarrow
+
+
+def _has_pyarrow():
+    """Check whether pyarrow can be imported."""
+    try:
+        _require_pyarrow()
+    except ImportError:
+        return False
+    return True
+
+
+def write_compact(df, path, dataset=None, source_csv=None):
+    """
+    Save a dataset as Parquet or Feather with compact dtypes.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        Table to save.
+    path : str or Path
+        Output file ending in .parquet or .feather.
+    dataset : str, optional
+        Profile name. Inferred from the file name when not given.
+    source_csv : str or Path, optional
+        The CSV this file is a copy of (already written). Its size and
+        SHA-256 are stored in the file's schema metadata, and read_compact
+        only reads the file in place of that CSV while they still match.
+
+    Returns
+    -------
+    Path
+        The written file.
+    """
+    path = Path(path)
+    if path.suffix not in COLUMNAR_SUFFIXES:
+        raise ValueError(f"Expected a .parquet or .feather path, got {path}")
+    pyarrow = _require_pyarrow()
+
+    compact = to_compact(df, dataset or path).reset_index(drop=True)
+    table = pyarrow.Table.from_pandas(compact, preserve_index=False)
+    if source_csv is not None:
+        source = json.dumps(_csv_fingerprint(Path(source_csv))).encode()
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), SOURCE_METADATA_KEY: source})
+
+    if path.suffix == '.parquet':
+        import pyarrow.parquet
+        pyarrow.parquet.write_table(table, path)
+    else:
+        import pyarrow.feather
+        pyarrow.feather.write_feather(table, path)
+    return path
+
+
+# CSV path → (size, mtime_ns, SHA-256), so each CSV is hashed once per process
+_CSV_DIGESTS = {}
+
+
+def _csv_fingerprint(csv_path):
+    """Size and SHA-256 of a CSV, as recorded in its twin's metadata."""
+    stat = csv_path.stat()
+    key = str(csv_path.resolve())
+    cached = _CSV_DIGESTS.get(key)
+    if cached is None or cached[:2] != (stat.st_size, stat.st_mtime_ns):
+        cached = (stat.st_size, stat.st_mtime_ns, file_digest(csv_path))
+        _CSV_DIGESTS[key] = cached
+    return {'size': cached[0], 'sha256': cached[2]}
+
+
+def _recorded_source(twin):
+    """The CSV fingerprint stored in a twin's schema metadata (None if absent)."""
+    pyarrow = _require_pyarrow()
+    try:
+        if twin.suffix == '.parquet':
+            import pyarrow.parquet
+            metadata = pyarrow.parquet.read_schema(twin).metadata
+        else:
+            metadata = pyarrow.ipc.open_file(twin).schema.metadata
+        return json.loads(metadata[SOURCE_METADATA_KEY])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _columnar_twin(csv_path):
+    """
+    Return the .parquet/.feather file saved next to a CSV, if it was written
+    from that exact CSV (or the CSV is missing).
+
+    File times are not compared: they are arbitrary after a git clone or
+    checkout. The twin must record the CSV's current size and SHA-256.
+    """
+    for suffix in COLUMNAR_SUFFIXES:
+        twin = csv_path.with_suffix(suffix)
+        if not twin.exists():
+            continue
+        if not csv_path.exists():
+            return twin
+        if not _has_pyarrow():
+            return None
+        recorded = _recorded_source(twin)
+        if (recorded is not None and recorded.get('size') == csv_path.stat().st_size
+                and recorded == _csv_fingerprint(csv_path)):
+            return twin
+    return None
+
+
+def source_file(path):
+    """
+    The file read_compact and iter_compact actually read for a path.
+
+    Parameters
+    ----------
+    path : str or Path
+        .csv, .parquet or .feather file.
+
+    Returns
+    -------
+    Path
+        For a CSV, its .parquet/.feather twin when there is one written
+        from that CSV (and pyarrow is installed); otherwise the path itself.
+    """
+    path = Path(path)
+    if path.suffix == '.csv' and _has_pyarrow():
+        return _columnar_twin(path) or path
+    return path
+
+
+def read_compact(path, columns=None, dataset=None):
+    """
+    Load a dataset with compact dtypes.
+
+    For a CSV path, a .parquet or .feather file with the same name is read
+    instead when it was written from that CSV (write_compact's source_csv);
+    otherwise the CSV is parsed straight into the compact dtypes.
+
+    Parameters
+    ----------
+    path : str or Path
+        .csv, .parquet or .feather file.
+    columns : list of str, optional
+        Only load these columns (much faster for columnar files).
+    dataset : str, optional
+        Profile name. Inferred from the file name when not given.
+
+    Returns
+    -------
+    pandas.DataFrame
+        The table, with compact dtypes.
+    """
+    path = Path(path)
+    dataset = dataset or path
+
+    path = source_file(path)
+    if path.suffix == '.csv':
+        return pd.read_csv(path, usecols=columns,
+                           dtype=compact_dtypes(dataset, columns))
+
+    _require_pyarrow()
+    if path.suffix == '.parquet':
+        df = pd.read_parquet(path, columns=columns)
+    elif path.suffix == '.feather':
+        df = pd.read_feather(path, columns=columns)
+    else:
+        raise ValueError(f"Unsupported dataset format: {path.suffix!r}")
+
+    # Files written elsewhere may not carry the compact dtypes yet
+    return to_compact(df, dataset)
+
+
+def iter_compact(path, columns=None, chunk_size=100_000, dataset=None):
+    """
+    Read a dataset chunk by chunk with compact dtypes.
+
+    Only one chunk is in memory at a time, so files larger than RAM can be
+    processed. Like read_compact, a CSV path is served from its .parquet or
+    .feather twin when that was written from the CSV.
+
+    Parameters
+    ----------
+    path : str or Path
+        .csv, .parquet or .feather file.
+    columns : list of str, optional
+        Only load these columns.
+    chunk_size : int
+        Rows per chunk (Feather files yield the record batches they were
+        written with).
+    dataset : str, optional
+        Profile name. Inferred from the file name when not given.
+
+    Yields
+    ------
+    pandas.DataFrame
+        Consecutive chunks of the table, with compact dtypes.
+    """
+    path = Path(path)
+    dataset = dataset or path
+
+    path = source_file(path)
+    if path.suffix == '.csv':
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size,
+                               dtype=compact_dtypes(dataset, columns))
+        return
+
+    for batch in _iter_batches(path, columns, chunk_size):
+        yield to_compact(batch.to_pandas(), dataset)
+
+
+def _iter_batches(path, columns, chunk_size):
+    """Record batches of a .parquet or .feather file, as stored (no dtype changes)."""
+    pyarrow = _require_pyarrow()
+    if path.suffix == '.parquet':
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetFile(path).iter_batches(
+            batch_size=chunk_size, columns=columns)
+    if path.suffix == '.feather':
+        reader = pyarrow.ipc.open_file(path)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        if columns is not None:
+            batches = (batch.select(columns) for batch in batches)
+        return batches
+    raise ValueError(f"Unsupported dataset format: {path.suffix!r}")
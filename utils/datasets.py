@@ -0,0 +1,526 @@
+"""
+Dataset Registry for Machine Learning For Dentists
+==================================================
+
+One place that knows where every dataset of the course lives, so notebooks
+and scripts load them by name instead of hard-coding paths relative to the
+working directory.
+
+The first load of a dataset parses the file once and saves every column as
+its own .npy file in .dataset_cache/ (project root). Later loads open only
+the requested columns as memory maps: nothing is parsed, and a column's
+pages are read from disk only when they are used. The maps are
+copy-on-write, so changing a loaded DataFrame never changes the cache. Text and
+categorical columns are stored as integer codes plus a file of levels.
+
+Cache entries are keyed by the SHA-256 of the file that was read, so
+regenerating a dataset gives a new entry; the old one is removed.
+
+Usage:
+    from utils.datasets import load_dataset
+
+    # Three columns of the Chapter 03 dataset, compact dtypes
+    df = load_dataset('implant_bone_loss',
+                      columns=['age', 'hba1c', 'marginal_bone_loss_mm'])
+
+    # The D1 dataset exactly as pd.read_csv gives it
+    df = load_dataset('D1', dtype_profile='pandas')
+
+    python -m utils.datasets                 # List datasets and cache entries
+    python -m utils.datasets --build D1      # Fill the cache ahead of time
+    python -m utils.datasets --clear         # Delete the cache
+"""
+
+import argparse
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+from .data_io import (
+    COLUMNAR_SUFFIXES, _columnar_twin, _has_pyarrow, iter_compact, read_compact
+)
+from .model_store import data_digest
+from .palette import _find_project_root   # Re-exported by utils.periospot_style
+
+CACHE_NAME = '.dataset_cache'
+
+# Overrides the cache folder (e.g. a scratch cache for benchmarks)
+CACHE_ENV = 'PERIOSPOT_DATASET_CACHE'
+
+DTYPE_PROFILES = ('compact', 'pandas')
+
+# Rows parsed at a time when a compact cache entry is built
+BUILD_CHUNK_SIZE = 1_000_000
+
+# Bumped when the layout of a cache entry changes
+CACHE_FORMAT = 1
+
+# =============================================================================
+# REGISTRY
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """A registered dataset file (path relative to the project root)."""
+    name: str
+    path: str
+    description: str
+    alias: str = None
+
+
+DATASETS = {dataset.name: dataset for dataset in [
+    Dataset('implant_bone_loss',
+            'chapters/03_linear_regression/data/implant_bone_loss.csv',
+            'Chapter 03 - marginal bone loss around implants (regression)'),
+    Dataset('implant_bone_loss_toy',
+            'chapters/03_linear_regression/data/implant_bone_loss_toy.csv',
+            'Chapter 03 - small version for quick experiments'),
+    Dataset('implant_success_data',
+            'chapters/04_logistic_regression/data/implant_success_data.csv',
+            'Chapter 04 - implant success/failure with true probabilities'),
+    Dataset('implant_success_data_training',
+            'chapters/04_logistic_regression/data/implant_success_data_training.csv',
+            'Chapter 04 - implant success/failure (training columns only)'),
+    Dataset('dental_clinical_data',
+            'data/D1_core_tabular/dental_clinical_data.csv',
+            'D1 - core tabular dental dataset', alias='D1'),
+    Dataset('toy_dental_data',
+            'data/D2_toy_tabular/toy_dental_data.csv',
+            'D2 - toy tabular dataset', alias='D2'),
+    Dataset('imaging_metadata',
+            'data/D3_imaging/metadata.csv',
+            'D3 - image-level labels of the imaging dataset', alias='D3'),
+    Dataset('clinical_texts',
+            'data/D4_text/clinical_texts.csv',
+            'D4 - clinical text dataset', alias='D4'),
+]}
+
+ALIASES = {dataset.alias: name for name, dataset in DATASETS.items() if dataset.alias}
+
+
+def get_dataset(name):
+    """
+    Look up a registered dataset by name or alias ('D1' ... 'D4').
+
+    Raises
+    ------
+    KeyError
+        If the name is not registered.
+    """
+    name = ALIASES.get(name, name)
+    if name not in DATASETS:
+        known = ', '.join(list(DATASETS) + list(ALIASES))
+        raise KeyError(f"Unknown dataset {name!r}. Registered: {known}")
+    return DATASETS[name]
+
+
+def dataset_path(name, root=None):
+    """
+    Absolute path of a registered dataset's file.
+
+    Parameters
+    ----------
+    name : str
+        Dataset name or alias.
+    root : str or Path, optional
+        Project root (found from the working directory when not given).
+
+    Returns
+    -------
+    Path
+        The registered file (which may not exist yet).
+    """
+    return Path(root or _find_project_root()) / get_dataset(name).path
+
+
+def _available(path):
+    """Whether a dataset file, or a .parquet/.feather copy of it, exists."""
+    return path.exists() or any(path.with_suffix(s).exists() for s in COLUMNAR_SUFFIXES)
+
+
+def _require_file(name, path):
+    """Raise FileNotFoundError explaining where a missing dataset comes from."""
+    if _available(path):
+        return
+    readme = path.parent / 'README.md'
+    hint = f" (see {readme})" if readme.exists() else ""
+    raise FileNotFoundError(f"Dataset {name!r} is not available: {path} does not exist{hint}")
+
+
+# =============================================================================
+# COLUMN WRITERS
+# =============================================================================
+
+# Fixed .npy header size, so the header can be rewritten once the row count
+# is known without moving the data
+_NPY_HEADER_BYTES = 128
+
+
+class _NpyWriter:
+    """Append-only 1-D .npy file whose length is filled in on close."""
+
+    def __init__(self, path, dtype):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.length = 0
+        self.file = open(path, 'w+b')
+        self.file.write(b'\0' * _NPY_HEADER_BYTES)
+
+    def append(self, values):
+        dtype = np.result_type(self.dtype, values.dtype)
+        if dtype != self.dtype:
+            self._widen(dtype)
+        self.file.write(np.ascontiguousarray(values, dtype=self.dtype).tobytes())
+        self.length += len(values)
+
+    def _widen(self, dtype):
+        """Rewrite the rows so far with a wider dtype (e.g. int64 → float64)."""
+        self.file.seek(_NPY_HEADER_BYTES)
+        written = np.frombuffer(self.file.read(), self.dtype)
+        self.dtype = dtype
+        self.file.seek(_NPY_HEADER_BYTES)
+        self.file.truncate()
+        self.file.write(written.astype(dtype).tobytes())
+
+    def close(self):
+        header = repr({'descr': np.lib.format.dtype_to_descr(self.dtype),
+                       'fortran_order': False, 'shape': (self.length,)})
+        prefix = b'\x93NUMPY\x01\x00'
+        size = _NPY_HEADER_BYTES - len(prefix) - 2
+        self.file.seek(0)
+        self.file.write(prefix + np.uint16(size).tobytes()
+                        + header.ljust(size - 1).encode('latin1') + b'\n')
+        self.file.close()
+
+
+def _codes_dtype(n_levels):
+    return np.int8 if n_levels < 2**7 else np.int16 if n_levels < 2**15 else np.int32
+
+
+class _ColumnWriter:
+    """
+    Save one column chunk by chunk.
+
+    Numeric, boolean and datetime columns are stored as they are. Text and
+    categorical columns become integer codes (-1 for missing) into levels
+    that grow as new values appear.
+    """
+
+    def __init__(self, folder, index, name, series):
+        self.name = name
+        self.writer = None
+        self.path = folder / f'{index:03d}.npy'
+        dtype = series.dtype
+        if isinstance(dtype, CategoricalDtype):
+            self.kind = 'categorical'
+            self.levels = pd.Index(dtype.categories)
+            self.ordered = bool(dtype.ordered)
+        elif isinstance(dtype, np.dtype) and dtype.kind in 'biufcmM':
+            self.kind = 'array'
+        elif pd.api.types.is_numeric_dtype(dtype) or pd.api.types.is_bool_dtype(dtype):
+            self.kind = 'array'     # Nullable extension dtypes: NaN for missing
+        else:
+            self.kind = 'text'
+            self.levels = pd.Index([], dtype=object)
+            self.text_dtype = str(dtype)
+
+    def append(self, series):
+        if self.kind == 'array':
+            values = series.to_numpy()
+            if not isinstance(series.dtype, np.dtype):
+                values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+        else:
+            values = self._codes(series)
+        if self.writer is None:
+            self.writer = _NpyWriter(self.path, values.dtype)
+        self.writer.append(values)
+
+    def _codes(self, series):
+        if self.kind == 'categorical' and isinstance(series.dtype, CategoricalDtype):
+            # Map the chunk's own categories onto the levels so far
+            categories, codes = series.cat.categories, series.cat.codes.to_numpy()
+        else:
+            categories, codes = None, None
+            series = series.astype(object)
+
+        values = categories if categories is not None else series.to_numpy()
+        positions = self.levels.get_indexer(values)
+        new = (positions < 0) & pd.notna(values)
+        if new.any():
+            self.levels = self.levels.append(pd.Index(pd.unique(values[new])))
+            positions = self.levels.get_indexer(values)
+
+        if codes is not None:
+            positions = np.where(codes >= 0, positions[codes], -1)
+        return positions.astype(_codes_dtype(len(self.levels)))
+
+    def close(self):
+        self.writer.close()
+        meta = {'name': self.name, 'file': self.path.name, 'kind': self.kind}
+        if self.kind != 'array':
+            # Own file: an ID column can have millions of levels
+            levels_path = self.path.with_suffix('.levels.json')
+            levels_path.write_text(json.dumps(self.levels.tolist(), default=str))
+            meta['levels'] = levels_path.name
+        if self.kind == 'categorical':
+            meta['ordered'] = self.ordered
+        if self.kind == 'text':
+            meta['dtype'] = self.text_dtype
+        return meta
+
+
+def _read_column(folder, meta):
+    """Open one cached column (numeric data as a copy-on-write memory map)."""
+    path = folder / meta['file']
+    # An empty file cannot be memory-mapped (zero-row datasets)
+    mmap_mode = 'c' if path.stat().st_size > _NPY_HEADER_BYTES else None
+    values = np.load(path, mmap_mode=mmap_mode).view(np.ndarray)
+    if meta['kind'] == 'array':
+        return values
+    levels = json.loads((folder / meta['levels']).read_text())
+    if meta['kind'] == 'categorical':
+        dtype = CategoricalDtype(levels, ordered=meta['ordered'])
+        return pd.Categorical.from_codes(values, dtype=dtype)
+    categorical = pd.Categorical.from_codes(values, dtype=CategoricalDtype(levels))
+    return pd.Series(categorical).astype(meta['dtype'])
+
+
+# =============================================================================
+# CACHE
+# =============================================================================
+
+
+class ColumnCache:
+    """
+    Folder of column-per-file dataset copies, one subfolder per entry.
+
+    Parameters
+    ----------
+    root : str or Path, optional
+        Cache folder (default: $PERIOSPOT_DATASET_CACHE, else .dataset_cache/
+        in the project root).
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or os.environ.get(CACHE_ENV)
+                         or _find_project_root() / CACHE_NAME)
+
+    def entry_path(self, name, dtype_profile, digest):
+        return self.root / name / f'{dtype_profile}-{digest[:24]}'
+
+    def load(self, path, columns=None):
+        """Return the DataFrame of a cache entry, or None if there is none."""
+        try:
+            meta = json.loads((path / 'meta.json').read_text())
+        except (OSError, ValueError):
+            return None
+        if meta.get('format') != CACHE_FORMAT:
+            return None
+
+        by_name = {column['name']: column for column in meta['columns']}
+        if columns is None:
+            columns = list(by_name)
+        missing = [col for col in columns if col not in by_name]
+        if missing:
+            raise KeyError(f"{meta['dataset']} has no column(s) {missing}. "
+                           f"Columns: {list(by_name)}")
+        data = {col: _read_column(path, by_name[col]) for col in columns}
+        return pd.DataFrame(data, columns=columns, copy=False)
+
+    def build(self, path, chunks, meta):
+        """
+        Save a dataset column by column.
+
+        The entry is written to a temporary folder and renamed into place,
+        so readers never see half an entry; older entries of the same
+        dataset and profile are then removed.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = path.parent / f'.tmp-{os.getpid()}-{path.name}'
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        writers, n_rows = None, 0
+        for chunk in chunks:
+            if writers is None:
+                writers = [_ColumnWriter(tmp, i, col, chunk[col])
+                           for i, col in enumerate(chunk.columns)]
+            for writer in writers:
+                writer.append(chunk[writer.name])
+            n_rows += len(chunk)
+        columns = [writer.close() for writer in writers or []]
+
+        (tmp / 'meta.json').write_text(json.dumps(
+            {**meta, 'format': CACHE_FORMAT, 'n_rows': n_rows, 'columns': columns},
+            indent=1, default=str))
+        try:
+            os.replace(tmp, path)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # Another process built it
+        prefix = path.name.split('-')[0] + '-'
+        for old in path.parent.glob(f'{prefix}*'):
+            if old != path and not old.name.startswith('.tmp-'):
+                shutil.rmtree(old, ignore_errors=True)
+
+    def entries(self):
+        """Metadata of every cache entry, by dataset name."""
+        metas = []
+        for meta_path in sorted(self.root.glob('*/*/meta.json')):
+            try:
+                meta = json.loads(meta_path.read_text())
+            except ValueError:
+                continue
+            size = sum(p.stat().st_size for p in meta_path.parent.iterdir())
+            metas.append({**meta, 'path': meta_path.parent, 'bytes': size})
+        return metas
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+# =============================================================================
+# LOAD
+# =============================================================================
+
+
+def _source(path, dtype_profile):
+    """
+    The file a profile is read from: for a CSV, its matching .parquet or
+    .feather twin ('compact', or when only the twin exists), else the CSV.
+    """
+    if path.suffix != '.csv':
+        return path
+    twin = _columnar_twin(path)
+    if twin is not None and (not path.exists() or dtype_profile == 'compact'
+                             and _has_pyarrow()):
+        return twin
+    return path
+
+
+def _read_chunks(path, dtype_profile, dataset):
+    """Chunks of a whole dataset file in the dtypes of a profile."""
+    if dtype_profile == 'compact':
+        return iter_compact(path, chunk_size=BUILD_CHUNK_SIZE, dataset=dataset)
+    # pandas infers dtypes from the whole column, so read the file at once
+    if path.suffix in COLUMNAR_SUFFIXES:
+        reader = pd.read_parquet if path.suffix == '.parquet' else pd.read_feather
+        return [reader(path)]
+    return [pd.read_csv(path)]
+
+
+def load_dataset(name, columns=None, dtype_profile='compact', cache=True, root=None):
+    """
+    Load a registered dataset by name.
+
+    Parameters
+    ----------
+    name : str
+        Dataset name (e.g. 'implant_bone_loss') or alias ('D1' ... 'D4').
+    columns : list of str, optional
+        Only load these columns, in this order.
+    dtype_profile : {'compact', 'pandas'}
+        'compact' uses the dataset's utils.data_io profile (categories,
+        narrow integers, float32); 'pandas' gives the dtypes of a plain
+        pd.read_csv of the file.
+    cache : bool
+        Serve the columns from the column cache, building it on first use.
+        With False, the file is read directly (only the requested columns).
+    root : str or Path, optional
+        Project root (found from the working directory when not given).
+
+    Returns
+    -------
+    pandas.DataFrame
+        The table. Cached numeric columns are copy-on-write memory maps:
+        only the pages that are modified get copied into memory.
+
+    Raises
+    ------
+    KeyError
+        If the dataset or a requested column does not exist.
+    FileNotFoundError
+        If the dataset's file has not been added to the project yet.
+    """
+    if dtype_profile not in DTYPE_PROFILES:
+        raise ValueError(f"dtype_profile must be one of {DTYPE_PROFILES}, "
+                         f"got {dtype_profile!r}")
+    dataset = get_dataset(name)
+    root = Path(root or _find_project_root())
+    path = root / dataset.path
+    _require_file(dataset.name, path)
+    columns = list(columns) if columns is not None else None
+
+    source = _source(path, dtype_profile)
+
+    if not cache:
+        if dtype_profile == 'compact':
+            df = read_compact(path, columns=columns, dataset=dataset.name)
+        elif source.suffix in COLUMNAR_SUFFIXES:
+            reader = pd.read_parquet if source.suffix == '.parquet' else pd.read_feather
+            df = reader(source, columns=columns)
+        else:
+            df = pd.read_csv(source, usecols=columns)
+        return df[columns] if columns is not None else df
+
+    store = ColumnCache(root=os.environ.get(CACHE_ENV) or root / CACHE_NAME)
+    digest = data_digest(source, store_dir=store.root)
+    entry = store.entry_path(dataset.name, dtype_profile, digest)
+
+    df = store.load(entry, columns)
+    if df is None:
+        store.build(entry, _read_chunks(source, dtype_profile, dataset.name),
+                    {'dataset': dataset.name, 'dtype_profile': dtype_profile,
+                     'source': str(source), 'digest': digest})
+        df = store.load(entry, columns)
+    return df
+
+
+# =============================================================================
+# COMMAND LINE
+# =============================================================================
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='List the registered datasets, fill or clear the column cache.')
+    parser.add_argument('--build', nargs='*', metavar='NAME',
+                        help='Cache these datasets (default: every available one)')
+    parser.add_argument('--dtype-profile', choices=DTYPE_PROFILES, default='compact',
+                        help='Profile to cache with --build (default: compact)')
+    parser.add_argument('--clear', action='store_true', help='Delete the column cache')
+    args = parser.parse_args()
+
+    store = ColumnCache()
+    if args.clear:
+        store.clear()
+        print(f"Cleared {store.root}")
+        return
+
+    if args.build is not None:
+        names = args.build or [name for name in DATASETS if _available(dataset_path(name))]
+        for name in names:
+            df = load_dataset(name, dtype_profile=args.dtype_profile)
+            print(f"✓ {get_dataset(name).name}: {len(df):,} rows × {df.shape[1]} columns")
+        return
+
+    cached = {}
+    for entry in store.entries():
+        cached.setdefault(entry['dataset'], []).append(entry)
+    for name, dataset in DATASETS.items():
+        status = '✓' if _available(dataset_path(name)) else '✗'
+        alias = f"({dataset.alias})" if dataset.alias else ''
+        print(f"{status} {name:30} {alias:5} {dataset.description}")
+        for entry in cached.get(name, []):
+            print(f"      cached {entry['dtype_profile']:8} {entry['n_rows']:>12,} rows  "
+                  f"{entry['bytes'] / 1e6:8.1f} MB")
+
+
+if __name__ == '__main__':
+    main()
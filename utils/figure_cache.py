@@ -0,0 +1,345 @@
+"""
+Incremental Figure Builds for Machine Learning For Dentists
+===========================================================
+
+Skips chapter figures whose inputs have not changed since they were last
+saved.
+
+Each figure gets a *key*: a SHA-256 hash of everything that can change its
+pixels — the dataset bytes, model and split parameters, the source of the
+function that draws it and of the helpers, constants and utils code it reads
+(followed name by name), the matplotlib rcParams and brand_palette.json.
+Editing one figure's function therefore only rebuilds that figure. Keys
+are stored in a small manifest (``figures/.figure_cache.json``). A figure
+is rebuilt only when its key changed or its PNG is missing.
+
+Usage:
+    from utils.figure_cache import FigureCache, figure_key, file_digest
+
+    cache = FigureCache('figures')
+    inputs = {'data': file_digest('data/my_data.csv'), 'model': {'C': 1.0}}
+    keys = {name: figure_key(draw, inputs, depends_on=[prepare_state])
+            for name, draw in FIGURES.items()}
+    stale = cache.stale(keys)      # names to rebuild
+    ...
+    cache.record(name, keys[name])
+    cache.save()
+"""
+
+import hashlib
+import inspect
+import json
+import re
+import sys
+from pathlib import Path
+
+# brand_palette.json styles every chart, so it is part of every key
+PALETTE_FILE = Path(__file__).resolve().parent.parent / 'brand_palette.json'
+
+MANIFEST_NAME = '.figure_cache.json'
+
+# Code of this package is followed when a figure reads it
+PACKAGE = __name__.rpartition('.')[0]
+
+# =============================================================================
+# HASHING
+# =============================================================================
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    SHA-256 of a file's bytes, read in 1 MB chunks.
+
+    Parameters
+    ----------
+    path : str or Path
+        File to hash. A missing file hashes to the string 'missing'.
+
+    Returns
+    -------
+    str
+        Hex digest.
+    """
+    path = Path(path)
+    if not path.exists():
+        return 'missing'
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _in_package(module_name):
+    return module_name == PACKAGE or module_name.startswith(PACKAGE + '.')
+
+
+def _package_modules(module, found):
+    """Add the package modules a module refers to, and theirs, to ``found``."""
+    for value in list(vars(module).values()):
+        if inspect.ismodule(value):
+            name = value.__name__
+        else:
+            name = getattr(value, '__module__', None)
+        if not isinstance(name, str) or name in found or not _in_package(name):
+            continue
+        used = sys.modules.get(name)
+        if used is not None:
+            found[name] = used
+            _package_modules(used, found)
+    return found
+
+
+def _text_digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _value_text(value):
+    """Stable text for a constant (no memory addresses, arrays by content)."""
+    if isinstance(value, dict):
+        items = sorted(f'{_value_text(k)}: {_value_text(v)}' for k, v in value.items())
+        return '{' + ', '.join(items) + '}'
+    if isinstance(value, (set, frozenset)):
+        return '{' + ', '.join(sorted(_value_text(v) for v in value)) + '}'
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{', '.join(_value_text(v) for v in value)}]"
+    if inspect.isfunction(value) or inspect.isclass(value) or inspect.ismodule(value):
+        return f"<{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', value.__name__)}>"
+    if hasattr(value, 'dtype') and hasattr(value, 'tobytes'):   # numpy arrays
+        content = hashlib.sha256(value.tobytes()).hexdigest()
+        return f'array({value.dtype}, {getattr(value, "shape", ())}, {content})'
+    return re.sub(r' at 0x[0-9a-fA-F]+', '', repr(value))
+
+
+def _code_names(code):
+    """Global and attribute names read by a code object and the code nested in it."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            names |= _code_names(const)
+    return names
+
+
+def _source_text(obj):
+    try:
+        return inspect.getsource(obj)
+    except (OSError, TypeError):
+        return repr(obj.__code__.co_code) if hasattr(obj, '__code__') else _value_text(obj)
+
+
+def _class_functions(cls):
+    """The functions written in a class body (methods, properties, ...)."""
+    functions = []
+    for member in vars(cls).values():
+        if isinstance(member, (staticmethod, classmethod)):
+            member = member.__func__
+        if isinstance(member, property):
+            functions += [f for f in (member.fget, member.fset, member.fdel) if f]
+        elif inspect.isfunction(member):
+            functions.append(member)
+    # Methods generated at run time (e.g. by @dataclass) have no source of their own
+    return [f for f in functions if f.__qualname__.startswith(cls.__qualname__ + '.')]
+
+
+def _add_code(value, script, found, label=None):
+    """
+    Add the digest of what a figure reads through one value to ``found``.
+
+    Functions and classes of the figure script are hashed by their own
+    source, then followed through the names their code reads; constants of
+    the script (colour dicts, bin edges, ...) are hashed by value under
+    ``label``. Code of this package is hashed by module file, with the
+    package modules it uses in turn. Third-party code is not followed.
+    """
+    module = value.__name__ if inspect.ismodule(value) else getattr(value, '__module__', None)
+    if isinstance(module, str) and _in_package(module) and (
+            inspect.ismodule(value) or inspect.isfunction(value) or inspect.isclass(value)):
+        used = sys.modules.get(module)
+        if used is not None and module not in found:
+            for name, source in [(module, used), *_package_modules(used, {}).items()]:
+                found.setdefault(name, file_digest(source.__file__))
+        return
+
+    if inspect.isfunction(value) or inspect.isclass(value):
+        if inspect.isfunction(value):
+            value = inspect.unwrap(value)   # @profiled() and other wrappers
+        if value.__module__ != script or value.__qualname__ in found:
+            return
+        found[value.__qualname__] = _text_digest(_source_text(value))
+
+        if inspect.isclass(value):
+            for base in value.__bases__:
+                _add_code(base, script, found)
+            functions = _class_functions(value)
+        else:
+            functions = [value]
+        for function in functions:
+            scope = function.__globals__
+            for global_name in sorted(_code_names(function.__code__)):
+                if global_name in scope:
+                    _add_code(scope[global_name], script, found, label=global_name)
+            for cell in function.__closure__ or ():
+                try:
+                    _add_code(cell.cell_contents, script, found)
+                except ValueError:   # Empty cell
+                    pass
+        return
+
+    if inspect.ismodule(value) or label is None or label in found:
+        return
+    found[label] = _text_digest(_value_text(value))
+    items = list(value.values()) if isinstance(value, dict) else value
+    if isinstance(items, (list, tuple, set, frozenset)):
+        for item in items:
+            _add_code(item, script, found)
+
+
+def code_digests(*functions):
+    """
+    SHA-256 of the code and constants some functions depend on.
+
+    Each function's own source is hashed, and so is every module-level name
+    its code reads: helper functions and classes of the script (followed
+    the same way), constants such as colour dicts, and the source files of
+    the utils modules it calls into. Code in other functions of the same
+    script is not part of the result, so editing one figure's function
+    leaves the other figures' digests unchanged.
+
+    Parameters
+    ----------
+    *functions : callable
+        Functions of one script (e.g. a figure's draw function and the
+        function that prepares the state it draws from).
+
+    Returns
+    -------
+    dict
+        Name in the script (or utils module name) → hex digest. Script
+        names are unqualified by module, so the script hashes the same
+        whether it is run or imported.
+    """
+    found = {}
+    for function in functions:
+        _add_code(function, inspect.unwrap(function).__module__, found)
+    return found
+
+
+def _style_text():
+    """Current matplotlib rcParams (set by the script at import), if loaded."""
+    matplotlib = sys.modules.get('matplotlib')
+    if matplotlib is None:
+        return None
+    return _value_text(dict(matplotlib.rcParams))
+
+
+def figure_key(draw_figure, inputs, depends_on=()):
+    """
+    Hash everything a figure depends on.
+
+    Parameters
+    ----------
+    draw_figure : callable
+        The function that draws the figure. Its source and what it reads
+        are hashed (see code_digests), not the rest of its script.
+    inputs : dict
+        JSON-serialisable inputs (file digests, model parameters, ...).
+    depends_on : sequence of callable
+        Other functions whose results the figure draws (e.g. the one that
+        computes the shared state), hashed the same way.
+
+    Returns
+    -------
+    str
+        Hex digest that changes whenever any input changes.
+    """
+    payload = {
+        'figure': draw_figure.__qualname__,
+        'code': code_digests(draw_figure, *depends_on),
+        'style': _style_text(),
+        'inputs': inputs,
+        'palette': file_digest(PALETTE_FILE),
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+# =============================================================================
+# MANIFEST
+# =============================================================================
+
+
+class FigureCache:
+    """
+    Manifest of the key each figure in a folder was last built with.
+
+    Parameters
+    ----------
+    figures_dir : str or Path
+        Folder holding the PNGs (and the manifest).
+    """
+
+    def __init__(self, figures_dir):
+        self.figures_dir = Path(figures_dir)
+        self.path = self.figures_dir / MANIFEST_NAME
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                self.entries = json.load(f)
+        else:
+            self.entries = {}
+
+    def is_fresh(self, name, key):
+        """True if the figure was built with this key and its PNG still exists."""
+        entry = self.entries.get(name)
+        return (entry is not None and entry.get('key') == key
+                and (self.figures_dir / entry['output']).exists())
+
+    def stale(self, keys):
+        """Names (in order) of the figures whose keys changed."""
+        return [name for name, key in keys.items() if not self.is_fresh(name, key)]
+
+    def record(self, name, key, output=None):
+        """Remember that a figure was built with this key."""
+        self.entries[name] = {'key': key, 'output': output or f'{name}.png'}
+
+    def save(self):
+        """Write the manifest next to the figures."""
+        self.figures_dir.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+
+
+def select_figures(names, only=None):
+    """
+    Resolve ``--only`` arguments to figure names.
+
+    Each argument may be a full name ('03_odds_ratios') or a unique prefix
+    ('03').
+
+    Parameters
+    ----------
+    names : list of str
+        All figure names of the chapter.
+    only : list of str, optional
+        Requested figures; None selects all.
+
+    Returns
+    -------
+    list of str
+        Selected names in chapter order.
+    """
+    if not only:
+        return list(names)
+
+    selected = set()
+    for request in only:
+        if request in names:
+            matches = [request]
+        else:
+            matches = [name for name in names if name.startswith(request)]
+        if len(matches) != 1:
+            raise ValueError(
+                f"--only {request!r} matches {len(matches)} figures; "
+                f"choose from: {', '.join(names)}"
+            )
+        selected.add(matches[0])
+    return [name for name in names if name in selected]
@@ -0,0 +1,175 @@
+"""
+Parallel Figure Rendering for Machine Learning For Dentists
+===========================================================
+
+Renders independent chapter figures in a pool of worker processes.
+
+Every figure is a function ``draw(state)`` that reads a shared, precomputed
+state object (a dataclass holding predictions, weights, counts...) and
+saves its own PNG. NumPy arrays in the state, and the array attributes of
+objects it holds (e.g. the counts of a ScoreHistogram), are copied once
+into shared memory; workers map them instead of receiving a pickled copy.
+Workers use the non-interactive Agg backend.
+
+Usage:
+    from utils.figure_pool import render_figures
+
+    timings = render_figures({'01_roc': plot_roc, '02_pr': plot_pr},
+                             state, n_workers=4)
+"""
+
+import copy
+import dataclasses
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .profiling import stage
+
+# =============================================================================
+# SHARED-MEMORY ARRAYS
+# =============================================================================
+
+
+def _share_array(array):
+    """Copy an array into a new shared-memory block; return (block, spec)."""
+    array = np.ascontiguousarray(array)
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def _attach_array(spec):
+    """Map a shared-memory block created by _share_array as a read-only array."""
+    name, shape, dtype = spec
+    if sys.version_info >= (3, 13):
+        # Only the creating process should track (and unlink) the block
+        block = shared_memory.SharedMemory(name=name, track=False)
+    else:
+        block = shared_memory.SharedMemory(name=name)
+    array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    array.flags.writeable = False
+    return block, array
+
+
+# =============================================================================
+# WORKER PROCESS
+# =============================================================================
+
+# Per-worker state, set once by _init_worker
+_WORKER_STATE = None
+_WORKER_BLOCKS = []
+
+
+def _init_worker(light_state, array_specs):
+    """Switch to Agg and rebuild the figure state from shared memory."""
+    global _WORKER_STATE
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    fields = {}
+    for (field, attribute), spec in array_specs.items():
+        block, array = _attach_array(spec)
+        _WORKER_BLOCKS.append(block)  # Keep mapped while the worker lives
+        if attribute is None:
+            fields[field] = array
+        else:
+            if field not in fields:
+                fields[field] = copy.copy(getattr(light_state, field))
+            setattr(fields[field], attribute, array)
+    _WORKER_STATE = dataclasses.replace(light_state, **fields)
+
+
+def _draw(name, draw_figure):
+    """Render one figure in a worker; return its name and wall time."""
+    start = time.perf_counter()
+    with stage(f'figure.{name}'):
+        draw_figure(_WORKER_STATE)
+    return name, time.perf_counter() - start
+
+
+# =============================================================================
+# PUBLIC API
+# =============================================================================
+
+
+def render_figures(figures, state, n_workers=None):
+    """
+    Render figures concurrently from a shared precomputed state.
+
+    Parameters
+    ----------
+    figures : dict
+        Figure name → module-level function ``draw(state)`` that saves the
+        figure itself.
+    state : dataclass instance
+        Everything the figures need. Its NumPy array fields, and the array
+        attributes of objects in its fields, are passed to workers through
+        shared memory; everything else is pickled once per worker.
+    n_workers : int or None
+        Worker processes (None uses one per figure, capped at the number of
+        cores; 1 renders in the current process).
+
+    Returns
+    -------
+    dict
+        Figure name → seconds spent drawing and saving it.
+    """
+    if n_workers is None:
+        n_workers = min(len(figures), os.cpu_count() or 1)
+
+    timings = {}
+    if n_workers <= 1 or len(figures) <= 1:
+        for name, draw_figure in figures.items():
+            start = time.perf_counter()
+            with stage(f'figure.{name}'):
+                draw_figure(state)
+            timings[name] = time.perf_counter() - start
+            print(f"  ✓ {name} ({timings[name]:.2f}s)")
+        return timings
+
+    # Move the arrays into shared memory; send the rest of the state as is
+    blocks = []
+    array_specs = {}
+    light_fields = {}
+    for field in dataclasses.fields(state):
+        value = getattr(state, field.name)
+        if isinstance(value, np.ndarray):
+            block, array_specs[field.name, None] = _share_array(value)
+            blocks.append(block)
+            light_fields[field.name] = None
+            continue
+        # Array attributes of a held object (a ScoreHistogram's counts...)
+        attributes = [name for name, attr in vars(value).items()
+                      if isinstance(attr, np.ndarray)] if hasattr(value, '__dict__') else []
+        if attributes:
+            light = copy.copy(value)
+            for name in attributes:
+                block, array_specs[field.name, name] = _share_array(getattr(value, name))
+                blocks.append(block)
+                setattr(light, name, None)
+            light_fields[field.name] = light
+    light_state = dataclasses.replace(state, **light_fields)
+
+    try:
+        with ProcessPoolExecutor(max_workers=n_workers,
+                                 initializer=_init_worker,
+                                 initargs=(light_state, array_specs)) as pool:
+            futures = [pool.submit(_draw, name, draw_figure)
+                       for name, draw_figure in figures.items()]
+            for future in as_completed(futures):
+                name, seconds = future.result()
+                timings[name] = seconds
+                print(f"  ✓ {name} ({seconds:.2f}s)")
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    # Report in the order the figures were given
+    return {name: timings[name] for name in figures}
@@ -0,0 +1,343 @@
+"""
+Fitted-Model Store for Machine Learning For Dentists
+====================================================
+
+Saves a fitted scaler and model together with the split and predictions
+they produced, so figure scripts and other tools load them instead of
+fitting again.
+
+Each entry is keyed by a SHA-256 hash of everything the fit depends on:
+the dataset file's bytes, the feature and target columns, the split
+parameters, the estimator and its hyperparameters, and the scikit-learn
+version (pickles do not survive upgrades). Any change gives a new key, so
+an entry is never stale; old entries just stop being used.
+
+An entry is a folder in .model_cache/ (project root):
+
+    models.joblib     {'scaler', 'model', 'feature_columns'}
+    meta.json         key inputs, row count, fit time
+    arrays/*.npy      split indices, targets and predictions, loaded as
+                      read-only memory maps (no copy into RAM until used)
+
+Dataset digests are remembered by (path, size, mtime), so a large file is
+only hashed again after it changes.
+
+Usage:
+    from utils.model_store import fit_scaled_model
+
+    artifact = fit_scaled_model('data/train.csv', FEATURES, 'success',
+                                LogisticRegression, MODEL_PARAMS, SPLIT_PARAMS)
+    artifact.model, artifact.arrays['y_prob_test']
+
+    python -m utils.model_store            # List entries
+    python -m utils.model_store --clear    # Delete them all
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from .figure_cache import file_digest
+from .profiling import stage
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+STORE_DIR = PROJECT_ROOT / '.model_cache'
+
+# Overrides STORE_DIR (e.g. a scratch store for benchmarks)
+STORE_ENV = 'PERIOSPOT_MODEL_CACHE'
+
+# =============================================================================
+# KEYS
+# =============================================================================
+
+
+def data_digest(path, store_dir=STORE_DIR):
+    """
+    SHA-256 of a dataset file, remembered while its size and mtime hold.
+
+    Parameters
+    ----------
+    path : str or Path
+        Dataset file.
+    store_dir : str or Path
+        Where the memo (digests.json) is kept.
+
+    Returns
+    -------
+    str
+        Hex digest ('missing' for a missing file).
+    """
+    path = Path(path).resolve()
+    if not path.exists():
+        return 'missing'
+    stat = path.stat()
+    memo_path = Path(store_dir) / 'digests.json'
+    try:
+        memo = json.loads(memo_path.read_text())
+    except (OSError, ValueError):
+        memo = {}
+
+    entry = memo.get(str(path))
+    if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+        return entry['digest']
+
+    digest = file_digest(path)
+    memo[str(path)] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'digest': digest}
+    memo_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = memo_path.with_suffix(f'.{os.getpid()}.tmp')
+    tmp.write_text(json.dumps(memo, indent=1, sort_keys=True))
+    tmp.replace(memo_path)
+    return digest
+
+
+def artifact_key(inputs):
+    """Hash JSON-serialisable fit inputs into an entry key."""
+    encoded = json.dumps(inputs, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+# =============================================================================
+# STORE
+# =============================================================================
+
+
+@dataclass
+class ModelArtifact:
+    """A fitted scaler and model with the split and predictions they made."""
+    key: str
+    path: Path
+    scaler: object
+    model: object
+    feature_columns: list
+    arrays: dict = field(default_factory=dict)    # name → read-only array
+    meta: dict = field(default_factory=dict)
+    fitted: bool = False                          # False: loaded from the store
+
+
+class ModelStore:
+    """
+    Folder of fitted models, one subfolder per key.
+
+    Parameters
+    ----------
+    root : str or Path, optional
+        Store folder (default: $PERIOSPOT_MODEL_CACHE, else .model_cache/
+        in the project root).
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or os.environ.get(STORE_ENV) or STORE_DIR)
+
+    def entry_path(self, key):
+        return self.root / key[:24]
+
+    def load(self, key):
+        """Return the stored artifact for a key, or None if there is none."""
+        import joblib
+
+        path = self.entry_path(key)
+        try:
+            meta = json.loads((path / 'meta.json').read_text())
+        except (OSError, ValueError):
+            return None
+        if meta.get('key') != key:
+            return None
+
+        models = joblib.load(path / 'models.joblib')
+        arrays = {p.stem: np.load(p, mmap_mode='r')
+                  for p in sorted((path / 'arrays').glob('*.npy'))}
+        return ModelArtifact(key=key, path=path, scaler=models['scaler'],
+                             model=models['model'],
+                             feature_columns=models['feature_columns'],
+                             arrays=arrays, meta=meta)
+
+    def save(self, key, scaler, model, feature_columns, arrays, meta, replace=False):
+        """
+        Store a fitted model; return it as loaded from the store.
+
+        The entry is written to a temporary folder and renamed into place,
+        so readers never see half an entry, and concurrent writers of the
+        same key keep whichever finished first (unless ``replace``).
+        """
+        import joblib
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        final = self.entry_path(key)
+        tmp = self.root / f'.tmp-{os.getpid()}-{key[:24]}'
+        shutil.rmtree(tmp, ignore_errors=True)
+        (tmp / 'arrays').mkdir(parents=True)
+
+        joblib.dump({'scaler': scaler, 'model': model,
+                     'feature_columns': list(feature_columns)}, tmp / 'models.joblib')
+        for name, array in arrays.items():
+            np.save(tmp / 'arrays' / f'{name}.npy', np.ascontiguousarray(array))
+        (tmp / 'meta.json').write_text(json.dumps({**meta, 'key': key},
+                                                  indent=2, default=str))
+        if replace:
+            shutil.rmtree(final, ignore_errors=True)
+        try:
+            os.replace(tmp, final)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)  # Another process stored it
+        return self.load(key)
+
+    def entries(self):
+        """Metadata of every stored entry, newest first."""
+        metas = []
+        for meta_path in self.root.glob('*/meta.json'):
+            try:
+                meta = json.loads(meta_path.read_text())
+            except ValueError:
+                continue
+            size = sum(p.stat().st_size for p in meta_path.parent.rglob('*') if p.is_file())
+            metas.append({**meta, 'path': meta_path.parent, 'bytes': size})
+        return sorted(metas, key=lambda m: m.get('created', 0), reverse=True)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+# =============================================================================
+# FIT OR LOAD
+# =============================================================================
+
+
+def fit_scaled_model(data_path, feature_columns, target_column, estimator,
+                     model_params, split_params, stratify=True, store=None,
+                     force=False):
+    """
+    Load a standardized-features model from the store, fitting it on a miss.
+
+    The fit is the chapters' usual recipe: train_test_split, StandardScaler
+    fitted on the training rows, then ``estimator(**model_params)``.
+
+    Parameters
+    ----------
+    data_path : str or Path
+        Dataset (read with utils.data_io.read_compact).
+    feature_columns : list of str
+        Model inputs, in order.
+    target_column : str
+        Column to predict.
+    estimator : class
+        scikit-learn estimator class (e.g. LogisticRegression).
+    model_params, split_params : dict
+        Keyword arguments of the estimator and of train_test_split.
+    stratify : bool
+        Stratify the split by the target (classification).
+    store : ModelStore, optional
+        Default: the project's .model_cache/.
+    force : bool
+        Fit again even if the entry exists (and replace it).
+
+    Returns
+    -------
+    ModelArtifact
+        Arrays: train_index, test_index (row positions in the dataset),
+        y_train, y_test, y_pred_train, y_pred_test and, for classifiers,
+        y_prob_train, y_prob_test (probability of class 1).
+    """
+    import sklearn
+
+    from .data_io import read_compact, source_file
+
+    store = store or ModelStore()
+    inputs = {
+        # The file read_compact reads: the .parquet/.feather twin if it matches
+        'data': data_digest(source_file(data_path), store.root),
+        'features': list(feature_columns),
+        'target': target_column,
+        'estimator': f'{estimator.__module__}.{estimator.__qualname__}',
+        'model_params': model_params,
+        'split_params': split_params,
+        'stratify': stratify,
+        'sklearn': sklearn.__version__,
+    }
+    key = artifact_key(inputs)
+    if not force:
+        with stage('load_model'):
+            artifact = store.load(key)
+        if artifact is not None:
+            return artifact
+
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+
+    start = time.perf_counter()
+    with stage('load') as load:
+        df = read_compact(data_path, columns=list(feature_columns) + [target_column])
+        load.add_output(df)
+    X = df[list(feature_columns)].to_numpy()
+    y = df[target_column].to_numpy()
+
+    with stage('split'):
+        train_index, test_index = train_test_split(
+            np.arange(len(df)), stratify=y if stratify else None, **split_params)
+
+    with stage('scale'):
+        scaler = StandardScaler()
+        X_train = scaler.fit_transform(X[train_index])
+        X_test = scaler.transform(X[test_index])
+
+    with stage('fit'):
+        model = estimator(**model_params)
+        model.fit(X_train, y[train_index])
+
+    with stage('predict'):
+        arrays = {
+            'train_index': train_index,
+            'test_index': test_index,
+            'y_train': y[train_index],
+            'y_test': y[test_index],
+            'y_pred_train': model.predict(X_train),
+            'y_pred_test': model.predict(X_test),
+        }
+        if hasattr(model, 'predict_proba'):
+            arrays['y_prob_train'] = model.predict_proba(X_train)[:, 1]
+            arrays['y_prob_test'] = model.predict_proba(X_test)[:, 1]
+
+    meta = {
+        'inputs': {**inputs, 'data_path': str(data_path)},
+        'n_rows': len(df),
+        'fit_seconds': time.perf_counter() - start,
+        'created': time.time(),
+    }
+    with stage('save_model'):
+        artifact = store.save(key, scaler, model, feature_columns, arrays, meta,
+                              replace=force)
+    artifact.fitted = True
+    return artifact
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List or clear the fitted-model store.')
+    parser.add_argument('--clear', action='store_true', help='Delete every entry')
+    args = parser.parse_args()
+
+    store = ModelStore()
+    if args.clear:
+        store.clear()
+        print(f"Cleared {store.root}")
+        return
+
+    entries = store.entries()
+    if not entries:
+        print(f"No fitted models in {store.root}")
+        return
+    for entry in entries:
+        inputs = entry['inputs']
+        created = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['created']))
+        print(f"{entry['path'].name}  {created}  {inputs['estimator'].rsplit('.', 1)[-1]:20} "
+              f"{entry['n_rows']:>10,} rows  fit {entry['fit_seconds']:6.2f}s  "
+              f"{entry['bytes'] / 1e6:7.1f} MB  {Path(inputs['data_path']).name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,367 @@
+"""
+Headless Notebook Runner for Machine Learning For Dentists
+==========================================================
+
+Executes the chapter notebooks without opening Jupyter, several at a time,
+and reports how long every cell took and how much memory the kernel used.
+
+Each notebook runs top to bottom in its own kernel, with its chapter
+folder as the working directory, as in Jupyter. By default that folder is
+a scratch mirror of the project (inputs linked, an empty figures/ folder),
+so figures the notebook saves do not overwrite the committed ones;
+--in-place runs in the real chapter folder. Per code cell the runner
+records:
+
+    seconds       wall time of the cell
+    peak_rss_mb   peak resident memory of the kernel during the cell
+                  (Linux: VmHWM, reset before every cell; None elsewhere)
+
+Output cache: every code cell gets a key chained from the previous cell's
+key and its own source; the first key covers the chapter's data files and
+the utils package. When every key of a notebook matches the last
+successful run, the notebook is skipped and its cached outputs and
+timings are reported. A kernel's state cannot be restored, so a notebook
+with any changed cell runs again from the top.
+
+The first failing cell stops the run (unless --keep-going): notebooks not
+yet started are cancelled and the error is printed.
+
+Usage:
+    python -m utils.notebook_runner                      # All chapter notebooks
+    python -m utils.notebook_runner --chapters 03 04     # Some chapters
+    python -m utils.notebook_runner --report timings.json
+    python -m utils.notebook_runner --force              # Ignore the cache
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from .figure_cache import file_digest
+from .profiling import peak_rss_mb, reset_peak_rss
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CHAPTERS_DIR = PROJECT_ROOT / 'chapters'
+CACHE_DIR = PROJECT_ROOT / '.notebook_cache'
+
+# Color codes in kernel tracebacks
+_ANSI_ESCAPES = re.compile(r'\x1b\[[0-9;]*m')
+
+# =============================================================================
+# DISCOVERY AND CACHE KEYS
+# =============================================================================
+
+
+def discover_notebooks(chapters=None):
+    """
+    Find the chapter notebooks.
+
+    Parameters
+    ----------
+    chapters : list of str, optional
+        Chapter folder names or number prefixes ('04'); None means all.
+
+    Returns
+    -------
+    list of Path
+    """
+    notebooks = []
+    for chapter_dir in sorted(p for p in CHAPTERS_DIR.iterdir() if p.is_dir()):
+        if chapters and not any(chapter_dir.name.startswith(c) for c in chapters):
+            continue
+        notebooks.extend(sorted(chapter_dir.glob('*.ipynb')))
+    return notebooks
+
+
+def _upstream_digest(notebook_path):
+    """Hash of what a notebook reads besides its cells: data files and utils."""
+    inputs = {}
+    data_dir = notebook_path.parent / 'data'
+    if data_dir.is_dir():
+        for path in sorted(data_dir.iterdir()):
+            if path.is_file():
+                inputs[f'data/{path.name}'] = file_digest(path)
+    for path in sorted((PROJECT_ROOT / 'utils').glob('*.py')):
+        inputs[f'utils/{path.name}'] = file_digest(path)
+    inputs['brand_palette.json'] = file_digest(PROJECT_ROOT / 'brand_palette.json')
+    inputs['python'] = sys.version.split()[0]
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def cell_keys(nb, notebook_path):
+    """
+    Chained cache key of every code cell.
+
+    A key changes when its cell, any earlier code cell or the notebook's
+    upstream inputs change.
+
+    Returns
+    -------
+    dict
+        Cell index → hex key (code cells only).
+    """
+    key = _upstream_digest(notebook_path)
+    keys = {}
+    for index, cell in enumerate(nb.cells):
+        if cell.cell_type != 'code':
+            continue
+        key = hashlib.sha256((key + cell.source).encode('utf-8')).hexdigest()
+        keys[index] = key
+    return keys
+
+
+def _cache_path(notebook_path):
+    relative = notebook_path.resolve().relative_to(PROJECT_ROOT)
+    return CACHE_DIR / ('__'.join(relative.with_suffix('').parts) + '.json')
+
+
+def _load_cache(notebook_path):
+    path = _cache_path(notebook_path)
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _save_cache(notebook_path, entry):
+    path = _cache_path(notebook_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(entry, f)
+
+
+def _scratch_chapter(notebook_path, scratch_root):
+    """
+    Mirror the project under scratch_root for one notebook's chapter.
+
+    Everything is symlinked except the chapter's figures/ folder, which is
+    created empty. Returns the mirrored chapter folder.
+    """
+    chapter_dir = notebook_path.parent
+    for entry in PROJECT_ROOT.iterdir():
+        if entry.name not in ('chapters', '.git'):
+            (scratch_root / entry.name).symlink_to(entry)
+
+    scratch_chapter = scratch_root / chapter_dir.relative_to(PROJECT_ROOT)
+    scratch_chapter.mkdir(parents=True)
+    for entry in chapter_dir.iterdir():
+        if entry.name != 'figures':
+            (scratch_chapter / entry.name).symlink_to(entry)
+    (scratch_chapter / 'figures').mkdir()
+    return scratch_chapter
+
+
+# =============================================================================
+# EXECUTION
+# =============================================================================
+
+
+def run_notebook(notebook_path, timeout=600, kernel_name='python3', force=False,
+                 in_place=False):
+    """
+    Execute one notebook cell by cell in a fresh kernel.
+
+    Parameters
+    ----------
+    notebook_path : str or Path
+        Notebook to run; its folder is the kernel's working directory.
+    timeout : int
+        Seconds a single cell may run.
+    kernel_name : str
+        Jupyter kernel to start.
+    force : bool
+        Run even if the cache says nothing changed.
+    in_place : bool
+        Run in the chapter folder itself instead of a scratch mirror.
+
+    Returns
+    -------
+    dict
+        'notebook', 'status' ('ok' | 'cached' | 'failed'), 'seconds',
+        'cells' (index, seconds, peak_rss_mb per code cell) and, on
+        failure, 'error' ({'cell': index, 'message': str}).
+    """
+    import nbformat
+    from nbclient import NotebookClient
+    from nbclient.exceptions import CellExecutionError
+
+    notebook_path = Path(notebook_path).resolve()
+    nb = nbformat.read(notebook_path, as_version=4)
+    keys = cell_keys(nb, notebook_path)
+    name = str(notebook_path.relative_to(PROJECT_ROOT))
+
+    cached = None if force else _load_cache(notebook_path)
+    if cached is not None and cached['keys'] == {str(i): k for i, k in keys.items()}:
+        return {'notebook': name, 'status': 'cached', 'seconds': cached['seconds'],
+                'cells': cached['cells']}
+
+    with tempfile.TemporaryDirectory(prefix='notebook_') as scratch:
+        if in_place:
+            working_dir = notebook_path.parent
+        else:
+            working_dir = _scratch_chapter(notebook_path, Path(scratch))
+
+        client = NotebookClient(nb, timeout=timeout, kernel_name=kernel_name,
+                                resources={'metadata': {'path': str(working_dir)}})
+        cells = []
+        error = None
+        start = time.perf_counter()
+        with client.setup_kernel():
+            pid = client.km.provisioner.pid
+            for index in keys:
+                cell = nb.cells[index]
+                reset_peak_rss(pid)
+                cell_start = time.perf_counter()
+                try:
+                    client.execute_cell(cell, index)
+                except Exception as exc:  # CellExecutionError, timeouts, dead kernel
+                    message = str(exc) if isinstance(exc, CellExecutionError) else repr(exc)
+                    error = {'cell': index, 'message': _ANSI_ESCAPES.sub('', message)}
+                cells.append({
+                    'index': index,
+                    'seconds': time.perf_counter() - cell_start,
+                    'peak_rss_mb': peak_rss_mb(pid),
+                    'outputs': cell.get('outputs', []),
+                })
+                if error:
+                    break
+        seconds = time.perf_counter() - start
+
+    if error is None:
+        _save_cache(notebook_path, {'keys': {str(i): k for i, k in keys.items()},
+                                    'seconds': seconds, 'cells': cells})
+
+    result = {'notebook': name, 'status': 'failed' if error else 'ok',
+              'seconds': seconds, 'cells': cells}
+    if error:
+        result['error'] = error
+    return result
+
+
+def run_notebooks(notebooks, jobs=None, timeout=600, kernel_name='python3',
+                  force=False, in_place=False, fail_fast=True):
+    """
+    Execute notebooks in parallel, one kernel per notebook.
+
+    Parameters
+    ----------
+    notebooks : list of Path
+        Output of discover_notebooks.
+    jobs : int or None
+        Notebooks to run at once (None uses every core).
+    timeout, kernel_name, force, in_place
+        Passed to run_notebook.
+    fail_fast : bool
+        Cancel notebooks that have not started after the first failure.
+
+    Returns
+    -------
+    list of dict
+        run_notebook results (cancelled notebooks get status 'cancelled'),
+        in the order of ``notebooks``.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    results = {}
+    pending = list(notebooks)
+    failed = False
+    with ProcessPoolExecutor(max_workers=min(jobs, len(notebooks))) as pool:
+        # Submit as workers free up, so a failure can stop the rest
+        running = {}
+        while pending or running:
+            while pending and len(running) < jobs and not failed:
+                path = pending.pop(0)
+                running[pool.submit(run_notebook, path, timeout, kernel_name,
+                                    force, in_place)] = path
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results[running.pop(future)] = result
+                _print_result(result)
+                failed = failed or (result['status'] == 'failed' and fail_fast)
+
+    return [results.get(path, {'notebook': str(path.resolve().relative_to(PROJECT_ROOT)),
+                               'status': 'cancelled', 'seconds': 0.0, 'cells': []})
+            for path in notebooks]
+
+
+def _print_result(result):
+    mark = {'ok': '✓', 'cached': '=', 'failed': '✗'}[result['status']]
+    peaks = [c['peak_rss_mb'] for c in result['cells'] if c['peak_rss_mb'] is not None]
+    memory = f", peak {max(peaks):.0f} MB" if peaks else ''
+    note = ' (unchanged, cached)' if result['status'] == 'cached' else ''
+    print(f"  {mark} {result['notebook']}  {result['seconds']:.2f}s{memory}{note}")
+
+    slowest = sorted(result['cells'], key=lambda c: -c['seconds'])[:3]
+    for cell in slowest:
+        rss = f"{cell['peak_rss_mb']:7.0f} MB" if cell['peak_rss_mb'] is not None else ''
+        print(f"      cell {cell['index']:3d}  {cell['seconds']:7.2f}s {rss}")
+
+    if result['status'] == 'failed':
+        lines = result['error']['message'].strip().splitlines()
+        print(f"    Error in cell {result['error']['cell']}:")
+        print('    ' + '\n    '.join(lines[-15:]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Execute the chapter notebooks headlessly.')
+    parser.add_argument('notebooks', nargs='*', type=Path,
+                        help='Notebooks to run (default: every chapter notebook)')
+    parser.add_argument('--chapters', nargs='+', metavar='CHAPTER',
+                        help='Chapter folders or number prefixes (default: all)')
+    parser.add_argument('--jobs', type=int, default=None,
+                        help='Notebooks to run at once (default: number of cores)')
+    parser.add_argument('--timeout', type=int, default=600,
+                        help='Seconds a single cell may run (default: 600)')
+    parser.add_argument('--kernel', default='python3',
+                        help='Jupyter kernel name (default: python3)')
+    parser.add_argument('--force', action='store_true',
+                        help='Run notebooks even if nothing changed since the last run')
+    parser.add_argument('--in-place', action='store_true',
+                        help='Run in the chapter folders (figures are overwritten)')
+    parser.add_argument('--keep-going', action='store_true',
+                        help='Run every notebook even after a failure')
+    parser.add_argument('--report', type=Path,
+                        help='Write per-cell timings and memory to this JSON file')
+    args = parser.parse_args()
+
+    notebooks = args.notebooks or discover_notebooks(args.chapters)
+    if not notebooks:
+        print("No notebooks found.")
+        return
+
+    print(f"Running {len(notebooks)} notebook(s)...")
+    start = time.perf_counter()
+    results = run_notebooks(notebooks, jobs=args.jobs, timeout=args.timeout,
+                            kernel_name=args.kernel, force=args.force,
+                            in_place=args.in_place, fail_fast=not args.keep_going)
+    elapsed = time.perf_counter() - start
+
+    if args.report:
+        # Timings and memory only; cell outputs stay in the cache
+        report = []
+        for result in results:
+            cells = [{k: v for k, v in cell.items() if k != 'outputs'}
+                     for cell in result['cells']]
+            report.append({**result, 'cells': cells})
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    counts = {status: sum(r['status'] == status for r in results)
+              for status in ('ok', 'cached', 'failed', 'cancelled')}
+    print(f"\n{counts['ok']} ran, {counts['cached']} cached, {counts['failed']} failed, "
+          f"{counts['cancelled']} cancelled in {elapsed:.2f}s")
+    if counts['failed'] or counts['cancelled']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Periospot Brand Palette for Machine Learning For Dentists
+=========================================================
+
+The brand colors from ``brand_palette.json``, without importing matplotlib.
+
+Scripts and worker processes that only need colors (or the project root)
+should import them from here; ``utils.periospot_style`` re-exports the same
+names for plotting code.
+
+Usage:
+    from utils.palette import PERIOSPOT_COLORS, get_color
+
+    color = PERIOSPOT_COLORS['periospot_blue']
+
+    # Pick up edits to brand_palette.json in a long-running process
+    from utils.palette import refresh_palette
+    refresh_palette()
+"""
+
+from pathlib import Path
+import json
+
+# =============================================================================
+# FIND PROJECT ROOT AND LOAD CONFIG
+# =============================================================================
+
+def _find_project_root():
+    """Find the project root directory."""
+    possible_roots = [
+        Path.cwd(),
+        Path.cwd().parent,
+        Path(__file__).parent.parent,
+    ]
+
+    for root in possible_roots:
+        if (root / 'brand_palette.json').exists():
+            return root
+        if (root / 'AGENT_GUIDE.md').exists():
+            return root
+
+    return Path(__file__).parent.parent
+
+
+PROJECT_ROOT = _find_project_root()
+FONTS_DIR = PROJECT_ROOT / 'assets' / 'fonts'
+
+# =============================================================================
+# LOAD BRAND PALETTE
+# =============================================================================
+
+PALETTE_FILE = PROJECT_ROOT / 'brand_palette.json'
+
+
+def _load_brand_palette():
+    """Load the brand palette from JSON."""
+    if PALETTE_FILE.exists():
+        with open(PALETTE_FILE, 'r') as f:
+            return json.load(f)
+    else:
+        # Fallback defaults
+        return {
+            'colors': {
+                'periospot_blue': '#15365a',
+                'mystic_blue': '#003049',
+                'periospot_red': '#6c1410',
+                'crimson_blaze': '#a92a2a',
+                'vanilla_cream': '#f7f0da',
+                'black': '#000000',
+                'white': '#ffffff',
+            }
+        }
+
+
+def _palette_version():
+    """(mtime, size) of brand_palette.json; None if the file is missing."""
+    try:
+        stat = PALETTE_FILE.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _sequential_palette(colors):
+    """Color palette for sequential data (plots with multiple series)."""
+    return [
+        colors.get('periospot_blue', '#15365a'),
+        colors.get('crimson_blaze', '#a92a2a'),
+        colors.get('periospot_bright_blue', '#1040dd'),
+        colors.get('periospot_yellow', '#ffc430'),
+        colors.get('mystic_blue', '#003049'),
+        colors.get('periospot_light_blue', '#0297ed'),
+    ]
+
+
+_LOADED_VERSION = _palette_version()
+BRAND_PALETTE = _load_brand_palette()
+
+# =============================================================================
+# PERIOSPOT BRAND COLORS
+# =============================================================================
+
+PERIOSPOT_COLORS = BRAND_PALETTE.get('colors', {})
+
+# Color palette for sequential data (plots with multiple series)
+PERIOSPOT_PALETTE = _sequential_palette(PERIOSPOT_COLORS)
+
+
+def refresh_palette():
+    """
+    Reload brand_palette.json if it changed on disk since it was loaded.
+
+    BRAND_PALETTE, PERIOSPOT_COLORS and PERIOSPOT_PALETTE are updated in
+    place, so modules that imported them see the new values.
+
+    Returns
+    -------
+    tuple or None
+        Version of the loaded palette ((mtime, size) of the file). Callers
+        that cache values derived from the palette compare it with the
+        version they were built from.
+    """
+    global _LOADED_VERSION
+
+    version = _palette_version()
+    if version != _LOADED_VERSION:
+        palette = _load_brand_palette()
+        PERIOSPOT_COLORS.clear()
+        PERIOSPOT_COLORS.update(palette.get('colors', {}))
+        palette['colors'] = PERIOSPOT_COLORS
+        BRAND_PALETTE.clear()
+        BRAND_PALETTE.update(palette)
+        PERIOSPOT_PALETTE[:] = _sequential_palette(PERIOSPOT_COLORS)
+        _LOADED_VERSION = version
+    return _LOADED_VERSION
+
+
+def get_color(name):
+    """
+    Get a Periospot color by name.
+
+    Parameters
+    ----------
+    name : str
+        Color name (e.g., 'periospot_blue', 'crimson_blaze')
+
+    Returns
+    -------
+    str
+        Hex color code.
+    """
+    return PERIOSPOT_COLORS.get(name, PERIOSPOT_COLORS.get('periospot_blue', '#15365a'))
@@ -17,150 +17,158 @@ Usage:
     # Use typography helpers
     from utils.periospot_style import get_font_props
     title_font = get_font_props('h1')
+
+    # Or style only the figures drawn inside a block
+    from utils.periospot_style import periospot_style
+    with periospot_style():
+        fig, ax = create_styled_figure()
 """
 
+import matplotlib
 import matplotlib.pyplot as plt
+import numpy as np
 from matplotlib import font_manager
+from matplotlib.colors import LinearSegmentedColormap, LogNorm, to_rgb
 from matplotlib.font_manager import FontProperties
-from pathlib import Path
-import json
+from contextlib import contextmanager
+import threading
 import warnings
 
+# Palette and paths live in a matplotlib-free module; re-exported here
+from .palette import (
+    BRAND_PALETTE,
+    FONTS_DIR,
+    PERIOSPOT_COLORS,
+    PERIOSPOT_PALETTE,
+    PROJECT_ROOT,
+    _find_project_root,
+    get_color,
+    refresh_palette,
+)
+
 # =============================================================================
-# FIND PROJECT ROOT AND LOAD CONFIG
+# FONT MANAGEMENT
 # =============================================================================
 
-def _find_project_root():
-    """Find the project root directory."""
-    possible_roots = [
-        Path.cwd(),
-        Path.cwd().parent,
-        Path(__file__).parent.parent,
-    ]
-    
-    for root in possible_roots:
-        if (root / 'brand_palette.json').exists():
-            return root
-        if (root / 'AGENT_GUIDE.md').exists():
-            return root
-    
-    return Path(__file__).parent.parent
+# Store registered fonts
+_REGISTERED_FONTS = {}
+_FONTS_VERSION = None     # Palette version the fonts were registered for
+_FONT_LOCK = threading.Lock()
 
+# get_font_props / get_style_color results per (kind, style). Emptied when
+# brand_palette.json changes or more fonts get registered.
+_STYLE_CACHE = {}
+_STYLE_CACHE_VERSION = None
 
-PROJECT_ROOT = _find_project_root()
-FONTS_DIR = PROJECT_ROOT / 'assets' / 'fonts'
 
-# =============================================================================
-# LOAD BRAND PALETTE
-# =============================================================================
+def _register_bariol_fonts():
+    """
+    Register all Bariol font variants with matplotlib.
 
-def _load_brand_palette():
-    """Load the brand palette from JSON."""
-    palette_file = PROJECT_ROOT / 'brand_palette.json'
-    
-    if palette_file.exists():
-        with open(palette_file, 'r') as f:
-            return json.load(f)
-    else:
-        # Fallback defaults
-        return {
-            'colors': {
-                'periospot_blue': '#15365a',
-                'mystic_blue': '#003049',
-                'periospot_red': '#6c1410',
-                'crimson_blaze': '#a92a2a',
-                'vanilla_cream': '#f7f0da',
-                'black': '#000000',
-                'white': '#ffffff',
-            }
-        }
-
-
-BRAND_PALETTE = _load_brand_palette()
+    Safe to call repeatedly: a font file is added to matplotlib's font
+    manager only once per process.
+    """
+    global _FONTS_VERSION
 
-# =============================================================================
-# PERIOSPOT BRAND COLORS
-# =============================================================================
+    font_config = BRAND_PALETTE.get('fonts', {})
+    font_files = font_config.get('files', {})
 
-PERIOSPOT_COLORS = BRAND_PALETTE.get('colors', {})
+    # Nothing to do if every font of this palette version is registered
+    version = refresh_palette()
+    if _FONTS_VERSION == version and len(_REGISTERED_FONTS) == len(font_files):
+        return len(_REGISTERED_FONTS) > 0
+
+    with _FONT_LOCK:
+        known_files = None
+        for weight_name, filename in font_files.items():
+            font_path = FONTS_DIR / filename
+            registered = _REGISTERED_FONTS.get(weight_name)
+            if registered is not None and registered['path'] == font_path:
+                continue
+            if font_path.exists():
+                try:
+                    if known_files is None:
+                        known_files = {entry.fname for entry in font_manager.fontManager.ttflist}
+                    if str(font_path) not in known_files:
+                        font_manager.fontManager.addfont(str(font_path))
+                        known_files.add(str(font_path))
+                    prop = FontProperties(fname=str(font_path))
+                    font_name = prop.get_name()
+                    _REGISTERED_FONTS[weight_name] = {
+                        'path': font_path,
+                        'name': font_name,
+                        'properties': prop,
+                    }
+                except Exception as e:
+                    warnings.warn(f"Could not load font {filename}: {e}")
+        _FONTS_VERSION = version
 
-# Color palette for sequential data (plots with multiple series)
-PERIOSPOT_PALETTE = [
-    PERIOSPOT_COLORS.get('periospot_blue', '#15365a'),
-    PERIOSPOT_COLORS.get('crimson_blaze', '#a92a2a'),
-    PERIOSPOT_COLORS.get('periospot_bright_blue', '#1040dd'),
-    PERIOSPOT_COLORS.get('periospot_yellow', '#ffc430'),
-    PERIOSPOT_COLORS.get('mystic_blue', '#003049'),
-    PERIOSPOT_COLORS.get('periospot_light_blue', '#0297ed'),
-]
+    return len(_REGISTERED_FONTS) > 0
 
-# =============================================================================
-# FONT MANAGEMENT
-# =============================================================================
 
-# Store registered fonts
-_REGISTERED_FONTS = {}
+def _style_cache():
+    """The per-style cache, emptied if the palette or fonts changed."""
+    global _STYLE_CACHE_VERSION
 
-def _register_bariol_fonts():
-    """Register all Bariol font variants with matplotlib."""
-    global _REGISTERED_FONTS
-    
-    font_config = BRAND_PALETTE.get('fonts', {})
-    font_files = font_config.get('files', {})
-    
-    for weight_name, filename in font_files.items():
-        font_path = FONTS_DIR / filename
-        if font_path.exists():
-            try:
-                font_manager.fontManager.addfont(str(font_path))
-                prop = FontProperties(fname=str(font_path))
-                font_name = prop.get_name()
-                _REGISTERED_FONTS[weight_name] = {
-                    'path': font_path,
-                    'name': font_name,
-                    'properties': prop,
-                }
-            except Exception as e:
-                warnings.warn(f"Could not load font {filename}: {e}")
-    
-    return len(_REGISTERED_FONTS) > 0
+    version = (refresh_palette(), tuple(_REGISTERED_FONTS))
+    if version != _STYLE_CACHE_VERSION:
+        _STYLE_CACHE.clear()
+        _STYLE_CACHE_VERSION = version
+    return _STYLE_CACHE
+
+
+def _style_config(style):
+    """Typography config of a style (matplotlib styles first)."""
+    typography = BRAND_PALETTE.get('typography', {})
+    matplotlib_typo = BRAND_PALETTE.get('matplotlib', {})
+
+    if style in matplotlib_typo:
+        return matplotlib_typo[style]
+    elif style in typography:
+        return typography[style]
+    return None
 
 
 def get_font_props(style='body'):
     """
     Get FontProperties for a specific typography style.
-    
+
+    The result is cached per style and shared between calls; use
+    ``.copy()`` before modifying it.
+
     Parameters
     ----------
     style : str
         One of: 'h1', 'h2', 'h3', 'body', 'caption', 'label',
         'chart_title', 'axis_title', 'tick_labels', 'legend', 'annotation'
-    
+
     Returns
     -------
     FontProperties
         Matplotlib FontProperties object configured for the style.
-    
+
     Example
     -------
     >>> ax.set_title('My Title', fontproperties=get_font_props('h1'))
     """
-    # Get typography config
-    typography = BRAND_PALETTE.get('typography', {})
-    matplotlib_typo = BRAND_PALETTE.get('matplotlib', {})
-    
-    # Check matplotlib styles first, then general typography
-    if style in matplotlib_typo:
-        config = matplotlib_typo[style]
-    elif style in typography:
-        config = typography[style]
-    else:
-        config = typography.get('body', {'font_weight': 'regular', 'size': 11})
-    
+    cache = _style_cache()
+    props = cache.get(('font', style))
+    if props is None:
+        props = cache[('font', style)] = _build_font_props(style)
+    return props
+
+
+def _build_font_props(style):
+    """Build the FontProperties of a style (uncached)."""
+    config = _style_config(style)
+    if config is None:
+        config = BRAND_PALETTE.get('typography', {}).get(
+            'body', {'font_weight': 'regular', 'size': 11})
+
     # Map weight to font file
     weight = config.get('font_weight', config.get('weight', 'regular'))
     size = config.get('size', 11)
-    
+
     # Get the font path for this weight
     if weight in _REGISTERED_FONTS:
         return FontProperties(
@@ -180,140 +188,187 @@ def get_font_props(style='body'):
 
 def get_style_color(style='body'):
     """
-    Get the color for a typography style.
-    
+    Get the color for a typography style (cached per style).
+
     Parameters
     ----------
     style : str
         Typography style name.
-    
+
     Returns
     -------
     str
         Hex color code.
     """
-    typography = BRAND_PALETTE.get('typography', {})
-    matplotlib_typo = BRAND_PALETTE.get('matplotlib', {})
-    
-    if style in matplotlib_typo:
-        color_name = matplotlib_typo[style].get('color', 'black')
-    elif style in typography:
-        color_name = typography[style].get('color', 'black')
-    else:
-        color_name = 'black'
-    
-    return PERIOSPOT_COLORS.get(color_name, color_name)
+    cache = _style_cache()
+    color = cache.get(('color', style))
+    if color is None:
+        config = _style_config(style)
+        color_name = config.get('color', 'black') if config is not None else 'black'
+        color = cache[('color', style)] = PERIOSPOT_COLORS.get(color_name, color_name)
+    return color
 
 
 # =============================================================================
 # MAIN SETUP FUNCTION
 # =============================================================================
 
-def setup_periospot_style():
-    """
-    Apply Periospot visual style to matplotlib.
-    
-    This function:
-    1. Registers all Bariol font variants
-    2. Sets the color palette to Periospot brand colors
-    3. Configures chart aesthetics for clean, professional output
-    
-    Returns
-    -------
-    dict
-        Configuration info including loaded fonts and colors.
-    
-    Example
-    -------
-    >>> from utils.periospot_style import setup_periospot_style
-    >>> config = setup_periospot_style()
-    >>> print(f"Loaded {config['fonts_loaded']} font variants")
-    """
-    
-    # Register fonts
-    fonts_loaded = _register_bariol_fonts()
-    
-    if fonts_loaded:
-        # Get the primary font name (from regular weight)
-        if 'regular' in _REGISTERED_FONTS:
-            primary_font = _REGISTERED_FONTS['regular']['name']
-        else:
-            primary_font = list(_REGISTERED_FONTS.values())[0]['name']
-        print(f"✓ Loaded Bariol font family ({len(_REGISTERED_FONTS)} variants)")
-    else:
-        primary_font = 'DejaVu Sans'
-        print(f"⚠ Bariol fonts not found. Using: {primary_font}")
-        print(f"  (Add Bariol OTF files to assets/fonts/ for brand fonts)")
-    
+def _primary_font():
+    """Register the Bariol fonts; return the family name to use."""
+    if not _register_bariol_fonts():
+        return 'DejaVu Sans'
+    if 'regular' in _REGISTERED_FONTS:
+        return _REGISTERED_FONTS['regular']['name']
+    return list(_REGISTERED_FONTS.values())[0]['name']
+
+
+def _compile_rc_params(primary_font):
+    """Translate brand_palette.json into matplotlib rcParams."""
     # Get matplotlib config
     mpl_config = BRAND_PALETTE.get('matplotlib', {})
-    
-    # ==========================================================================
-    # MATPLOTLIB CONFIGURATION
-    # ==========================================================================
-    
+    rc = {}
+
     # Font settings
-    plt.rcParams['font.family'] = primary_font
-    plt.rcParams['font.size'] = 11
-    
+    rc['font.family'] = primary_font
+    rc['font.size'] = 11
+
     # Title (chart_title style)
     chart_title = mpl_config.get('chart_title', {})
-    plt.rcParams['axes.titlesize'] = chart_title.get('size', 16)
-    plt.rcParams['axes.titleweight'] = chart_title.get('weight', 'bold')
-    plt.rcParams['axes.titlecolor'] = PERIOSPOT_COLORS.get(
+    rc['axes.titlesize'] = chart_title.get('size', 16)
+    rc['axes.titleweight'] = chart_title.get('weight', 'bold')
+    rc['axes.titlecolor'] = PERIOSPOT_COLORS.get(
         chart_title.get('color', 'periospot_blue'), '#15365a'
     )
-    
+
     # Axis labels (axis_title style)
     axis_title = mpl_config.get('axis_title', {})
-    plt.rcParams['axes.labelsize'] = axis_title.get('size', 12)
-    plt.rcParams['axes.labelcolor'] = PERIOSPOT_COLORS.get(
+    rc['axes.labelsize'] = axis_title.get('size', 12)
+    rc['axes.labelcolor'] = PERIOSPOT_COLORS.get(
         axis_title.get('color', 'mystic_blue'), '#003049'
     )
-    
+
     # Tick labels (tick_labels style)
     tick_labels = mpl_config.get('tick_labels', {})
-    plt.rcParams['xtick.labelsize'] = tick_labels.get('size', 10)
-    plt.rcParams['ytick.labelsize'] = tick_labels.get('size', 10)
-    plt.rcParams['xtick.color'] = PERIOSPOT_COLORS.get(
+    rc['xtick.labelsize'] = tick_labels.get('size', 10)
+    rc['ytick.labelsize'] = tick_labels.get('size', 10)
+    rc['xtick.color'] = PERIOSPOT_COLORS.get(
         tick_labels.get('color', 'mystic_blue'), '#003049'
     )
-    plt.rcParams['ytick.color'] = PERIOSPOT_COLORS.get(
+    rc['ytick.color'] = PERIOSPOT_COLORS.get(
         tick_labels.get('color', 'mystic_blue'), '#003049'
     )
-    
+
     # Legend
     legend_config = mpl_config.get('legend', {})
-    plt.rcParams['legend.fontsize'] = legend_config.get('size', 10)
-    
+    rc['legend.fontsize'] = legend_config.get('size', 10)
+
     # Axes styling
-    plt.rcParams['axes.edgecolor'] = PERIOSPOT_COLORS.get('mystic_blue', '#003049')
-    plt.rcParams['axes.linewidth'] = 1.2
-    plt.rcParams['axes.spines.top'] = False
-    plt.rcParams['axes.spines.right'] = False
-    
+    rc['axes.edgecolor'] = PERIOSPOT_COLORS.get('mystic_blue', '#003049')
+    rc['axes.linewidth'] = 1.2
+    rc['axes.spines.top'] = False
+    rc['axes.spines.right'] = False
+
     # Grid
-    plt.rcParams['axes.grid'] = True
-    plt.rcParams['grid.alpha'] = 0.3
-    plt.rcParams['grid.color'] = PERIOSPOT_COLORS.get('mystic_blue', '#003049')
-    plt.rcParams['grid.linestyle'] = '--'
-    
+    rc['axes.grid'] = True
+    rc['grid.alpha'] = 0.3
+    rc['grid.color'] = PERIOSPOT_COLORS.get('mystic_blue', '#003049')
+    rc['grid.linestyle'] = '--'
+
     # Figure
-    plt.rcParams['figure.facecolor'] = 'white'
-    plt.rcParams['axes.facecolor'] = 'white'
-    plt.rcParams['figure.figsize'] = (10, 6)
-    plt.rcParams['figure.dpi'] = 100
-    plt.rcParams['savefig.dpi'] = 150
-    plt.rcParams['savefig.bbox'] = 'tight'
-    
+    rc['figure.facecolor'] = 'white'
+    rc['axes.facecolor'] = 'white'
+    rc['figure.figsize'] = (10, 6)
+    rc['figure.dpi'] = 100
+    rc['savefig.dpi'] = 150
+    rc['savefig.bbox'] = 'tight'
+
     # Legend styling
-    plt.rcParams['legend.frameon'] = True
-    plt.rcParams['legend.framealpha'] = 0.9
-    plt.rcParams['legend.edgecolor'] = PERIOSPOT_COLORS.get('mystic_blue', '#003049')
-    
+    rc['legend.frameon'] = True
+    rc['legend.framealpha'] = 0.9
+    rc['legend.edgecolor'] = PERIOSPOT_COLORS.get('mystic_blue', '#003049')
+
     # Color cycle for plots
-    plt.rcParams['axes.prop_cycle'] = plt.cycler(color=PERIOSPOT_PALETTE)
+    rc['axes.prop_cycle'] = plt.cycler(color=PERIOSPOT_PALETTE)
+
+    # Validate once here instead of on every application
+    return dict(matplotlib.RcParams(rc))
+
+
+# (rcParams, identity key) per (palette version, primary font)
+_RC_CACHE = {}
+
+
+def _style_key(rc):
+    """Hashable identity of a set of rcParams."""
+    return repr(sorted(rc.items()))
+
+
+def _compiled_style():
+    """Cached (rcParams, key) of the brand style; do not modify."""
+    version = (refresh_palette(), _primary_font())
+    compiled = _RC_CACHE.get(version)
+    if compiled is None:
+        _RC_CACHE.clear()  # Older palette versions are not needed again
+        rc = _compile_rc_params(version[1])
+        compiled = _RC_CACHE[version] = (rc, _style_key(rc))
+    return compiled
+
+
+def periospot_rc_params():
+    """
+    Get the Periospot style as a dict of matplotlib rcParams.
+
+    brand_palette.json is compiled and validated once; the result is reused
+    until the file changes.
+
+    Returns
+    -------
+    dict
+        rcParams name → value, ready for ``plt.rcParams.update`` or
+        ``matplotlib.rc_context``.
+
+    Example
+    -------
+    >>> with matplotlib.rc_context(periospot_rc_params()):
+    ...     fig, ax = plt.subplots()
+    """
+    return dict(_compiled_style()[0])
+
+
+def setup_periospot_style():
+    """
+    Apply Periospot visual style to matplotlib.
+    
+    This function:
+    1. Registers all Bariol font variants
+    2. Sets the color palette to Periospot brand colors
+    3. Configures chart aesthetics for clean, professional output
+
+    The style stays active for the whole session. To style only some
+    figures, use the ``periospot_style()`` context manager instead.
+    
+    Returns
+    -------
+    dict
+        Configuration info including loaded fonts and colors.
     
+    Example
+    -------
+    >>> from utils.periospot_style import setup_periospot_style
+    >>> config = setup_periospot_style()
+    >>> print(f"Loaded {config['fonts_loaded']} font variants")
+    """
+    rc = periospot_rc_params()
+    primary_font = rc['font.family'][0]
+
+    if _REGISTERED_FONTS:
+        print(f"✓ Loaded Bariol font family ({len(_REGISTERED_FONTS)} variants)")
+    else:
+        print(f"⚠ Bariol fonts not found. Using: {primary_font}")
+        print(f"  (Add Bariol OTF files to assets/fonts/ for brand fonts)")
+
+    plt.rcParams.update(rc)
+
     return {
         'fonts_loaded': len(_REGISTERED_FONTS),
         'font_variants': list(_REGISTERED_FONTS.keys()),
@@ -324,25 +379,79 @@ def setup_periospot_style():
 
 
 # =============================================================================
-# CONVENIENCE FUNCTIONS
+# SCOPED STYLE
 # =============================================================================
 
-def get_color(name):
+# matplotlib's rcParams are global to the process. Threads that enter
+# periospot_style() with the same parameters share one application of them;
+# a thread asking for different parameters waits until the others leave.
+_STYLE_CONDITION = threading.Condition()
+_ACTIVE_STYLE = None      # (key, rc_context) of the applied style
+_ACTIVE_THREADS = {}      # thread id → nesting depth
+
+
+@contextmanager
+def periospot_style(rc=None):
     """
-    Get a Periospot color by name.
-    
+    Apply the Periospot style for the duration of a ``with`` block.
+
+    All rcParams are set in one step on entry and the previous values are
+    restored on exit. Several threads may render inside the block at once
+    as long as they use the same parameters; a thread requesting different
+    ones blocks until the current style is released.
+
     Parameters
     ----------
-    name : str
-        Color name (e.g., 'periospot_blue', 'crimson_blaze')
-    
-    Returns
+    rc : dict, optional
+        Extra rcParams applied on top of the brand style.
+
+    Yields
+    ------
+    dict
+        The rcParams in effect.
+
+    Example
     -------
-    str
-        Hex color code.
+    >>> with periospot_style():
+    ...     fig, ax = create_styled_figure()
+    ...     ax.plot(x, y)
+    ...     fig.savefig('chart.png')
     """
-    return PERIOSPOT_COLORS.get(name, PERIOSPOT_COLORS.get('periospot_blue', '#15365a'))
+    global _ACTIVE_STYLE
+
+    params, key = _compiled_style()
+    if rc:
+        params = {**params, **matplotlib.RcParams(rc)}
+        key = _style_key(params)
+    thread = threading.get_ident()
+
+    with _STYLE_CONDITION:
+        if thread in _ACTIVE_THREADS and _ACTIVE_STYLE[0] != key:
+            raise RuntimeError("periospot_style() cannot be nested with different rc parameters")
+        while _ACTIVE_STYLE is not None and _ACTIVE_STYLE[0] != key:
+            _STYLE_CONDITION.wait()
+        if _ACTIVE_STYLE is None:
+            context = matplotlib.rc_context(params)
+            context.__enter__()
+            _ACTIVE_STYLE = (key, context)
+        _ACTIVE_THREADS[thread] = _ACTIVE_THREADS.get(thread, 0) + 1
+
+    try:
+        yield dict(params)
+    finally:
+        with _STYLE_CONDITION:
+            _ACTIVE_THREADS[thread] -= 1
+            if not _ACTIVE_THREADS[thread]:
+                del _ACTIVE_THREADS[thread]
+            if not _ACTIVE_THREADS:
+                _ACTIVE_STYLE[1].__exit__(None, None, None)
+                _ACTIVE_STYLE = None
+                _STYLE_CONDITION.notify_all()
+
 
+# =============================================================================
+# CONVENIENCE FUNCTIONS
+# =============================================================================
 
 def style_title(ax, title, level='h1'):
     """
@@ -413,6 +522,171 @@ def create_styled_figure(nrows=1, ncols=1, figsize=None, **kwargs):
     return fig, ax
 
 
+# =============================================================================
+# LARGE-N PLOTTING
+# =============================================================================
+
+# Above this many points, scatter plots switch to density mode
+DENSITY_THRESHOLD = 20_000
+
+
+def use_density_mode(n_points, density=None):
+    """
+    Decide whether a plot of n_points should aggregate instead of scatter.
+
+    Parameters
+    ----------
+    n_points : int
+        Number of points that would be drawn.
+    density : bool, optional
+        Force the mode; None switches on above DENSITY_THRESHOLD.
+
+    Returns
+    -------
+    bool
+    """
+    if density is not None:
+        return bool(density)
+    return n_points > DENSITY_THRESHOLD
+
+
+def periospot_cmap(color=None):
+    """
+    Sequential colormap from a light tint of a brand color to the color.
+
+    Parameters
+    ----------
+    color : str, optional
+        Color name (e.g., 'crimson_blaze') or hex code; defaults to the
+        first color of PERIOSPOT_PALETTE.
+
+    Returns
+    -------
+    matplotlib.colors.LinearSegmentedColormap
+    """
+    color = PERIOSPOT_COLORS.get(color, color) if color else PERIOSPOT_PALETTE[0]
+    rgb = np.array(to_rgb(color))
+    tint = 0.8 + 0.2 * rgb  # 20% of the color on white
+    return LinearSegmentedColormap.from_list(
+        f'periospot_{color}', [tint, rgb])
+
+
+def _density_bins(values, n_bins):
+    """
+    Assign values to evenly spaced bins; return (bin index, bin edges).
+
+    Whole-number data (ages, torques, ISQ) gets bins aligned on the
+    integers, so no bin holds more distinct values than its neighbours.
+    """
+    low, high = float(values.min()), float(values.max())
+    if np.array_equal(values, np.round(values)):
+        width = max(1, int(np.ceil((high - low + 1) / n_bins)))
+        edges = np.arange(low - 0.5, high + width, width)
+    else:
+        if high == low:
+            high = low + 1.0
+        edges = np.linspace(low, high, n_bins + 1)
+        width = edges[1] - edges[0]
+
+    # Even spacing turns binning into arithmetic (no search per value)
+    index = ((values - edges[0]) / width).astype(np.intp)
+    np.clip(index, 0, len(edges) - 2, out=index)
+    return index, edges
+
+
+def styled_scatter(ax, x, y, color=None, density=None, bins=80, **kwargs):
+    """
+    Scatter plot that turns into a 2D-histogram density plot for large inputs.
+
+    In density mode the points are counted in a grid of cells (log color
+    scale, empty cells left blank) and drawn as one rasterized mesh, so
+    drawing time and file size no longer grow with the number of points.
+
+    Parameters
+    ----------
+    ax : matplotlib.axes.Axes
+        The axes to draw on.
+    x, y : array-like
+        Point coordinates. Non-finite pairs are dropped in density mode.
+    color : str, optional
+        Color name or hex code (default: first PERIOSPOT_PALETTE color).
+    density : bool, optional
+        Force density mode on/off; None decides by DENSITY_THRESHOLD.
+    bins : int
+        Cells along each axis in density mode.
+    **kwargs
+        Passed to ``ax.scatter`` (scatter mode) or ``ax.pcolormesh`` (density
+        mode; scatter-only options such as ``s`` and ``alpha`` are dropped).
+
+    Returns
+    -------
+    matplotlib.collections.Collection
+        The drawn scatter collection or density mesh.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    color = PERIOSPOT_COLORS.get(color, color) if color else PERIOSPOT_PALETTE[0]
+
+    if not use_density_mode(len(x), density):
+        return ax.scatter(x, y, color=color, **kwargs)
+
+    label = kwargs.pop('label', None)
+    for option in ('s', 'alpha', 'marker', 'edgecolors'):
+        kwargs.pop(option, None)
+    finite = np.isfinite(x) & np.isfinite(y)
+    x, y = x[finite], y[finite]
+
+    x_index, x_edges = _density_bins(x, bins)
+    y_index, y_edges = _density_bins(y, bins)
+    n_x, n_y = len(x_edges) - 1, len(y_edges) - 1
+    counts = np.bincount(y_index * n_x + x_index, minlength=n_x * n_y).reshape(n_y, n_x)
+    mesh = ax.pcolormesh(x_edges, y_edges, np.ma.masked_equal(counts, 0),
+                         cmap=periospot_cmap(color), norm=LogNorm(),
+                         rasterized=True, **kwargs)
+    if label is not None:
+        ax.scatter([], [], color=color, label=label)  # Legend entry only
+    return mesh
+
+
+def decimate_curve(x, y, max_points=1000):
+    """
+    Thin a long curve (ROC, precision-recall) to at most ~max_points points.
+
+    Points are kept at even steps of path length, measured with both axes
+    scaled to [0, 1], so steep and flat parts keep the same resolution.
+    First and last points are always kept and the order is preserved.
+
+    Parameters
+    ----------
+    x, y : array-like
+        Curve coordinates in drawing order.
+    max_points : int
+        Target number of points; shorter curves are returned unchanged.
+
+    Returns
+    -------
+    tuple of np.ndarray
+        The decimated (x, y).
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(x) <= max_points:
+        return x, y
+
+    span_x = np.ptp(x) or 1.0
+    span_y = np.ptp(y) or 1.0
+    steps = np.abs(np.diff(x)) / span_x + np.abs(np.diff(y)) / span_y
+    path = np.concatenate([[0.0], np.cumsum(steps)])
+    if path[-1] == 0:
+        return x[[0, -1]], y[[0, -1]]
+
+    # First point of every 1/max_points slice of the path, plus the end
+    slices = np.floor(path / path[-1] * (max_points - 1))
+    _, keep = np.unique(slices, return_index=True)
+    keep = np.union1d(keep, [len(x) - 1])
+    return x[keep], y[keep]
+
+
 # =============================================================================
 # TYPOGRAPHY REFERENCE
 # =============================================================================
@@ -453,8 +727,6 @@ def print_typography_guide():
 # =============================================================================
 
 if __name__ == '__main__':
-    import numpy as np
-    
     # Setup and print info
     config = setup_periospot_style()
     print(f"\nFont variants loaded: {config['font_variants']}")
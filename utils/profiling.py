@@ -0,0 +1,444 @@
+"""
+Stage Profiling for Machine Learning For Dentists
+=================================================
+
+Measures where the data and figure scripts spend their time. A script
+marks its stages (load, split, fit, each figure...) with ``stage()`` or
+``@profiled``; for every stage the profiler records:
+
+    wall_s         wall time
+    cpu_s          CPU time of the process (all threads)
+    peak_rss_mb    peak resident memory during the stage (Linux only)
+    output_bytes   size of what the stage produced (files, frames, arrays)
+
+Profiling is off unless the PERIOSPOT_PROFILE environment variable names a
+directory, so the stages cost next to nothing in normal builds. When it is
+on, every process (scripts, figure workers) writes its stages to its own
+JSON file in that directory; ``python -m utils.profiling DIR`` merges them
+into one report and a Chrome trace (open it in chrome://tracing or
+https://ui.perfetto.dev). Every ``savefig`` call is recorded as a stage of
+its own, with the size of the written image.
+
+With PERIOSPOT_PROFILE_CPROFILE=1, every outermost stage is also run under
+cProfile and dumped to DIR/<process>-<pid>-<n>-<stage>.prof (nested stages
+are part of their outermost stage's profile).
+
+Usage:
+    from utils.profiling import stage, profiled
+
+    with stage('load') as s:
+        df = read_compact(path)
+        s.add_output(df)
+
+    @profiled('fit')
+    def fit_model(X, y): ...
+
+    PERIOSPOT_PROFILE=profile python -m utils.build --force
+    python -m utils.profiling profile      # → profile/report.json, trace.json
+"""
+
+import argparse
+import cProfile
+import functools
+import json
+import os
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+PROFILE_ENV = 'PERIOSPOT_PROFILE'
+CPROFILE_ENV = 'PERIOSPOT_PROFILE_CPROFILE'
+
+# =============================================================================
+# PROCESS MEMORY (Linux /proc)
+# =============================================================================
+
+
+def _proc_status_mb(pid, field):
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def reset_peak_rss(pid='self'):
+    """Reset a process's peak-RSS counter (VmHWM) to its current RSS."""
+    try:
+        Path(f'/proc/{pid}/clear_refs').write_text('5')
+    except OSError:
+        pass
+
+
+def peak_rss_mb(pid='self'):
+    """Peak RSS of a process since the last reset, in MB (None if unknown)."""
+    return _proc_status_mb(pid, 'VmHWM')
+
+
+def rss_mb(pid='self'):
+    """Current RSS of a process, in MB (None if unknown)."""
+    return _proc_status_mb(pid, 'VmRSS')
+
+
+# =============================================================================
+# STAGES
+# =============================================================================
+
+
+def output_size(value):
+    """
+    Size in bytes of a stage's output.
+
+    Files (str or Path) count their size on disk, DataFrames and Series
+    their deep memory usage, arrays and bytes their buffer size.
+    """
+    if isinstance(value, (str, os.PathLike)):
+        path = Path(value)
+        return path.stat().st_size if path.is_file() else 0
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    if isinstance(value, int):
+        return value
+    raise TypeError(f"Cannot measure the size of a {type(value).__name__}")
+
+
+class StageRecord:
+    """Measurements of one stage while it runs (see ``stage``)."""
+
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.output_bytes = 0
+        self.nested_peak_mb = None    # Highest peak seen before/in nested stages
+
+    def add_output(self, value):
+        """Count a file, frame, array or byte count as output of the stage."""
+        self.output_bytes += output_size(value)
+
+    def note_peak(self, peak):
+        if peak is not None:
+            self.nested_peak_mb = max(peak, self.nested_peak_mb or 0)
+
+
+class _NullRecord:
+    """Stand-in yielded when profiling is off."""
+
+    def add_output(self, value):
+        pass
+
+
+_NULL_RECORD = _NullRecord()
+
+
+class _ProcessState:
+    """Stages of the current process (started afresh in forked workers)."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.records = []
+        self.local = threading.local()    # .stack: open stages of a thread
+        self.n_profiles = 0
+
+
+_STATE = None
+_SAVEFIG_INSTRUMENTED = False
+
+
+def _process_state():
+    global _STATE
+    if _STATE is None or _STATE.pid != os.getpid():
+        _STATE = _ProcessState()
+    return _STATE
+
+
+def _process_label():
+    """Name of this process in reports: its script, relative to the project."""
+    script = Path(sys.argv[0]).resolve() if sys.argv and sys.argv[0] else None
+    if script is None or not script.name:
+        return 'python'
+    try:
+        return script.relative_to(PROJECT_ROOT).as_posix()
+    except ValueError:
+        return script.name
+
+
+def _file_stem(text):
+    return re.sub(r'[^\w.-]+', '_', text).strip('_')
+
+
+def profiling_enabled():
+    """Whether stages are being recorded (PERIOSPOT_PROFILE is set)."""
+    return bool(os.environ.get(PROFILE_ENV))
+
+
+def enable_profiling(directory, cprofile=False):
+    """
+    Turn profiling on for this process and the processes it starts.
+
+    Parameters
+    ----------
+    directory : str or Path
+        Where every process writes its stages.
+    cprofile : bool
+        Also dump a cProfile of every outermost stage.
+    """
+    directory = Path(directory).resolve()
+    directory.mkdir(parents=True, exist_ok=True)
+    os.environ[PROFILE_ENV] = str(directory)
+    if cprofile:
+        os.environ[CPROFILE_ENV] = '1'
+    return directory
+
+
+def _instrument_savefig():
+    """Record every Figure.savefig (and so plt.savefig) as a stage."""
+    global _SAVEFIG_INSTRUMENTED
+    figure_module = sys.modules.get('matplotlib.figure')
+    if _SAVEFIG_INSTRUMENTED or figure_module is None:
+        return
+    _SAVEFIG_INSTRUMENTED = True
+    original = figure_module.Figure.savefig
+
+    @functools.wraps(original)
+    def savefig(self, fname, *args, **kwargs):
+        output = fname if isinstance(fname, (str, os.PathLike)) else None
+        with stage('savefig', output=output):
+            return original(self, fname, *args, **kwargs)
+
+    figure_module.Figure.savefig = savefig
+
+
+def _flush(directory, state):
+    """Write this process's stages to its own file (atomically)."""
+    label = _process_label()
+    path = Path(directory) / f"{_file_stem(label)}-{state.pid}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix('.json.tmp')
+    tmp.write_text(json.dumps({'process': label, 'pid': state.pid,
+                               'argv': sys.argv, 'stages': state.records}))
+    tmp.replace(path)
+
+
+@contextmanager
+def stage(name, output=None):
+    """
+    Record the time and memory a block of code uses.
+
+    Parameters
+    ----------
+    name : str
+        Stage name in the report (e.g. 'load', 'fit', 'figure.04_roc_curve').
+    output : optional
+        File, frame or array measured as the stage's output when it ends.
+        ``add_output`` on the yielded record adds more.
+
+    Yields
+    ------
+    StageRecord
+        Call ``add_output(value)`` on it to count what the stage produced.
+        A do-nothing stand-in when profiling is off.
+    """
+    directory = os.environ.get(PROFILE_ENV)
+    if not directory:
+        yield _NULL_RECORD
+        return
+
+    _instrument_savefig()
+    state = _process_state()
+    stack = state.local.__dict__.setdefault('stack', [])
+    record = StageRecord(name, depth=len(stack))
+    if stack:
+        # Resetting the peak counter below would lose the parent's peak so far
+        stack[-1].note_peak(peak_rss_mb())
+
+    profiler = None
+    if not stack and os.environ.get(CPROFILE_ENV):
+        profiler = cProfile.Profile()
+
+    stack.append(record)
+    reset_peak_rss()
+    started = time.time()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:    # Another profiler is already active
+                profiler = None
+        yield record
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        stack.pop()
+
+        peak = peak_rss_mb()
+        if record.nested_peak_mb is not None:
+            peak = max(peak or 0, record.nested_peak_mb)
+        if stack:
+            stack[-1].note_peak(peak)
+        if output is not None:
+            record.add_output(output)
+
+        state.records.append({
+            'name': name, 'depth': record.depth,
+            'thread': threading.get_native_id(), 'start': started,
+            'wall_s': wall, 'cpu_s': cpu, 'peak_rss_mb': peak,
+            'output_bytes': record.output_bytes,
+        })
+        if profiler is not None:
+            state.n_profiles += 1
+            Path(directory).mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(Path(directory) / (
+                f"{_file_stem(_process_label())}-{state.pid}-"
+                f"{state.n_profiles:03d}-{_file_stem(name)}.prof"))
+        if not stack:
+            _flush(directory, state)
+
+
+def profiled(name=None):
+    """
+    Decorator form of ``stage``; the stage is named after the function.
+
+    Usage:
+        @profiled()
+        def prepare_state(...): ...
+    """
+    def decorate(func):
+        stage_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# =============================================================================
+# REPORTS
+# =============================================================================
+
+
+def load_stages(directory):
+    """Every stage recorded in a profile directory, in start order."""
+    stages = []
+    for path in sorted(Path(directory).glob('*.json')):
+        if path.name in ('report.json', 'trace.json'):
+            continue
+        profile = json.loads(path.read_text())
+        for record in profile['stages']:
+            stages.append({'process': profile['process'], 'pid': profile['pid'],
+                           **record})
+    return sorted(stages, key=lambda s: (s['start'], s['depth']))
+
+
+def chrome_trace(stages):
+    """
+    Convert stages to the Chrome trace event format.
+
+    One row per process and thread; stage measurements are shown as the
+    arguments of each event.
+    """
+    events = []
+    for pid, process in sorted({(s['pid'], s['process']) for s in stages}):
+        events.append({'name': 'process_name', 'ph': 'M', 'pid': pid,
+                       'args': {'name': f'{process} ({pid})'}})
+    for s in stages:
+        events.append({
+            'name': s['name'], 'cat': s['process'], 'ph': 'X',
+            'ts': s['start'] * 1e6, 'dur': s['wall_s'] * 1e6,
+            'pid': s['pid'], 'tid': s['thread'],
+            'args': {key: s[key] for key in ('cpu_s', 'peak_rss_mb', 'output_bytes')},
+        })
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def write_reports(directory, report=None, trace=None):
+    """
+    Merge a profile directory into a JSON report and a Chrome trace.
+
+    Parameters
+    ----------
+    directory : str or Path
+        Directory named by PERIOSPOT_PROFILE during the run.
+    report, trace : str or Path, optional
+        Output files (default: report.json and trace.json in the directory).
+
+    Returns
+    -------
+    list of dict
+        The merged stages.
+    """
+    directory = Path(directory)
+    stages = load_stages(directory)
+    with open(report or directory / 'report.json', 'w') as f:
+        json.dump({'stages': stages}, f, indent=2)
+    with open(trace or directory / 'trace.json', 'w') as f:
+        json.dump(chrome_trace(stages), f)
+    return stages
+
+
+def print_summary(stages):
+    """Print every stage, grouped by process, indented by nesting."""
+    def size(n):
+        for unit in ('B', 'KB', 'MB', 'GB'):
+            if n < 1024 or unit == 'GB':
+                return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+            n /= 1024
+
+    # Processes in the order they started, each with its stages as a tree
+    first_start = {}
+    for s in stages:
+        first_start.setdefault(s['pid'], s['start'])
+    stages = sorted(stages, key=lambda s: (first_start[s['pid']], s['pid'],
+                                           s['start'], s['depth']))
+
+    print(f"{'stage':48} {'wall s':>8} {'cpu s':>8} {'peak MB':>8} {'output':>10}")
+    current = None
+    for s in stages:
+        if (s['process'], s['pid']) != current:
+            current = (s['process'], s['pid'])
+            print(f"{s['process']} (pid {s['pid']})")
+        peak = f"{s['peak_rss_mb']:8.0f}" if s['peak_rss_mb'] is not None else f"{'-':>8}"
+        output = size(s['output_bytes']) if s['output_bytes'] else '-'
+        name = '  ' * (s['depth'] + 1) + s['name']
+        print(f"{name:48} {s['wall_s']:8.3f} {s['cpu_s']:8.3f} {peak} {output:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Merge a profile directory into a report and a Chrome trace.')
+    parser.add_argument('directory', type=Path,
+                        help=f'Directory that {PROFILE_ENV} pointed to')
+    parser.add_argument('--report', type=Path, default=None,
+                        help='JSON report (default: DIRECTORY/report.json)')
+    parser.add_argument('--trace', type=Path, default=None,
+                        help='Chrome trace (default: DIRECTORY/trace.json)')
+    args = parser.parse_args()
+
+    stages = write_reports(args.directory, report=args.report, trace=args.trace)
+    if not stages:
+        print(f"No stages recorded in {args.directory}")
+        sys.exit(1)
+    print_summary(stages)
+    print(f"\nReport: {args.report or args.directory / 'report.json'}")
+    print(f"Trace:  {args.trace or args.directory / 'trace.json'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,545 @@
+"""
+Dataset Schemas and Validation for Machine Learning For Dentists
+================================================================
+
+The chapter generators encode clinical constraints through ``.clip(...)``
+and fixed category lists (age 25-85, torque 15-60 Ncm, HbA1c by diabetes
+status, ...). The schemas below state those constraints once, per dataset
+family (the same names as utils.data_io.COMPACT_DTYPES), and the validator
+checks that a file actually respects them:
+
+    ranges          min/max per column
+    whole numbers   for counts and integer-valued measurements
+    domains         allowed categories, codes or implant sizes
+    null rates      share of missing values allowed per column
+    rules           across columns, e.g. implant_surface_mm2 ≈ π·d·L
+
+Files are read in chunks as stored (no conversion to the compact dtypes,
+which would hide unknown categories) and every check is a whole-array
+NumPy operation. Parquet files are split into groups of row groups and,
+like separate files, checked in parallel worker processes.
+
+Usage:
+    python -m utils.schema chapters/03_linear_regression/data/implant_bone_loss.csv
+    python -m utils.schema shards/*.parquet --dataset implant_success_data --workers 8
+
+    from utils.schema import validate_files, validate_frame
+    report = validate_frame(df, 'implant_bone_loss')
+    print(report.format()); assert report.ok
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import CategoricalDtype
+
+from .data_io import _dataset_for_path, _iter_batches, _require_pyarrow
+
+# =============================================================================
+# DECLARATIONS
+# =============================================================================
+
+
+@dataclass(frozen=True)
+class Column:
+    """Expected content of one column (None: not checked)."""
+    min: float = None
+    max: float = None
+    levels: tuple = None         # Allowed values: categories, codes or sizes
+    integer: bool = False        # Whole numbers only
+    max_null_rate: float = 0.0   # Share of missing values allowed
+    required: bool = True        # The file must have the column
+
+
+@dataclass(frozen=True)
+class RangeWhen:
+    """``column`` within [min, max] on the rows where ``when`` equals ``value``."""
+    column: str
+    when: str
+    value: object
+    min: float
+    max: float
+
+    @property
+    def name(self):
+        return f"{self.column} in [{self.min:g}, {self.max:g}] when {self.when} = {self.value}"
+
+    @property
+    def inputs(self):
+        return (self.column, self.when)
+
+    def violations(self, frame):
+        values = _numbers(frame[self.column])
+        selected = (frame[self.when] == self.value).to_numpy(dtype=bool)
+        return selected & ((values < _bound(self.min, values))
+                           | (values > _bound(self.max, values)))
+
+
+@dataclass(frozen=True)
+class ApproxProduct:
+    """``column`` equals factor × the product of ``of``, within ``tolerance``."""
+    column: str
+    of: tuple
+    factor: float = 1.0
+    tolerance: float = 0.0
+
+    @property
+    def name(self):
+        factor = 'π·' if self.factor == np.pi else '' if self.factor == 1 else f'{self.factor:g}·'
+        return f"{self.column} ≈ {factor}{'·'.join(self.of)} (±{self.tolerance:g})"
+
+    @property
+    def inputs(self):
+        return (self.column, *self.of)
+
+    def violations(self, frame):
+        expected = np.full(len(frame), self.factor)
+        for name in self.of:
+            expected = expected * _numbers(frame[name])
+        # NaN anywhere compares False: missing values are the null checks' job
+        return np.abs(_numbers(frame[self.column]) - expected) > self.tolerance
+
+
+@dataclass(frozen=True)
+class BinnedFrom:
+    """``column`` is the bin of ``source``: right-closed ``edges``, one level per bin."""
+    column: str
+    source: str
+    edges: tuple
+    levels: tuple
+
+    @property
+    def name(self):
+        return f"{self.column} matches the bins of {self.source}"
+
+    @property
+    def inputs(self):
+        return (self.column, self.source)
+
+    def violations(self, frame):
+        source = _numbers(frame[self.source])
+        expected = np.searchsorted(np.asarray(self.edges), source, side='left') - 1
+        expected[expected >= len(self.levels)] = -1    # Beyond the last bin: missing
+        actual = _level_codes(frame[self.column], self.levels)
+        return ~np.isnan(source) & (actual != expected)
+
+
+@dataclass(frozen=True)
+class ColumnSum:
+    """The sum of ``columns`` is at most ``max`` (e.g. teeth plus implants)."""
+    columns: tuple
+    max: float
+
+    @property
+    def name(self):
+        return f"{' + '.join(self.columns)} at most {self.max:g}"
+
+    @property
+    def inputs(self):
+        return self.columns
+
+    def violations(self, frame):
+        total = sum(_numbers(frame[name]).astype(np.float64) for name in self.columns)
+        return total > self.max
+
+
+@dataclass(frozen=True)
+class Schema:
+    """Columns and cross-column rules of a dataset family."""
+    columns: dict
+    rules: tuple = ()
+
+
+# Constraints of the chapter generators (chapters/*/data/generate_*.py);
+# columns absent from a file are an error unless required=False
+SCHEMAS = {
+    # Chapter 03 - marginal bone loss (linear regression)
+    'implant_bone_loss': Schema(
+        columns={
+            'patient_id': Column(),
+            'age': Column(25, 85, integer=True),
+            'sex': Column(levels=('Male', 'Female')),
+            'smoking_status': Column(levels=('Never', 'Former', 'Current')),
+            'diabetes': Column(levels=(True, False)),
+            'hba1c': Column(4.5, 10.0, max_null_rate=0.05),
+            'hounsfield_units': Column(150, 850, integer=True),
+            'bone_type': Column(levels=('D4 (Very soft)', 'D3 (Soft)', 'D2 (Normal)',
+                                        'D1 (Dense)')),
+            'insertion_torque_ncm': Column(15, 60, integer=True),
+            'isq_placement': Column(45, 85, integer=True, max_null_rate=0.04),
+            'implant_length_mm': Column(levels=(8, 10, 11.5, 13)),
+            'implant_diameter_mm': Column(levels=(3.5, 4.0, 4.5, 5.0)),
+            'marginal_bone_loss_mm': Column(0.1, 3.5),
+        },
+        rules=(
+            RangeWhen('hba1c', 'diabetes', True, 5.7, 10.0),
+            RangeWhen('hba1c', 'diabetes', False, 4.5, 5.6),
+            BinnedFrom('bone_type', 'hounsfield_units', edges=(0, 300, 500, 700, 1000),
+                       levels=('D4 (Very soft)', 'D3 (Soft)', 'D2 (Normal)', 'D1 (Dense)')),
+        ),
+    ),
+    # Chapter 04 - implant success/failure (logistic regression)
+    'implant_success_data': Schema(
+        columns={
+            'patient_id': Column(),
+            'age': Column(25, 85),
+            'smoking_status': Column(levels=(0, 1)),
+            'diabetes_status': Column(levels=(0, 1)),
+            'insertion_torque_ncm': Column(15, 50),
+            'isq_placement': Column(45, 85),
+            'hounsfield_units': Column(250, 1200, integer=True),
+            'implant_length_mm': Column(levels=(8.0, 10.0, 11.5, 13.0)),
+            'implant_diameter_mm': Column(levels=(3.5, 4.0, 4.5, 5.0)),
+            'implant_surface_mm2': Column(),
+            'success': Column(levels=(0, 1)),
+            'success_probability_true': Column(0, 1, required=False),   # Not in '_training'
+        },
+        rules=(
+            # Rounded to 0.1 mm², maybe stored as float32
+            ApproxProduct('implant_surface_mm2', ('implant_diameter_mm', 'implant_length_mm'),
+                          factor=np.pi, tolerance=0.051),
+        ),
+    ),
+    # D1 - core tabular dental dataset (data/D1_core_tabular)
+    'dental_clinical_data': Schema(
+        columns={
+            'patient_id': Column(1, 2**32 - 1, integer=True),
+            'age': Column(18, 90, integer=True),
+            'sex': Column(levels=('Male', 'Female')),
+            'smoking_status': Column(levels=('Never', 'Former', 'Current')),
+            'smoking_pack_years': Column(0, 120, max_null_rate=0.03),
+            'probing_depth': Column(1, 9),
+            'clinical_attachment_loss': Column(0, 12),
+            'bleeding_on_probing': Column(0, 100),
+            'plaque_index': Column(0, 3, max_null_rate=0.03),
+            'bone_loss_percentage': Column(0, 100),
+            'diabetes': Column(levels=(True, False)),
+            'hba1c': Column(4.0, 13.0, max_null_rate=0.85),
+            'hypertension': Column(levels=(True, False)),
+            'cardiovascular_disease': Column(levels=(True, False)),
+            'medications': Column(0, 20, integer=True),
+            'teeth_present': Column(0, 32, integer=True),
+            'implants_present': Column(0, 32, integer=True),
+            'years_since_treatment': Column(0, 40),
+            'periodontitis_severity': Column(levels=('Healthy', 'Mild', 'Moderate', 'Severe')),
+            'tooth_loss_5yr': Column(levels=(True, False)),
+            'implant_failure_5yr': Column(levels=(True, False)),
+            'treatment_response': Column(levels=('Good', 'Moderate', 'Poor')),
+        },
+        rules=(
+            RangeWhen('hba1c', 'diabetes', True, 5.7, 13.0),
+            RangeWhen('hba1c', 'diabetes', False, 4.0, 5.6),
+            RangeWhen('smoking_pack_years', 'smoking_status', 'Never', 0, 0),
+            ColumnSum(('teeth_present', 'implants_present'), max=32),
+            RangeWhen('teeth_present', 'tooth_loss_5yr', True, 1, 32),
+            RangeWhen('implants_present', 'implant_failure_5yr', True, 1, 32),
+        ),
+    ),
+}
+
+
+def get_schema(dataset):
+    """Schema of a dataset family, by name or by a file path starting with one."""
+    name = dataset if dataset in SCHEMAS else _dataset_for_path(dataset)
+    if name not in SCHEMAS:
+        raise KeyError(f"no schema for {str(dataset)!r}; known: {', '.join(SCHEMAS)}")
+    return name, SCHEMAS[name]
+
+
+# =============================================================================
+# CHECKS (one chunk at a time)
+# =============================================================================
+
+# Row numbers kept per failed check, to show where to look
+N_EXAMPLES = 5
+
+
+def _numbers(series):
+    """Column as a float array; text that is not a number becomes NaN."""
+    if isinstance(series.dtype, np.dtype) and series.dtype.kind in 'biuf':
+        return series.to_numpy()
+    numbers = pd.to_numeric(series.astype(object), errors='coerce')
+    return numbers.to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _bound(value, values):
+    """A limit in the values' own float type (float32 5.7 is below 5.7)."""
+    return values.dtype.type(value) if values.dtype.kind == 'f' else value
+
+
+def _level_codes(series, levels):
+    """Position of every value in ``levels`` (-1: missing or not a level)."""
+    if not isinstance(series.dtype, CategoricalDtype):
+        series = series.astype('category')
+    # Mapped per category, not per row
+    lookup = np.append(pd.Index(levels).get_indexer(series.cat.categories), -1)
+    return lookup[series.cat.codes.to_numpy()]
+
+
+def _outside_levels(series, levels):
+    if isinstance(series.dtype, CategoricalDtype):
+        # One test per category, then a lookup per row
+        unknown = np.append(~series.cat.categories.isin(levels), False)
+        return unknown[series.cat.codes.to_numpy()]      # Code -1 (missing) → False
+    values = series.to_numpy()
+    if values.dtype.kind == 'f':
+        return ~np.isnan(values) & ~np.isin(values, np.asarray(levels, dtype=values.dtype))
+    if values.dtype.kind in 'iu':
+        return ~np.isin(values, levels)
+    return series.notna().to_numpy() & ~series.isin(levels).to_numpy()
+
+
+@dataclass
+class ValidationReport:
+    """Checks of one file (or frame) and how many rows failed each."""
+    source: str
+    dataset: str
+    n_rows: int = 0
+    violations: dict = field(default_factory=dict)   # Check → failing rows
+    examples: dict = field(default_factory=dict)     # Check → first row numbers
+    nulls: dict = field(default_factory=dict)        # Column → missing values
+    absent: list = field(default_factory=list)       # Required columns not in the file
+
+    def _count(self, check, failed, first_row):
+        n = int(np.count_nonzero(failed))
+        self.violations[check] = self.violations.get(check, 0) + n
+        if n and len(self.examples.setdefault(check, [])) < N_EXAMPLES:
+            rows = first_row + np.flatnonzero(failed)[:N_EXAMPLES]
+            self.examples[check] = (self.examples[check] + rows.tolist())[:N_EXAMPLES]
+
+    def check(self, frame, schema, first_row=0):
+        """Add the checks of one chunk; ``first_row`` numbers its rows in the file."""
+        for name, spec in schema.columns.items():
+            if name not in frame:
+                continue
+            series = frame[name]
+            missing = series.isna().to_numpy()
+            self.nulls[name] = self.nulls.get(name, 0) + int(missing.sum())
+
+            if spec.levels is not None:
+                self._count(f"{name}: not one of {', '.join(map(str, spec.levels))}",
+                            _outside_levels(series, spec.levels), first_row)
+            if spec.min is None and spec.max is None and not spec.integer:
+                continue
+            values = _numbers(series)
+            self._count(f"{name}: not a number", np.isnan(values) & ~missing, first_row)
+            if spec.min is not None:
+                self._count(f"{name}: below {spec.min:g}",
+                            values < _bound(spec.min, values), first_row)
+            if spec.max is not None:
+                self._count(f"{name}: above {spec.max:g}",
+                            values > _bound(spec.max, values), first_row)
+            if spec.integer and values.dtype.kind == 'f':
+                self._count(f"{name}: not a whole number",
+                            ~np.isnan(values) & (values != np.round(values)), first_row)
+
+        for rule in schema.rules:
+            if all(name in frame for name in rule.inputs):
+                self._count(rule.name, rule.violations(frame), first_row)
+        self.n_rows += len(frame)
+        return self
+
+    def merge(self, other):
+        """Add the report of a later part of the same file."""
+        for check, n in other.violations.items():
+            self.violations[check] = self.violations.get(check, 0) + n
+        for check, rows in other.examples.items():
+            self.examples[check] = (self.examples.get(check, []) + rows)[:N_EXAMPLES]
+        for name, n in other.nulls.items():
+            self.nulls[name] = self.nulls.get(name, 0) + n
+        self.absent = sorted(set(self.absent) | set(other.absent))
+        self.n_rows += other.n_rows
+        return self
+
+    def null_failures(self, schema):
+        """Columns with more missing values than allowed: (check, missing)."""
+        failures = []
+        for name, n in self.nulls.items():
+            allowed = schema.columns[name].max_null_rate
+            if n > allowed * self.n_rows:
+                failures.append((f"{name}: missing {n / self.n_rows:.1%} "
+                                 f"(at most {allowed:.0%})", n))
+        return failures
+
+    def failures(self):
+        """Failed checks as (check, failing rows); empty when the file is valid."""
+        schema = SCHEMAS[self.dataset]
+        failures = [(f"{name}: column absent", None) for name in self.absent]
+        failures += [(check, n) for check, n in self.violations.items() if n]
+        return failures + self.null_failures(schema)
+
+    @property
+    def ok(self):
+        return not self.failures()
+
+    def format(self):
+        """Status line, then one line per failed check."""
+        failures = self.failures()
+        n_checks = len(self.violations) + len(self.nulls) + len(self.absent)
+        if not failures:
+            return (f"✓ {self.source} ({self.dataset}): {self.n_rows:,} rows, "
+                    f"{n_checks} checks passed")
+        lines = [f"✗ {self.source} ({self.dataset}): {self.n_rows:,} rows, "
+                 f"{len(failures)} of {n_checks} checks failed"]
+        for check, n in failures:
+            rows = self.examples.get(check)
+            where = (f" (e.g. row{'s' if len(rows) > 1 else ''} {', '.join(map(str, rows))})"
+                     if rows else '')
+            count = f": {n:,} row{'s' if n != 1 else ''}{where}" if n is not None else ''
+            lines.append(f"    {check}{count}")
+        return '\n'.join(lines)
+
+
+def validate_frame(df, dataset):
+    """Validate a DataFrame in memory against a dataset's schema."""
+    name, schema = get_schema(dataset)
+    report = ValidationReport(source='DataFrame', dataset=name,
+                              absent=[c for c, spec in schema.columns.items()
+                                      if spec.required and c not in df])
+    return report.check(df, schema)
+
+
+# =============================================================================
+# FILES
+# =============================================================================
+
+# Rows of Parquet row groups checked by one task; smaller tasks spread a
+# single large file over more workers
+TASK_ROWS = 4_000_000
+
+
+def _file_columns(path):
+    if path.suffix == '.csv':
+        return list(pd.read_csv(path, nrows=0).columns)
+    pyarrow = _require_pyarrow()
+    if path.suffix == '.parquet':
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetFile(path).schema_arrow.names
+    if path.suffix == '.feather':
+        return pyarrow.ipc.open_file(path).schema.names
+    raise ValueError(f"Unsupported dataset format: {path.suffix!r}")
+
+
+def _tasks(path):
+    """(first row, row groups) parts of a file; row groups None = whole file."""
+    if path.suffix != '.parquet':
+        return [(0, None)]
+    import pyarrow.parquet
+    metadata = pyarrow.parquet.ParquetFile(path).metadata
+    tasks, groups, first, rows = [], [], 0, 0
+    for index in range(metadata.num_row_groups):
+        groups.append(index)
+        rows += metadata.row_group(index).num_rows
+        if rows >= TASK_ROWS:
+            tasks.append((first, groups))
+            first, groups, rows = first + rows, [], 0
+    if groups or not tasks:
+        tasks.append((first, groups))
+    return tasks
+
+
+def _validate_part(path, dataset, first_row, row_groups, chunk_size):
+    """Check one part of a file; runs in a worker or in-process."""
+    path = Path(path)
+    _, schema = get_schema(dataset)
+    present = _file_columns(path)
+    columns = [name for name in schema.columns if name in present]
+    report = ValidationReport(source=str(path), dataset=dataset,
+                              absent=[c for c, spec in schema.columns.items()
+                                      if spec.required and c not in present])
+
+    if path.suffix == '.csv':
+        # Text categories stay as read, so unknown values are seen
+        text = {name: 'category' for name in columns
+                if schema.columns[name].levels and isinstance(schema.columns[name].levels[0], str)}
+        chunks = pd.read_csv(path, usecols=columns, dtype=text, chunksize=chunk_size)
+    elif row_groups is not None:
+        import pyarrow.parquet
+        chunks = (batch.to_pandas() for batch in pyarrow.parquet.ParquetFile(path).iter_batches(
+            batch_size=chunk_size, row_groups=row_groups, columns=columns))
+    else:
+        chunks = (batch.to_pandas() for batch in _iter_batches(path, columns, chunk_size))
+
+    row = first_row
+    for chunk in chunks:
+        report.check(chunk, schema, first_row=row)
+        row += len(chunk)
+    return report
+
+
+def validate_files(paths, dataset=None, chunk_size=1_000_000, n_workers=None):
+    """
+    Validate dataset files against their schema.
+
+    Unlike read_compact, a CSV path is checked itself, not its Parquet twin.
+
+    Parameters
+    ----------
+    paths : str, Path or list
+        .csv, .parquet or .feather files.
+    dataset : str, optional
+        Schema name; inferred from each file name when not given.
+    chunk_size : int
+        Rows checked at a time.
+    n_workers : int or None
+        Worker processes (None: one per core; 1 checks in this process).
+
+    Returns
+    -------
+    list of ValidationReport
+        One per file, in order.
+    """
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    paths = [Path(path) for path in paths]
+    names = [get_schema(dataset or path)[0] for path in paths]
+    parts = [(path, name, first_row, row_groups, chunk_size)
+             for path, name in zip(paths, names) for first_row, row_groups in _tasks(path)]
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    n_workers = min(n_workers, len(parts))
+    if n_workers <= 1:
+        results = [_validate_part(*part) for part in parts]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            results = list(pool.map(_validate_part, *zip(*parts)))
+
+    # Parts come back in order: merge them per file
+    reports = {}
+    for part, result in zip(parts, results):
+        if part[0] in reports:
+            reports[part[0]].merge(result)
+        else:
+            reports[part[0]] = result
+    return [reports[path] for path in paths]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check dataset files against their schema.')
+    parser.add_argument('files', nargs='+', type=Path, help='.csv, .parquet or .feather files')
+    parser.add_argument('--dataset', choices=sorted(SCHEMAS),
+                        help='Schema to use (default: from each file name)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes (default: one per core)')
+    parser.add_argument('--chunk-size', type=int, default=1_000_000,
+                        help='Rows checked at a time (default: 1000000)')
+    args = parser.parse_args()
+
+    try:
+        reports = validate_files(args.files, args.dataset, args.chunk_size, args.workers)
+    except KeyError as error:
+        parser.error(error.args[0])
+    for report in reports:
+        print(report.format())
+    sys.exit(0 if all(report.ok for report in reports) else 1)
+
+
+if __name__ == '__main__':
+    main()
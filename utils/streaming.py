@@ -0,0 +1,458 @@
+"""
+Out-of-Core Model Fitting for Machine Learning For Dentists
+===========================================================
+
+Building blocks for training the chapter models on datasets that do not
+fit in memory. Everything here sees the data one chunk at a time:
+
+    hash_split                  train/test assignment decided per row from
+                                its ID, so it is the same however the file
+                                is chunked (and for every re-read)
+    StreamingScaler             StandardScaler fitted chunk by chunk
+    StreamingLogisticRegression L2 logistic regression fitted by Newton's
+                                method (IRLS): one pass over the data per
+                                iteration, p x p memory
+    StreamingLinearRegression   least squares from sufficient statistics
+                                (means and cross-products), one pass; batches
+                                of cases can be added or removed later
+
+The logistic model minimises the same objective as scikit-learn's
+``LogisticRegression(penalty='l2', C=C)`` (unpenalised intercept), so on the
+same rows it reaches the same coefficients, typically in 6-8 passes.
+
+Usage:
+    from utils.streaming import StreamingLogisticRegression, StreamingScaler
+
+    scaler = StreamingScaler()
+    for X, y in read_chunks():
+        scaler.partial_fit(X)
+
+    model = StreamingLogisticRegression(C=1.0)
+    model.fit(lambda: ((scaler.transform(X), y) for X, y in read_chunks()))
+
+    linear = StreamingLinearRegression()
+    for X, y in read_chunks():
+        linear.partial_fit(X, y)
+    linear.remove(X_withdrawn, y_withdrawn)    # No refit from raw rows
+"""
+
+import numpy as np
+
+# =============================================================================
+# STABLE TRAIN/TEST SPLIT
+# =============================================================================
+
+
+_FNV_OFFSET = 0xcbf29ce484222325
+_FNV_PRIME = np.uint64(0x100000001b3)
+_MASK64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _mix64(h):
+    """splitmix64 finalizer: spreads every input bit over the whole word."""
+    h = h ^ (h >> np.uint64(30))
+    h = h * np.uint64(0xbf58476d1ce4e5b9)
+    h = h ^ (h >> np.uint64(27))
+    h = h * np.uint64(0x94d049bb133111eb)
+    return h ^ (h >> np.uint64(31))
+
+
+def _mix64_int(h):
+    """_mix64 of one Python int, in exact 64-bit arithmetic (no overflow warnings)."""
+    h &= _MASK64
+    h = ((h ^ (h >> 30)) * 0xbf58476d1ce4e5b9) & _MASK64
+    h = ((h ^ (h >> 27)) * 0x94d049bb133111eb) & _MASK64
+    return np.uint64(h ^ (h >> 31))
+
+
+def hash_keys(keys, seed=0):
+    """
+    64-bit hash of every key, vectorised.
+
+    Strings are hashed byte by byte (FNV-1a), integers directly; both end
+    with a splitmix64 finalizer. The result depends only on the key and the
+    seed, not on numpy/pandas versions or on the other keys of the chunk.
+    """
+    keys = np.asarray(keys)
+    seed_word = _mix64_int(seed)
+    if keys.dtype.kind in 'iub':
+        return _mix64(keys.astype(np.uint64) ^ seed_word)
+
+    try:
+        raw = keys.astype('S')
+    except UnicodeEncodeError:
+        raw = np.char.encode(keys.astype(str), 'utf-8')
+    columns = raw.view(np.uint8).reshape(len(raw), raw.itemsize)
+    h = np.full(len(raw), np.uint64(_FNV_OFFSET) ^ seed_word)
+    for column in columns.T:
+        # Shorter keys are NUL-padded to the chunk's width: skip the padding
+        h = np.where(column != 0, (h ^ column) * _FNV_PRIME, h)
+    return _mix64(h)
+
+
+def hash_split(keys, test_size=0.2, seed=42):
+    """
+    Assign rows to the test set by hashing their IDs.
+
+    A row's assignment depends only on its key and the seed, never on its
+    position or chunk, so every pass over a file sees the same split.
+
+    Parameters
+    ----------
+    keys : array-like
+        Row IDs (e.g. patient_id); strings or integers.
+    test_size : float
+        Expected fraction of rows in the test set.
+    seed : int
+        Changes the split, like train_test_split's random_state.
+
+    Returns
+    -------
+    numpy.ndarray of bool
+        True for test rows.
+    """
+    # Top 53 bits → uniform in [0, 1)
+    uniform = (hash_keys(keys, seed) >> np.uint64(11)) * 2.0 ** -53
+    return uniform < test_size
+
+
+# =============================================================================
+# INCREMENTAL STANDARDIZATION
+# =============================================================================
+
+
+class StreamingScaler:
+    """
+    Standardize features with statistics accumulated over chunks.
+
+    Means and variances are merged chunk by chunk (Chan et al.), which is
+    numerically stable and gives the same result as StandardScaler on the
+    whole table (population variance; constant features keep scale 1).
+    """
+
+    def __init__(self):
+        self.n_samples_seen_ = 0
+        self.mean_ = None
+        self._m2 = None     # Sum of squared deviations from the mean
+
+    def partial_fit(self, X):
+        """Add a chunk of rows (2D array) to the statistics."""
+        X = np.asarray(X, dtype=np.float64)
+        n = len(X)
+        if n == 0:
+            return self
+        mean = X.mean(axis=0)
+        m2 = ((X - mean) ** 2).sum(axis=0)
+
+        if self.mean_ is None:
+            self.n_samples_seen_, self.mean_, self._m2 = n, mean, m2
+            return self
+
+        total = self.n_samples_seen_ + n
+        delta = mean - self.mean_
+        self.mean_ = self.mean_ + delta * (n / total)
+        self._m2 = self._m2 + m2 + delta ** 2 * (self.n_samples_seen_ * n / total)
+        self.n_samples_seen_ = total
+        return self
+
+    @property
+    def var_(self):
+        return self._m2 / self.n_samples_seen_
+
+    @property
+    def scale_(self):
+        scale = np.sqrt(self.var_)
+        return np.where(scale == 0, 1.0, scale)
+
+    def transform(self, X):
+        """Standardize a chunk with the statistics seen so far."""
+        return (np.asarray(X, dtype=np.float64) - self.mean_) / self.scale_
+
+
+# =============================================================================
+# CHUNKED NEWTON / IRLS LOGISTIC REGRESSION
+# =============================================================================
+
+
+def _sigmoid(z):
+    # tanh form: no overflow warnings for large |z|
+    return 0.5 * (1.0 + np.tanh(0.5 * z))
+
+
+class StreamingLogisticRegression:
+    """
+    L2-regularised logistic regression trained one chunk at a time.
+
+    Each Newton iteration reads the data once and accumulates the gradient
+    and the (p+1) x (p+1) Hessian of
+
+        0.5 * ||w||^2 + C * sum(log loss)
+
+    so memory does not grow with the number of rows.
+
+    Parameters
+    ----------
+    C : float
+        Inverse regularisation strength (as in scikit-learn).
+    max_iter : int
+        Maximum number of Newton iterations (passes over the data).
+    tol : float
+        Stop when no coefficient moves more than tol (relative).
+    """
+
+    def __init__(self, C=1.0, max_iter=25, tol=1e-8):
+        self.C = C
+        self.max_iter = max_iter
+        self.tol = tol
+
+    def fit(self, make_chunks):
+        """
+        Fit the model.
+
+        Parameters
+        ----------
+        make_chunks : callable
+            Called once per iteration; returns an iterable of (X, y) chunks
+            with X already scaled and y in {0, 1}. Every call must yield the
+            same rows.
+
+        Returns
+        -------
+        self
+        """
+        theta = None        # Weights, then intercept
+        self.n_iter_ = 0
+        self.converged_ = False
+
+        for _ in range(self.max_iter):
+            gradient = hessian = None
+            n_rows = 0
+            for X, y in make_chunks():
+                X = np.asarray(X, dtype=np.float64)
+                y = np.asarray(y, dtype=np.float64)
+                if theta is None:
+                    theta = np.zeros(X.shape[1] + 1)
+                if gradient is None:
+                    gradient = np.zeros_like(theta)
+                    hessian = np.zeros((len(theta), len(theta)))
+
+                Xb = np.column_stack([X, np.ones(len(X))])
+                p = _sigmoid(Xb @ theta)
+                gradient += Xb.T @ (p - y)
+                hessian += (Xb * (p * (1 - p))[:, None]).T @ Xb
+                n_rows += len(X)
+
+            if n_rows == 0:
+                raise ValueError("make_chunks() yielded no rows")
+
+            # Penalty on the weights only, not the intercept
+            penalty = np.ones_like(theta)
+            penalty[-1] = 0.0
+            gradient = self.C * gradient + penalty * theta
+            hessian = self.C * hessian + np.diag(penalty)
+
+            step = np.linalg.solve(hessian, gradient)
+            theta = theta - step
+            self.n_iter_ += 1
+            if np.max(np.abs(step)) <= self.tol * (1 + np.max(np.abs(theta))):
+                self.converged_ = True
+                break
+
+        self.n_samples_ = n_rows
+        self.coef_ = theta[None, :-1]
+        self.intercept_ = theta[-1:]
+        return self
+
+    def decision_function(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_[0] + self.intercept_[0]
+
+    def predict_proba(self, X):
+        """Probabilities of class 0 and class 1, like scikit-learn."""
+        p = _sigmoid(self.decision_function(X))
+        return np.column_stack([1 - p, p])
+
+    def predict(self, X):
+        return (self.decision_function(X) > 0).astype(np.int64)
+
+
+# =============================================================================
+# SUFFICIENT-STATISTICS LINEAR REGRESSION
+# =============================================================================
+
+
+def _comoments(Z):
+    """Row count, column means and centred cross-products of one batch."""
+    mean = Z.mean(axis=0)
+    centred = Z - mean
+    return len(Z), mean, centred.T @ centred
+
+
+class StreamingLinearRegression:
+    """
+    Ordinary least squares kept as sufficient statistics.
+
+    For the columns [X, y] only the row count, the means and the centred
+    cross-product matrix ((p+1) x (p+1)) are stored. Batches are merged in
+    (Chan et al., as StreamingScaler) or taken out again with the exact
+    inverse of the merge, so a model over millions of cases is updated with
+    a day's new cases, or without withdrawn ones, in time proportional to
+    the batch, not the history.
+
+    The coefficients solve the centred normal equations
+    Sxx b = Sxy by Cholesky factorisation, after scaling the columns to
+    unit variance (the R of a QR of the standardized, centred data); if
+    features are collinear, a least-squares solve gives the minimum-norm
+    solution instead. Either way they match scikit-learn's
+    ``LinearRegression()`` (with intercept) fitted on the same rows, and
+    ``coef_standardized_`` matches it fitted on StandardScaler output.
+    """
+
+    def __init__(self):
+        self.n_samples_seen_ = 0
+        self._mean = None       # Means of [X, y]
+        self._comoment = None   # Centred cross-products of [X, y]
+
+    @staticmethod
+    def _stack(X, y):
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64).reshape(-1, 1)
+        if X.ndim != 2 or len(X) != len(y):
+            raise ValueError(f"X must be 2D with one row per y value; got {X.shape} and {len(y)}")
+        return np.hstack([X, y])
+
+    def _merge(self, n, mean, comoment):
+        if n == 0:
+            return self
+        if self._mean is None:
+            self.n_samples_seen_, self._mean, self._comoment = n, mean, comoment
+            return self
+        total = self.n_samples_seen_ + n
+        delta = mean - self._mean
+        self._comoment = (self._comoment + comoment
+                          + np.outer(delta, delta) * (self.n_samples_seen_ * n / total))
+        self._mean = self._mean + delta * (n / total)
+        self.n_samples_seen_ = total
+        return self
+
+    def partial_fit(self, X, y):
+        """Add a batch of cases."""
+        Z = self._stack(X, y)
+        if len(Z) == 0:
+            return self
+        return self._merge(*_comoments(Z))
+
+    def remove(self, X, y):
+        """Take out a batch of cases that was added before."""
+        Z = self._stack(X, y)
+        n = len(Z)
+        if n == 0:
+            return self
+        if n > self.n_samples_seen_:
+            raise ValueError(f"cannot remove {n} cases from {self.n_samples_seen_}")
+        if n == self.n_samples_seen_:
+            self.__init__()
+            return self
+
+        _, mean, comoment = _comoments(Z)
+        rest = self.n_samples_seen_ - n
+        rest_mean = (self._mean * self.n_samples_seen_ - mean * n) / rest
+        delta = mean - rest_mean
+        self._comoment = (self._comoment - comoment
+                          - np.outer(delta, delta) * (rest * n / self.n_samples_seen_))
+        self._mean = rest_mean
+        self.n_samples_seen_ = rest
+        return self
+
+    def merge(self, other):
+        """Add the statistics of another model (e.g. from a worker)."""
+        if other._mean is not None:
+            self._merge(other.n_samples_seen_, other._mean, other._comoment)
+        return self
+
+    # ---- saved statistics ---------------------------------------------------
+
+    def save(self, path, **extra):
+        """
+        Write the statistics (and any extra arrays) to an .npz file.
+
+        A model without cases is saved as n_samples_seen=0 with empty
+        arrays, so the file stays loadable after every case was removed.
+        """
+        if self._mean is None:
+            mean, comoment = np.empty(0), np.empty((0, 0))
+        else:
+            mean, comoment = self._mean, self._comoment
+        np.savez(path, n_samples_seen=self.n_samples_seen_, mean=mean,
+                 comoment=comoment, **extra)
+
+    @classmethod
+    def load(cls, path):
+        """Return (model, dict of the extra arrays saved with it)."""
+        with np.load(path) as saved:
+            arrays = {name: saved[name] for name in saved.files}
+        model = cls()
+        model.n_samples_seen_ = int(arrays.pop('n_samples_seen'))
+        mean, comoment = arrays.pop('mean'), arrays.pop('comoment')
+        if model.n_samples_seen_ > 0:
+            model._mean, model._comoment = mean, comoment
+        return model, arrays
+
+    # ---- model ----------------------------------------------------------------
+
+    def _require_cases(self):
+        if self._mean is None:
+            raise ValueError("the model has no cases; add some with partial_fit first")
+
+    @property
+    def mean_(self):
+        """Feature means (as StandardScaler.mean_)."""
+        self._require_cases()
+        return self._mean[:-1]
+
+    @property
+    def scale_(self):
+        """Feature standard deviations (as StandardScaler.scale_)."""
+        self._require_cases()
+        scale = np.sqrt(np.diag(self._comoment)[:-1] / self.n_samples_seen_)
+        return np.where(scale == 0, 1.0, scale)
+
+    @property
+    def coef_(self):
+        """Weights of the features in their own units."""
+        self._require_cases()
+        sxx = self._comoment[:-1, :-1]
+        sxy = self._comoment[:-1, -1]
+        d = np.sqrt(np.diag(sxx))
+        d = np.where(d == 0, 1.0, d)
+        try:
+            lower = np.linalg.cholesky(sxx / np.outer(d, d))
+            # A (near-)zero pivot means collinear features
+            if np.diag(lower).min() > 1e-7:
+                return np.linalg.solve(lower.T, np.linalg.solve(lower, sxy / d)) / d
+        except np.linalg.LinAlgError:
+            pass
+        # Minimum-norm solution in the features' own units, like scikit-learn
+        return np.linalg.lstsq(sxx, sxy, rcond=None)[0]
+
+    @property
+    def coef_standardized_(self):
+        """Weights per standard deviation of each feature."""
+        return self.coef_ * self.scale_
+
+    @property
+    def intercept_(self):
+        return self._mean[-1] - self.mean_ @ self.coef_
+
+    @property
+    def rss_(self):
+        """Residual sum of squares over the cases seen."""
+        coef = self.coef_
+        return max(self._comoment[-1, -1] - coef @ self._comoment[:-1, -1], 0.0)
+
+    @property
+    def r2_(self):
+        """R² over the cases seen."""
+        return 1.0 - self.rss_ / self._comoment[-1, -1]
+
+    def predict(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef_ + self.intercept_
@@ -0,0 +1,293 @@
+"""
+Synthetic Data Helpers for Machine Learning For Dentists
+=========================================================
+
+Shared machinery for the chapter data generators when they have to produce
+far more rows than fit comfortably in memory.
+
+Rows are simulated in fixed-size *blocks*. Every block draws from its own
+random stream, derived from the run seed and the block number, so the values
+of a row never depend on how the output is later cut into chunks.
+
+Because blocks are independent, they can also be simulated in a pool of
+worker processes. The result is bit-identical for any number of workers.
+
+Usage:
+    from utils.synthetic_data import iter_chunks, write_chunks, generate_parallel
+
+    # simulate_block(rng, n_rows, first_row) -> DataFrame
+    chunks = iter_chunks(simulate_block, n_rows=50_000_000,
+                         chunk_size=250_000, seed=42)
+    write_chunks(chunks, 'implant_success_data.parquet')
+
+    # All rows in memory, simulated on every core
+    df = generate_parallel(simulate_block, n_rows=10_000_000, seed=42)
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pathlib import Path
+
+from .data_io import _require_pyarrow, to_compact
+
+# =============================================================================
+# BLOCK RANDOM STREAMS
+# =============================================================================
+
+# Rows per simulation block. Changing this changes the generated values, so
+# keep it fixed once datasets have been published.
+BLOCK_SIZE = 65_536
+
+
+def block_rng(seed, block_index):
+    """
+    Get the independent random generator for one block of rows.
+
+    Parameters
+    ----------
+    seed : int
+        Seed of the whole generation run.
+    block_index : int
+        Position of the block (0 for rows 0..BLOCK_SIZE-1, and so on).
+
+    Returns
+    -------
+    numpy.random.Generator
+        Generator seeded with child ``block_index`` of ``SeedSequence(seed)``.
+    """
+    seed_sequence = np.random.SeedSequence(seed, spawn_key=(block_index,))
+    return np.random.default_rng(seed_sequence)
+
+
+def format_ids(prefix, first_id, n_rows, width=4):
+    """
+    Build zero-padded identifiers like ``PAT-0001`` without a Python loop.
+
+    Parameters
+    ----------
+    prefix : str
+        Text placed before the number (e.g. 'PAT-').
+    first_id : int
+        Number of the first identifier.
+    n_rows : int
+        How many identifiers to build.
+    width : int
+        Minimum number of digits (longer numbers are not truncated).
+
+    Returns
+    -------
+    numpy.ndarray
+        Array of identifier strings.
+    """
+    numbers = np.arange(first_id, first_id + n_rows).astype(str)
+    return np.char.add(prefix, np.char.zfill(numbers, width))
+
+
+# =============================================================================
+# CHUNKED GENERATION
+# =============================================================================
+
+def _simulate_one_block(simulate_block, seed, block_index, first_row, n_block):
+    """Simulate a single block; runs in the calling or a worker process."""
+    block = simulate_block(block_rng(seed, block_index), n_block, first_row)
+    block.index = pd.RangeIndex(first_row, first_row + n_block)
+    return block
+
+
+def _simulate_blocks(simulate_block, n_rows, seed, block_size, n_workers=1):
+    """
+    Yield the simulated blocks of a run in order, one DataFrame at a time.
+
+    With more than one worker, blocks are simulated in a process pool. At
+    most two blocks per worker are in flight, so memory stays bounded even
+    when the consumer is slower than the pool.
+    """
+    tasks = [
+        (block_index, first_row, min(block_size, n_rows - first_row))
+        for block_index, first_row in enumerate(range(0, n_rows, block_size))
+    ]
+
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    n_workers = min(n_workers, len(tasks))
+
+    if n_workers <= 1:
+        for block_index, first_row, n_block in tasks:
+            yield _simulate_one_block(simulate_block, seed, block_index,
+                                      first_row, n_block)
+        return
+
+    with ProcessPoolExecutor(max_workers=n_workers) as pool:
+        in_flight = deque()
+        task_iter = iter(tasks)
+        for block_index, first_row, n_block in task_iter:
+            in_flight.append(pool.submit(_simulate_one_block, simulate_block,
+                                         seed, block_index, first_row, n_block))
+            if len(in_flight) >= 2 * n_workers:
+                break
+        for block_index, first_row, n_block in task_iter:
+            yield in_flight.popleft().result()
+            in_flight.append(pool.submit(_simulate_one_block, simulate_block,
+                                         seed, block_index, first_row, n_block))
+        while in_flight:
+            yield in_flight.popleft().result()
+
+
+def iter_chunks(simulate_block, n_rows, chunk_size=100_000, seed=42,
+                block_size=BLOCK_SIZE, n_workers=1):
+    """
+    Generate a synthetic dataset as a stream of fixed-size chunks.
+
+    Only the current chunk plus a few simulation blocks are held in memory,
+    whatever the total number of rows. Concatenating the chunks gives the
+    same DataFrame for every ``chunk_size`` and every ``n_workers``.
+
+    Parameters
+    ----------
+    simulate_block : callable
+        ``simulate_block(rng, n_rows, first_row)`` returning a DataFrame with
+        ``n_rows`` rows. ``first_row`` is the 0-based position of its first
+        row in the whole dataset (used for patient IDs).
+    n_rows : int
+        Total number of rows to generate.
+    chunk_size : int
+        Rows per yielded chunk (the last chunk may be shorter).
+    seed : int
+        Seed of the generation run.
+    block_size : int
+        Rows per simulation block. Leave at BLOCK_SIZE to reproduce
+        published datasets.
+    n_workers : int or None
+        Worker processes simulating blocks (None uses every core, 1 runs
+        in the current process). ``simulate_block`` must be picklable,
+        i.e. a module-level function.
+
+    Yields
+    ------
+    pandas.DataFrame
+        The next chunk, indexed by its global row numbers.
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk_size must be at least 1, got {chunk_size}")
+
+    pending = []
+    pending_rows = 0
+    blocks = _simulate_blocks(simulate_block, n_rows, seed, block_size,
+                              n_workers=n_workers)
+    for block in blocks:
+        pending.append(block)
+        pending_rows += len(block)
+
+        while pending_rows >= chunk_size:
+            buffer = pending[0] if len(pending) == 1 else pd.concat(pending)
+            yield buffer.iloc[:chunk_size]
+            rest = buffer.iloc[chunk_size:]
+            pending = [rest] if len(rest) else []
+            pending_rows = len(rest)
+
+    if pending_rows:
+        yield pending[0] if len(pending) == 1 else pd.concat(pending)
+
+
+def generate_parallel(simulate_block, n_rows, seed=42, n_workers=None,
+                      block_size=BLOCK_SIZE):
+    """
+    Generate a whole synthetic dataset in memory using a process pool.
+
+    Every block is an independent task with its own seed stream, so the
+    result is bit-identical for any number of workers and equal to the
+    concatenation of ``iter_chunks`` with the same seed.
+
+    Parameters
+    ----------
+    simulate_block : callable
+        Module-level ``simulate_block(rng, n_rows, first_row)`` function.
+    n_rows : int
+        Total number of rows to generate.
+    seed : int
+        Seed of the generation run.
+    n_workers : int or None
+        Worker processes (None uses every core).
+    block_size : int
+        Rows per simulation block.
+
+    Returns
+    -------
+    pandas.DataFrame
+        All generated rows with a RangeIndex.
+    """
+    blocks = list(_simulate_blocks(simulate_block, n_rows, seed, block_size,
+                                   n_workers=n_workers))
+    if not blocks:
+        return simulate_block(block_rng(seed, 0), 0, 0)
+    return pd.concat(blocks) if len(blocks) > 1 else blocks[0]
+
+
+# =============================================================================
+# WRITING CHUNKS TO DISK
+# =============================================================================
+
+def write_chunks(chunks, path, fmt=None, dataset=None):
+    """
+    Write a stream of DataFrame chunks to one file, one chunk at a time.
+
+    Parameters
+    ----------
+    chunks : iterable of pandas.DataFrame
+        Chunks with identical columns and dtypes (e.g. from iter_chunks).
+    path : str or Path
+        Output file. Existing files are overwritten.
+    fmt : str, optional
+        'csv', 'parquet' or 'feather'. Inferred from the file suffix when
+        not given.
+    dataset : str, optional
+        Compact dtype profile (see utils.data_io) applied to each chunk
+        before it is written to Parquet/Feather.
+
+    Returns
+    -------
+    int
+        Number of rows written.
+    """
+    path = Path(path)
+    fmt = fmt or path.suffix.lstrip('.').lower()
+    if fmt not in ('csv', 'parquet', 'feather'):
+        raise ValueError(f"Unsupported output format: {fmt!r}")
+
+    n_written = 0
+
+    if fmt == 'csv':
+        for chunk in chunks:
+            chunk.to_csv(path, mode='w' if n_written == 0 else 'a',
+                         header=(n_written == 0), index=False)
+            n_written += len(chunk)
+        return n_written
+
+    pyarrow = _require_pyarrow()
+    import pyarrow.parquet
+
+    writer = None
+    schema = None
+    try:
+        for chunk in chunks:
+            if dataset is not None:
+                chunk = to_compact(chunk, dataset)
+            table = pyarrow.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                if fmt == 'parquet':
+                    writer = pyarrow.parquet.ParquetWriter(path, schema)
+                else:
+                    # Feather v2 is the Arrow IPC file format
+                    writer = pyarrow.ipc.new_file(path, schema)
+            writer.write_table(table.cast(schema))
+            n_written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return n_written